@@ -0,0 +1,150 @@
+# animation_export.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+import numpy as np
+
+from hdf5_file_manager import file_manager
+from hdf5_slicing import plane_shape, read_plane, read_planes
+from frame_renderer import FrameRenderer, value_limits
+from instrumentation import span
+
+def default_workers():
+    """Number of render processes offered by default (one core is left to the viewer)."""
+    return max(1, min(8, (os.cpu_count() or 1) - 1))
+
+def frame_title(dataset_name):
+    """Title drawn on the frame of a snapshot."""
+    return f"Abs(E) = {dataset_name}"
+
+def format_status(status):
+    """Describe the progress of every render process, status maps pid to (dataset name, frames done)."""
+    return " | ".join(f"{pid}: {name} ({done})" for pid, (name, done) in sorted(status.items()))
+
+# ---------- Render processes ----------
+_process_state = {}                                     # Plane selection and renderer of one pool process
+
+def _init_process(file_path, axis, slice_index, boundaries):
+    """Remember the plane selection in a new pool process."""
+    _process_state.update(file_path=file_path, axis=axis, slice_index=slice_index,
+                          boundaries=boundaries, renderer=None, renderer_key=None)
+
+def _read_plane(dataset_name):
+    with file_manager.reading(_process_state['file_path']) as file:
+        return read_plane(file[dataset_name], _process_state['axis'], _process_state['slice_index'],
+                          _process_state['boundaries'])
+
+def _plane_max(index, dataset_name):
+    """Return (index, pid, maximum, plane shape) of one snapshot plane."""
+    plane = _read_plane(dataset_name)
+    return index, os.getpid(), float(np.max(plane)), plane.shape
+
+def _render_frame(index, dataset_name, renderer_options):
+    """Return (index, pid, RGB frame) of one snapshot. The renderer is built once per process."""
+    key = repr(sorted(renderer_options.items()))
+    if _process_state['renderer_key'] != key:
+        _process_state['renderer'] = FrameRenderer(**renderer_options)
+        _process_state['renderer_key'] = key
+    frame = _process_state['renderer'].render(_read_plane(dataset_name), title=frame_title(dataset_name))
+    return index, os.getpid(), frame
+
+# ---------- Frame generation ----------
+def iter_frames(file_path, dataset_names, axis, slice_index, boundaries=(0, 0, 0, 0), workers=1,
+                callback=None, scale='log', **renderer_options):
+    """Yield the RGB frames of a time series in order.
+
+    With workers > 1 the planes are read and rendered by a pool of processes. Frames that finish early
+    are held back until their predecessors are done, at most 2 frames per process are kept in memory.
+    callback(status, fraction) reports progress, status maps process ids to (dataset name, frames done).
+    """
+    if workers > 1:
+        yield from _iter_frames_parallel(file_path, dataset_names, axis, slice_index, boundaries,
+                                         workers, callback, scale, renderer_options)
+        return
+
+    status = {}
+    pid = os.getpid()
+    with file_manager.reading(file_path) as file:
+
+        # Single pass over the selected planes: find the global maximum and keep the planes
+        def show_progress(dataset_name, fraction):
+            if callback is not None:
+                status[pid] = (dataset_name, 0)
+                callback(dict(status), 0.5 * fraction)
+
+        with span("read planes", 'io', frames=len(dataset_names)):
+            global_max, planes = read_planes(file, dataset_names, axis, slice_index, boundaries,
+                                             callback=show_progress)
+
+        # Colour limits are shared by all frames: log10 of the offset up to log10 of the global maximum
+        shape = plane_shape(file[dataset_names[0]].shape, axis, boundaries)
+        renderer = FrameRenderer(*value_limits(global_max, scale), shape=shape, scale=scale, **renderer_options)
+
+        for i, dataset_name in enumerate(dataset_names):
+            if callback is not None:
+                status[pid] = (dataset_name, i)
+                callback(dict(status), 0.5 + 0.5 * i / len(dataset_names))
+
+            # Planes that did not fit in the cache are read again
+            sliced_data = planes[i]
+            if sliced_data is None:
+                sliced_data = read_plane(file[dataset_name], axis, slice_index, boundaries)
+            planes[i] = None
+
+            with span("render frame", 'render'):
+                frame = renderer.render(sliced_data, title=frame_title(dataset_name))
+            yield frame
+
+def _iter_frames_parallel(file_path, dataset_names, axis, slice_index, boundaries, workers,
+                          callback, scale, renderer_options):
+    """Process pool version of iter_frames."""
+    n_frames = len(dataset_names)
+    status = {}
+
+    # Spawned processes do not inherit the Qt and HDF5 state of the viewer
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_process,
+                               initargs=(file_path, axis, slice_index, boundaries))
+    try:
+        # Pass 1: global maximum of the selected planes
+        futures = [pool.submit(_plane_max, i, name) for i, name in enumerate(dataset_names)]
+        global_max, shape = -np.inf, None
+        for done, future in enumerate(as_completed(futures), 1):
+            index, pid, plane_max, shape = future.result()
+            global_max = max(global_max, plane_max)
+            if callback is not None:
+                status[pid] = (dataset_names[index], 0)
+                callback(dict(status), 0.5 * done / n_frames)
+
+        vmin, vmax = value_limits(global_max, scale)
+        options = dict(renderer_options, vmin=vmin, vmax=vmax, shape=shape, scale=scale)
+
+        # Pass 2: render with a bounded number of frames in flight and yield them in order
+        window = 2 * workers
+        pending = {}                                    # {future: frame index}
+        ready = {}                                      # {frame index: frame} finished out of order
+        frames_done = {}                                # {pid: frames rendered}
+        submitted = next_index = 0
+        while next_index < n_frames:
+            while submitted < n_frames and len(pending) + len(ready) < window:
+                future = pool.submit(_render_frame, submitted, dataset_names[submitted], options)
+                pending[future] = submitted
+                submitted += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                index, pid, frame = future.result()
+                ready[index] = frame
+                frames_done[pid] = frames_done.get(pid, 0) + 1
+                status[pid] = (dataset_names[index], frames_done[pid])
+
+            if callback is not None:
+                callback(dict(status), 0.5 + 0.5 * (next_index + len(ready)) / n_frames)
+
+            while next_index in ready:
+                yield ready.pop(next_index)
+                next_index += 1
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
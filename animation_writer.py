@@ -0,0 +1,89 @@
+# animation_writer.py
+import os
+
+import numpy as np
+from matplotlib import colormaps
+from PIL import Image, GifImagePlugin
+
+FRAME_DURATION = 200                                    # Milliseconds per frame
+ANIMATION_FILTERS = "GIF Files (*.gif);;MP4 Video (*.mp4);;WebM Video (*.webm);;All Files (*)"
+VIDEO_CODECS = {'.mp4': 'libx264', '.webm': 'libvpx-vp9'}
+
+def animation_path(path, selected_filter=""):
+    """Add the extension of the selected file filter if the path has no known one."""
+    if os.path.splitext(path)[1].lower() in ('.gif',) + tuple(VIDEO_CODECS):
+        return path
+    for extension in ('.mp4', '.webm'):
+        if extension in selected_filter:
+            return path + extension
+    return path + '.gif'
+
+def fixed_palette(cmap='jet', grays=16):
+    """Palette image of the colormap plus gray levels for the background, labels and text."""
+    colors = colormaps[cmap](np.linspace(0, 1, 256 - grays))[:, :3] * 255
+    gray = np.repeat(np.linspace(0, 255, grays)[:, None], 3, axis=1)
+    palette = Image.new('P', (1, 1))
+    palette.putpalette(np.concatenate([gray, colors]).astype(np.uint8).ravel().tolist())
+    return palette
+
+def downscale(frame, factor):
+    """Shrink a frame by an integer factor by averaging factor x factor pixel boxes."""
+    if factor <= 1:
+        return frame
+    return np.asarray(Image.fromarray(frame).reduce(factor))
+
+class GifStreamWriter:
+    """Write a looping GIF frame by frame.
+
+    Every frame is mapped to one fixed global palette and written to the file immediately,
+    so memory does not grow with the number of frames (PIL keeps all frames until it saves).
+    """
+    def __init__(self, path, duration=FRAME_DURATION, cmap='jet'):
+        self.file =     open(path, 'wb')
+        self.duration = duration
+        self.palette =  fixed_palette(cmap)
+        self.started =  False
+
+    def append_data(self, frame):
+        image = Image.fromarray(frame).quantize(palette=self.palette, dither=Image.Dither.NONE)
+        if not self.started:                            # Logical screen, global palette and loop extension
+            header, _ = GifImagePlugin.getheader(image, info={'loop': 0, 'optimize': False})
+            self.file.write(b"".join(header))
+            self.started = True
+        self.file.write(b"".join(GifImagePlugin.getdata(image, duration=self.duration)))
+
+    def close(self):
+        if self.started:
+            self.file.write(b";")                       # GIF trailer
+        self.file.close()
+
+class AnimationWriter:
+    """Append rendered frames to a GIF, MP4 or WebM file as soon as they are available."""
+    def __init__(self, path, duration=FRAME_DURATION, downscale_factor=1):
+        self.path =             path
+        self.downscale_factor = downscale_factor
+        self.frames =           0
+
+        extension = os.path.splitext(path)[1].lower()
+        if extension in VIDEO_CODECS:                   # ffmpeg bundled with imageio-ffmpeg
+            import imageio.v2 as imageio                # Only loaded for videos
+            self.writer = imageio.get_writer(path, format='FFMPEG', fps=1000 / duration,
+                                             codec=VIDEO_CODECS[extension], quality=8, macro_block_size=2)
+        else:
+            self.writer = GifStreamWriter(path, duration)
+
+    def append(self, frame):
+        self.writer.append_data(downscale(frame, self.downscale_factor))
+        self.frames += 1
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is not None and os.path.exists(self.path):     # Do not leave a truncated file behind
+            os.remove(self.path)
+        return False
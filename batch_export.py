@@ -0,0 +1,174 @@
+# coding=utf-8
+"""
+Headless export of time-series animations and snapshot images, e.g. for a whole
+parameter scan on a compute node. No Qt window is opened.
+
+Example:
+    python batch_export.py scan_*/fileout.h5 -d E_abs -a y -i 100 -b 10 10 10 10 -F mp4 -w 16
+    python batch_export.py scan_directory/ -d E_abs -F png
+"""
+
+# import standard modules
+import argparse
+import fnmatch
+import os
+import sys
+
+from PIL import Image
+
+from hdf5_catalog import HDF5Catalog
+from time_series import TimeSeriesIndex
+from animation_export import iter_frames, default_workers, format_status
+from animation_writer import AnimationWriter, FRAME_DURATION
+from workspace import READ_ERRORS, Workspace
+
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+FORMATS = ('gif', 'mp4', 'webm', 'png')
+
+
+def select_datasets(catalog, pattern):
+    """
+    Return {name: [dataset paths]} of the 3D datasets of a catalog matching pattern.
+
+    Snapshots are grouped by family (e.g. E_abs) and sorted by timestep, pattern is
+    compared to the family name and to the dataset path (shell wildcards allowed).
+    Every other matching dataset is exported on its own.
+    """
+    series = TimeSeriesIndex.from_catalog(catalog)
+    families = [family for family in series.families() if fnmatch.fnmatch(family, pattern)]
+
+    selection = {}
+    for entry in catalog.datasets():
+        path = entry['path']
+        snapshot = series.family_of(path)
+        name = snapshot[0] if snapshot else path.lstrip('/')
+        if len(entry['shape']) != 3:
+            continue
+        if name in families or fnmatch.fnmatch(path.lstrip('/'), pattern.lstrip('/')):
+            selection.setdefault(name, []).append(path)
+
+    # Snapshots in timestep order
+    for name, paths in selection.items():
+        paths.sort(key=lambda path: series.family_of(path)[1] if series.family_of(path) else 0)
+    return selection
+
+
+def show_progress(label):
+    """Return a progress callback for iter_frames printing to the terminal."""
+    def callback(status, fraction):
+        line = f"  {label}: {fraction:4.0%}  {format_status(status)}"
+        if sys.stdout.isatty():
+            print(f"\r{line[:160]:<160}", end='', flush=True)
+    return callback
+
+
+def export_series(fname, name, dataset_paths, axis, slice_index, boundaries, colScale, fmt,
+                  output_dir, workers, downscale_factor, duration, stem=None):
+    """Export one series of datasets as an animation or as one PNG per dataset, return the output paths."""
+    stem = stem or os.path.splitext(os.path.basename(fname))[0]
+    base = os.path.join(output_dir, f"{stem}_{name.replace('/', '_')}_{'xyz'[axis]}{slice_index}")
+    renderer_options = {'scale': colScale,
+                        'colorbar_title': "log10(Abs(E))" if colScale == 'log' else "Abs(E)"}
+    frames = iter_frames(fname, dataset_paths, axis, slice_index, boundaries, workers=workers,
+                         callback=show_progress(name), **renderer_options)
+
+    if fmt == 'png':
+        outputs = []
+        for path, frame in zip(dataset_paths, frames):
+            outputs.append(f"{base}_{path.rsplit('/', 1)[-1]}.png")
+            frame = Image.fromarray(frame)
+            if downscale_factor > 1:
+                frame = frame.reduce(downscale_factor)
+            frame.save(outputs[-1])
+        return outputs
+
+    output = f"{base}.{fmt}"
+    with AnimationWriter(output, duration=duration, downscale_factor=downscale_factor) as writer:
+        for frame in frames:
+            writer.append(frame)
+    return [output]
+
+
+def main():
+    #{{{
+
+    # initialize parser for command line options
+    parser  = argparse.ArgumentParser( description="Export time-series animations or snapshot images without the GUI." )
+    parser.add_argument( "filenames", type=str, nargs='+',
+                         help="hdf5 output file(s) from FHELI, or directories of runs (workspaces)." )
+    parser.add_argument( "-d", "--dataset_pattern", type=str, default="E_abs",
+                         help="Snapshot family or dataset path to export, shell wildcards are allowed." )
+    parser.add_argument( "-a", "--axis", type=str, default="y", choices=sorted(AXES),
+                         help="Axis normal to the exported plane." )
+    parser.add_argument( "-i", "--slice", type=int, default=-1,
+                         help="Slice index along the axis (default: center of the grid)." )
+    parser.add_argument( "-b", "--boundaries", type=int, nargs=4, default=[0, 0, 0, 0],
+                         metavar=("TOP", "BOTTOM", "LEFT", "RIGHT"),
+                         help="Absorbing boundary layers removed from the plane." )
+    parser.add_argument( "-s", "--colScale", type=str, default="log", choices=("lin", "log"),
+                         help="Lin or log color scale." )
+    parser.add_argument( "-F", "--format", type=str, default="gif", choices=FORMATS,
+                         help="Animation container, or png for one image per dataset." )
+    parser.add_argument( "-o", "--output_dir", type=str, default=".",
+                         help="Directory of the exported files." )
+    parser.add_argument( "-w", "--workers", type=int, default=default_workers(),
+                         help="Number of render processes." )
+    parser.add_argument( "-r", "--downscale", type=int, default=1,
+                         help="Shrink the frames by this integer factor." )
+    parser.add_argument( "--duration", type=int, default=FRAME_DURATION,
+                         help="Duration of one animation frame in milliseconds." )
+
+    # read all argments from command line
+    args        = parser.parse_args()
+    axis        = AXES[args.axis]
+    boundaries  = tuple(args.boundaries)
+    colScale    = args.colScale
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Runs of a directory are indexed in parallel and named after their directory (scan_01/fileout.h5 -> scan_01)
+    runs = []
+    failed = 0
+    for fname in args.filenames:
+        if os.path.isdir(fname):
+            for run in Workspace.from_directory(fname):
+                if run.error is not None:
+                    print( "  {0}: cannot be read: {1}".format(run.file_path, run.error) )
+                    failed += 1
+                    continue
+                runs.append((run.file_path, run.catalog, run.name.replace(os.sep, '_')))
+        else:
+            try:
+                runs.append((fname, HDF5Catalog.from_file(fname), None))
+            except READ_ERRORS as e:                    # Missing, truncated or corrupt file
+                print( "  {0}: cannot be read: {1}".format(fname, e) )
+                failed += 1
+
+    for fname, catalog, stem in runs:
+        selection = select_datasets(catalog, args.dataset_pattern)
+        if not selection:
+            print( "  {0}: no 3D datasets match '{1}'".format(fname, args.dataset_pattern) )
+            failed += 1
+            continue
+
+        for name, dataset_paths in selection.items():
+            shape = catalog.get(dataset_paths[0])['shape']
+            slice_index = shape[axis] // 2 if args.slice < 0 else args.slice
+            try:
+                outputs = export_series(fname, name, dataset_paths, axis, slice_index, boundaries,
+                                        colScale, args.format, args.output_dir, args.workers,
+                                        args.downscale, args.duration, stem)
+            except (ValueError, IndexError, OSError) as e:
+                print( "\r  {0}: {1} failed: {2}".format(fname, name, e) )
+                failed += 1
+                continue
+            print( "\r  {0}: {1} ({2} datasets) -> {3}".format(fname, name, len(dataset_paths),
+                                                               outputs[0] if len(outputs) == 1 else args.output_dir) )
+
+    return 1 if failed else 0
+
+    #}}}
+
+
+if __name__ == '__main__':
+    sys.exit(main())
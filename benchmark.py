@@ -0,0 +1,427 @@
+# coding=utf-8
+"""
+Reproducible benchmarks of the viewer's hot paths (file open, tree build, statistics, slice
+scrubbing, GIF export, the Operation window FFT and the theory kernels), run on a synthetic
+FHELI file or on a real one. Results are written as JSON, a previous result can be compared.
+
+Example:
+    python benchmark.py -s 128 128 96 -n 300 -o before.json
+    python benchmark.py -s 128 128 96 -n 300 -o after.json --compare before.json
+    python benchmark.py scan_01/fileout.h5 -b 'scrub_*' stats --spans
+"""
+
+# import standard modules
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import h5py
+import numpy as np
+
+from hdf5_file_manager import file_manager
+from hdf5_catalog import HDF5Catalog
+from hdf5_slicing import read_plane
+from dataset_stats import compute_statistics
+from time_series import TimeSeriesIndex
+from instrumentation import profiler
+
+
+FORMAT_VERSION = 1
+BENCHMARKS = {}                                         # {name: (setup function, options)}
+
+
+def benchmark(name, qt=False, cold=False, max_repeat=None):
+    """
+    Register a benchmark. The decorated setup(context) returns (run, units): run() is timed,
+    units is the number of items (planes, frames, ...) one run processes.
+
+    qt:             needs a QApplication (skipped if PyQt5 is not available)
+    cold:           the pooled file handle, and with it the HDF5 chunk cache, is dropped before every run
+    max_repeat:     upper limit of the repetitions, for slow benchmarks
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, dict(qt=qt, cold=cold, max_repeat=max_repeat))
+        return setup
+    return register
+
+
+class Context:
+    """The benchmarked file, its catalog and snapshots, and objects shared by several benchmarks."""
+    def __init__(self, file_path, args, work_dir):
+        self.file_path =    file_path
+        self.args =         args
+        self.work_dir =     work_dir                    # Scratch directory, removed after the run
+        self.catalog =      HDF5Catalog.from_file(file_path)
+        self.series =       TimeSeriesIndex.from_catalog(self.catalog)
+        self.family =       self.series.default_family()
+        self.snapshots =    self.series.paths(self.family) if self.family else []
+        self.shape =        self.catalog.get(self.snapshots[-1])['shape'] if self.snapshots else None
+        self._app =         None
+
+    def qt_app(self):
+        """Return the QApplication, created on first use."""
+        if self._app is None:
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            from PyQt5.QtWidgets import QApplication, QMessageBox
+            self._app = QApplication.instance() or QApplication(sys.argv[:1])
+            # A warning box would block the run, print the message instead
+            QMessageBox.warning = staticmethod(lambda parent, title, text, *args: print( "  {0}: {1}".format(title, text) ))
+        return self._app
+
+    def describe(self):
+        """Metadata of the benchmarked file, stored with the results."""
+        entry = self.catalog.get(self.snapshots[-1]) if self.snapshots else {}
+        with file_manager.reading(self.file_path) as file:
+            attributes = {key: value.item() if hasattr(value, 'item') else value for key, value in file.attrs.items()}
+        return {
+            'path':         os.path.abspath(self.file_path),
+            'bytes':        os.path.getsize(self.file_path),
+            'objects':      len(self.catalog.entries),
+            'family':       self.family,
+            'snapshots':    len(self.snapshots),
+            'shape':        list(self.shape) if self.shape else None,
+            'dtype':        str(entry['dtype']) if entry else None,
+            'chunks':       list(entry['chunks']) if entry.get('chunks') else None,
+            'attributes':   attributes,
+        }
+
+
+# ---------- Benchmarks ----------
+@benchmark('file_open', cold=True)
+def bench_file_open(context):
+    """Open the file through the handle pool, as on every first read."""
+    def run():
+        with file_manager.reading(context.file_path):
+            pass
+    return run, 1
+
+@benchmark('catalog', cold=True)
+def bench_catalog(context):
+    """Metadata walk of the whole file when it is loaded."""
+    return (lambda: HDF5Catalog.from_file(context.file_path)), len(context.catalog.entries)
+
+@benchmark('tree_build', qt=True)
+def bench_tree_build(context):
+    """Top level of the tree, search index and time-series index built from the catalog, as in load_file."""
+    context.qt_app()
+    from main_hdf5_viewer import HDF5Viewer
+    from search_index import SearchIndex
+    viewer = HDF5Viewer()
+    viewer.file_path = context.file_path
+
+    def run():
+        viewer.tree_widget.clear()
+        viewer.catalog = context.catalog
+        viewer.populate_tree('/', viewer.tree_widget)
+        viewer.set_search_index(SearchIndex.from_catalog(context.catalog))
+        viewer.time_series = TimeSeriesIndex.from_catalog(context.catalog)
+    return run, len(context.catalog.entries)
+
+@benchmark('stats', cold=True)
+def bench_stats(context):
+    """Statistics of the latest snapshot in one pass over its blocks (the stats cache is bypassed)."""
+    def run():
+        with file_manager.reading(context.file_path) as file:
+            compute_statistics(file[context.snapshots[-1]])
+    return run, 1
+
+def scrub_slices(axis):
+    def setup(context):
+        """Read every plane of the latest snapshot along one axis, as when dragging the slice slider."""
+        def run():
+            with file_manager.reading(context.file_path) as file:
+                dataset = file[context.snapshots[-1]]
+                for index in range(dataset.shape[axis]):
+                    read_plane(dataset, axis, index)
+        return run, context.shape[axis]
+    return setup
+
+for _axis, _label in enumerate('xyz'):
+    benchmark(f'scrub_slices_{_label}', cold=True)(scrub_slices(_axis))
+
+@benchmark('scrub_timesteps', cold=True)
+def bench_scrub_timesteps(context):
+    """Read the middle y plane of every snapshot, as when dragging the timestep slider."""
+    def run():
+        with file_manager.reading(context.file_path) as file:
+            for path in context.snapshots:
+                read_plane(file[path], 1, context.shape[1] // 2)
+    return run, len(context.snapshots)
+
+@benchmark('gif_export', cold=True, max_repeat=3)
+def bench_gif_export(context):
+    """Read, render and encode the first snapshots as a GIF, with the export's number of workers."""
+    from animation_export import iter_frames
+    from animation_writer import AnimationWriter
+    paths = context.snapshots[:context.args.frames]
+    output = os.path.join(context.work_dir, 'frames.gif')
+
+    def run():
+        with AnimationWriter(output) as writer:
+            for frame in iter_frames(context.file_path, paths, 1, context.shape[1] // 2,
+                                     workers=context.args.workers):
+                writer.append(frame)
+    return run, len(paths)
+
+@benchmark('operation_fft', qt=True)
+def bench_operation_fft(context):
+    """Centered log-magnitude FFT of a plane of the latest snapshot in the Operation window."""
+    context.qt_app()
+    from operation_window import OperationWindow
+    window = OperationWindow()
+    window.ft_shift_checkbox.setChecked(True)
+    window.ft_log_checkbox.setChecked(True)
+    with file_manager.reading(context.file_path) as file:
+        plane = read_plane(file[context.snapshots[-1]], 2, context.shape[2] // 2)
+    return (lambda: window.compute_fourier_transform(plane)), 1
+
+def theory_kernel(equation):
+    def setup(context):
+        """Evaluate one equation of the theory window over its default x range."""
+        window = theory_window(context)
+        window.equation_combo.setCurrentText(equation)  # Rebuilds the parameter widgets
+
+        def run():
+            with np.errstate(all='ignore'):
+                window.evaluate_equation(window.generate_x_values())
+        return run, 1
+    return setup
+
+def theory_window(context):
+    """Theory window with the plasma parameters of the file, shared by the kernel benchmarks."""
+    if getattr(context, 'theory_window', None) is None:
+        context.qt_app()
+        from theoretical_window import TheoreticalWindow
+        window = TheoreticalWindow()
+        window.equation_combo.setCurrentText("Plasma Parameters")
+
+        # Same sources as the default HDF5 paths of the window
+        with file_manager.reading(context.file_path) as file:
+            def value(path, default, reduce=np.max):
+                return float(reduce(file[path][()])) if path in file else default
+            window.extracted_vars = {
+                'T':    value('config/period', 100),
+                'n_e':  value('n_e', 1e16),
+                'B0':   value('B0z', .1),
+                'r_a':  value('config/ant_radius', .1),
+                'L_a':  value('config/ant_lenght', .1),
+            }
+        with np.errstate(all='ignore'):
+            window.plasma_params = window.calculate_plasma_parameters()
+        context.theory_window = window
+    return context.theory_window
+
+THEORY_EQUATIONS = ("k-beta Curve", "k_boundaries", "k_eigenvalues(cond.)", "k_eigenvalues(Insu.)",
+                    "Wave_components(Helicon)", "Dispersion_Relation", "Sinusoidal_Wave")
+
+for _equation in THEORY_EQUATIONS:
+    benchmark(f'theory:{_equation}', qt=True)(theory_kernel(_equation))
+
+
+# ---------- Runner ----------
+def time_benchmark(name, context, repeat, warmup, spans=False):
+    """Run one benchmark and return its result dict."""
+    setup, options = BENCHMARKS[name]
+    if options['qt']:
+        try:
+            import PyQt5                                # noqa: F401
+        except ImportError as e:
+            return {'skipped': f"PyQt5 not available ({e})"}
+    if options['max_repeat']:
+        repeat = min(repeat, options['max_repeat'])
+
+    try:
+        run, units = setup(context)
+    except Exception as e:
+        return {'error': f"setup failed: {e!r}"}
+
+    times = []
+    profiler.clear()
+    for i in range(warmup + repeat):
+        if options['cold']:
+            file_manager.invalidate(context.file_path)
+        profiler.set_enabled(spans and i >= warmup)
+        start = time.perf_counter()
+        try:
+            run()
+        except Exception as e:
+            profiler.set_enabled(False)
+            return {'error': repr(e)}
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            times.append(elapsed)
+    profiler.set_enabled(False)
+
+    median = statistics.median(times)
+    result = {
+        'repeat':       len(times),
+        'units':        units,
+        'times_s':      times,
+        'min_s':        min(times),
+        'median_s':     median,
+        'mean_s':       statistics.fmean(times),
+        'stdev_s':      statistics.stdev(times) if len(times) > 1 else 0.,
+        'per_unit_ms':  1000 * median / units if units else None,
+        'cold':         options['cold'],
+    }
+    if spans:
+        result['spans'] = profiler.summary()
+    return result
+
+def environment():
+    """Versions and machine of the run, so that results of different machines are not mixed up."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True).stdout.strip() or None
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                                    capture_output=True, text=True).stdout.strip())
+    except OSError:
+        commit, dirty = None, None
+    return {
+        'date':         datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'command':      sys.argv,
+        'git_commit':   commit,
+        'git_dirty':    dirty,
+        'python':       platform.python_version(),
+        'numpy':        np.__version__,
+        'h5py':         h5py.__version__,
+        'hdf5':         h5py.version.hdf5_version,
+        'platform':     platform.platform(),
+        'machine':      platform.machine(),
+        'cpu_count':    os.cpu_count(),
+    }
+
+def compare(results, baseline):
+    """Print the change of the median times against a baseline result file."""
+    print( "\n  {0:<32} {1:>12} {2:>12} {3:>9}".format("benchmark", "baseline ms", "now ms", "change") )
+    changes = {}
+    for name, result in results['results'].items():
+        old = baseline['results'].get(name, {})
+        if 'median_s' not in result or 'median_s' not in old:
+            continue
+        change = result['median_s'] / old['median_s'] - 1
+        changes[name] = change
+        print( "  {0:<32} {1:12.2f} {2:12.2f} {3:+8.1%}".format(name, 1000 * old['median_s'],
+                                                               1000 * result['median_s'], change) )
+    for key in ('shape', 'dtype', 'chunks', 'snapshots'):
+        if baseline.get('data', {}).get(key) != results['data'].get(key):
+            print( "  (the baseline data differs: {0} = {1})".format(key, baseline.get('data', {}).get(key)) )
+    return changes
+
+
+def main():
+    #{{{
+
+    # initialize parser for command line options
+    parser  = argparse.ArgumentParser( description="Benchmark the viewer on a synthetic or real FHELI file, results as JSON." )
+    parser.add_argument( "file", type=str, nargs='?', default=None,
+                         help="HDF5 file to benchmark, a synthetic file is generated if not given." )
+    parser.add_argument( "-b", "--bench", type=str, nargs='+', default=['*'],
+                         help="Benchmarks to run (shell wildcards allowed)." )
+    parser.add_argument( "-l", "--list", action='store_true',
+                         help="List the benchmarks and exit." )
+    parser.add_argument( "-r", "--repeat", type=int, default=5,
+                         help="Timed runs per benchmark, the median is reported." )
+    parser.add_argument( "--warmup", type=int, default=1,
+                         help="Untimed runs before the timed ones." )
+    parser.add_argument( "-o", "--output", type=str, default=None,
+                         help="JSON file for the results." )
+    parser.add_argument( "--compare", type=str, default=None,
+                         help="JSON file of a previous run to compare with." )
+    parser.add_argument( "--fail-above", type=float, default=None, metavar="PERCENT",
+                         help="With --compare, fail if a median time got slower by more than this." )
+    parser.add_argument( "--spans", action='store_true',
+                         help="Record the profiling spans of the timed runs in the results." )
+    parser.add_argument( "-s", "--shape", type=int, nargs=3, default=[96, 96, 96], metavar=("NX", "NY", "NZ"),
+                         help="Grid of the synthetic file." )
+    parser.add_argument( "-n", "--snapshots", type=int, default=200,
+                         help="Snapshots of the synthetic file." )
+    parser.add_argument( "--chunks", type=int, nargs=3, default=None,
+                         help="Chunk shape of the synthetic file, contiguous if not given." )
+    parser.add_argument( "--seed", type=int, default=0,
+                         help="Seed of the synthetic file." )
+    parser.add_argument( "--frames", type=int, default=20,
+                         help="Snapshots in the GIF export benchmark." )
+    parser.add_argument( "-w", "--workers", type=int, default=1,
+                         help="Render processes of the GIF export benchmark." )
+
+    # read all argments from command line
+    args    = parser.parse_args()
+
+    if args.list:
+        for name, (setup, options) in BENCHMARKS.items():
+            print( "  {0:<32} {1}".format(name, (setup.__doc__ or "").strip().splitlines()[0] if setup.__doc__ else "") )
+        return 0
+
+    names = [name for name in BENCHMARKS if any(fnmatch.fnmatch(name, pattern) for pattern in args.bench)]
+    if not names:
+        print( "No benchmark matches {0}, see --list".format(" ".join(args.bench)) )
+        return 1
+
+    # generate the synthetic file (removed afterwards)
+    temp_dir = tempfile.mkdtemp(prefix='benchmark_')
+    file_path = args.file
+    generated = None
+    if file_path is None:
+        from synthetic_data import write_file
+        file_path = os.path.join(temp_dir, 'fileout.h5')
+        generated = dict(shape=args.shape, snapshots=args.snapshots, seed=args.seed,
+                         chunks=tuple(args.chunks) if args.chunks else None)
+        print( "Writing synthetic file: {0} snapshots of shape {1}".format(args.snapshots, tuple(args.shape)) )
+        write_file(file_path, **generated)
+
+    try:
+        context = Context(file_path, args, temp_dir)
+        if not context.snapshots:
+            print( "{0} has no snapshots (<name>__tintNNNNN)".format(file_path) )
+            return 1
+
+        results = {'format': FORMAT_VERSION, 'environment': environment(), 'data': context.describe(),
+                   'generated': generated, 'settings': {'repeat': args.repeat, 'warmup': args.warmup,
+                   'frames': args.frames, 'workers': args.workers}, 'results': {}}
+        print( "{0}: {1} x {2} {3}\n".format(file_path, len(context.snapshots), tuple(context.shape),
+                                            results['data']['dtype']) )
+
+        for name in names:
+            result = time_benchmark(name, context, args.repeat, args.warmup, args.spans)
+            results['results'][name] = result
+            if 'median_s' in result:
+                print( "  {0:<32} {1:10.2f} ms  (min {2:.2f}, {3:.3f} ms per item)".format(
+                    name, 1000 * result['median_s'], 1000 * result['min_s'], result['per_unit_ms']) )
+            else:
+                print( "  {0:<32} {1}".format(name, result.get('skipped') or result.get('error')) )
+    finally:
+        file_manager.close_all()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1)
+        print( "\nResults written to {0}".format(args.output) )
+
+    failed = any('error' in result for result in results['results'].values())
+    if args.compare:
+        with open(args.compare) as f:
+            changes = compare(results, json.load(f))
+        if args.fail_above is not None:
+            slower = [name for name, change in changes.items() if 100 * change > args.fail_above]
+            if slower:
+                print( "\nFAIL: slower by more than {0}%: {1}".format(args.fail_above, ", ".join(slower)) )
+                failed = True
+    return 1 if failed else 0
+
+    #}}}
+
+
+if __name__ == '__main__':
+    sys.exit(main())
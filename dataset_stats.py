@@ -0,0 +1,115 @@
+# dataset_stats.py
+import numpy as np
+
+from instrumentation import profiler
+
+BLOCK_BYTES = 64 * 1024**2                              # Upper bound of the data read per block
+
+def iter_blocks(dataset, block_bytes=BLOCK_BYTES):
+    """Yield slices covering a dataset in slabs along the first axis, aligned to its HDF5 chunks."""
+    if dataset.ndim == 0:
+        yield ()
+        return
+
+    row_bytes = dataset.dtype.itemsize * int(np.prod(dataset.shape[1:], dtype=np.int64))
+    rows = max(1, block_bytes // max(row_bytes, 1))
+    if dataset.chunks:                                  # Read whole chunks only
+        chunk_rows = dataset.chunks[0]
+        rows = max(chunk_rows, rows // chunk_rows * chunk_rows)
+
+    for start in range(0, dataset.shape[0], rows):
+        yield (slice(start, min(start + rows, dataset.shape[0])),)
+
+class RunningStatistics:
+    """Min, max, mean, variance and sums accumulated block by block in a single pass."""
+    def __init__(self):
+        self.count =    0
+        self.min =      np.inf
+        self.max =      -np.inf
+        self.mean =     0.0
+        self.m2 =       0.0                             # Sum of squared deviations from the mean
+        self.sum =      0.0
+        self.sum_sq =   0.0
+
+    def update(self, block):
+        """Merge the statistics of one block (Chan et al. pairwise update for the variance)."""
+        block = np.asarray(block)
+        if np.iscomplexobj(block):
+            block = np.abs(block)
+        block = block.astype(np.float64, copy=False).ravel()
+        if block.size == 0:
+            return
+
+        n_a, n_b = self.count, block.size
+        block_sum = block.sum()
+        block_mean = block_sum / n_b
+        deviation = block - block_mean
+        block_m2 = np.dot(deviation, deviation)
+        del deviation
+
+        delta = block_mean - self.mean
+        self.count = n_a + n_b
+        self.mean += delta * n_b / self.count
+        self.m2 += block_m2 + delta**2 * n_a * n_b / self.count
+        self.min = min(self.min, block.min())
+        self.max = max(self.max, block.max())
+        self.sum += block_sum
+        self.sum_sq += np.dot(block, block)
+
+    def result(self):
+        """Return the current statistics as a dictionary."""
+        if self.count == 0:
+            return {'count': 0}
+        return {
+            'count':    self.count,
+            'min':      float(self.min),
+            'max':      float(self.max),
+            'mean':     float(self.mean),
+            'std':      float(np.sqrt(self.m2 / self.count)),
+            'rms':      float(np.sqrt(self.sum_sq / self.count)),
+            'sum':      float(self.sum),
+            'sum_sq':   float(self.sum_sq),
+        }
+
+def compute_statistics(dataset, callback=None, block_bytes=BLOCK_BYTES, on_block=None):
+    """Compute the statistics of an HDF5 dataset in one pass over its chunks.
+
+    callback(partial_stats, fraction_done) is called after every block.
+    on_block(block_slice, block) gives access to the data already in memory, e.g. to sample it.
+    """
+    stats = RunningStatistics()
+    total = dataset.shape[0] if dataset.ndim else 1
+    for block_slice in iter_blocks(dataset, block_bytes):
+        block = dataset[block_slice]
+        profiler.add_bytes(block.nbytes)
+        stats.update(block)
+        if on_block is not None:
+            on_block(block_slice, block)
+        del block
+        if callback is not None:
+            done = block_slice[0].stop if block_slice else total
+            callback(stats.result(), done / total)
+    return stats.result()
+
+class StridedSampler:
+    """Collect a downsampled copy of a dataset from the blocks of a statistics pass (no extra reads)."""
+    def __init__(self, shape, max_elements=256**2):
+        self.shape = shape
+        ndim = max(len(shape), 1)
+        size = int(np.prod(shape, dtype=np.int64))
+        self.step = max(1, int(np.ceil((size / max_elements) ** (1.0 / ndim))))
+        self.pieces = []
+
+    def __call__(self, block_slice, block):
+        if not block_slice:
+            self.pieces.append(np.asarray(block).reshape(1))
+            return
+        offset = (-block_slice[0].start) % self.step        # Keep the global stride across blocks
+        self.pieces.append(np.array(block[(slice(offset, None, self.step),)
+                                          + (slice(None, None, self.step),) * (block.ndim - 1)]))
+
+    def sample(self):
+        """Return the downsampled array."""
+        if not self.pieces:
+            return np.empty(0)
+        return np.concatenate(self.pieces, axis=0)
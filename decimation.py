@@ -0,0 +1,136 @@
+# decimation.py
+import numpy as np
+
+DECIMATION_MIN_POINTS = 20000                          # Shorter traces are plotted as they are
+POINTS_PER_PIXEL =      2                               # Minimum and maximum of every pixel column
+BLOCK =                 64                              # Samples per block of the first level of the pyramid
+LEVEL_FACTOR =          8                               # Blocks of a level merged into one block of the next
+READ_BLOCKS =           65536                           # Blocks read at once while the first level is built
+
+def minmax_bins(values_min, values_max, index_min, index_max, n_bins):
+    """Return the indices of the minimum and maximum of n_bins consecutive bins of equal length."""
+    length = len(values_min)
+    size = -(-length // n_bins)                         # Samples per bin, the last bin is padded
+    pad = size * n_bins - length
+    lows = np.concatenate([values_min, np.full(pad, np.inf)]).reshape(n_bins, size)
+    highs = np.concatenate([values_max, np.full(pad, -np.inf)]).reshape(n_bins, size)
+    rows = np.arange(n_bins)
+    lowest = np.minimum(rows * size + lows.argmin(axis=1), length - 1)
+    highest = np.minimum(rows * size + highs.argmax(axis=1), length - 1)
+    return np.concatenate([index_min[lowest], index_max[highest]])
+
+def block_extremes(low, high, index, size):
+    """Index and value of the minimum and maximum of consecutive blocks of size values."""
+    n = len(low) // size
+    rows = np.arange(n)
+    low, high, index = low[:n * size].reshape(n, size), high[:n * size].reshape(n, size), index[:n * size].reshape(n, size)
+    lowest, highest = low.argmin(axis=1), high.argmax(axis=1)
+    return index[rows, lowest], index[rows, highest], low[rows, lowest], high[rows, highest]
+
+class LineDecimator:
+    """Min/max decimation of a long trace for the visible x range and the width of the axes in pixels.
+
+    The minimum and maximum of every pixel column are kept, so peaks are never lost, and the result
+    is computed from the full-resolution data for every view. A pyramid of block minima and maxima,
+    built on first use, keeps zoomed-out views from scanning every sample.
+
+    y can be a LazyDataset over the memory budget: only the samples [start, stop) are used, the pyramid
+    is built from slabs and views read the ranges they need, so the trace is never loaded in full.
+    """
+    def __init__(self, x, y, start=0, stop=None):
+        self.y =        y if hasattr(y, 'iter_blocks') else np.asarray(y)
+        self.x =        None if x is None else np.asarray(x)       # None for sample positions 0, 1, 2, ...
+        self.start =    start
+        self.stop =     len(self.y) if stop is None else stop
+        self.levels =   []                                          # [(block size, index of min, index of max,
+                                                                    #   min, max)]
+
+    @staticmethod
+    def applies(x, y):
+        """True if the trace is long enough and its x values increase (or are sample positions)."""
+        if np.ndim(y) != 1 or len(y) < DECIMATION_MIN_POINTS:
+            return False
+        return x is None or (len(x) == len(y) and bool(np.all(np.diff(x) >= 0)))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def positions(self, indices):
+        return indices if self.x is None else self.x[indices]
+
+    def extremes(self, i0, i1):
+        """Samples [i0, i1) for the minimum and for the maximum search, NaN samples never win a bin."""
+        values = np.asarray(self.y[self.start + i0:self.start + i1])
+        nan = np.isnan(values)
+        return np.where(nan, np.inf, values), np.where(nan, -np.inf, values)
+
+    def visible_range(self, x0, x1):
+        """Return the sample range [i0, i1) inside x0..x1, extended by one sample on both sides."""
+        if x0 is None:
+            return 0, len(self)
+        x0, x1 = min(x0, x1), max(x0, x1)
+        if self.x is None:
+            i0, i1 = int(np.floor(x0)), int(np.ceil(x1)) + 1
+        else:
+            i0, i1 = np.searchsorted(self.x, x0, 'left'), np.searchsorted(self.x, x1, 'right')
+        return max(int(i0) - 1, 0), min(int(i1) + 1, len(self))
+
+    def level(self, k):
+        """Return (block size, index of min, index of max, min, max) of level k >= 1, building it if needed."""
+        while len(self.levels) < k:
+            if not self.levels:
+                size = BLOCK
+                parts = []
+                for first in range(0, len(self) // size, READ_BLOCKS):
+                    i0 = first * size
+                    i1 = min(first + READ_BLOCKS, len(self) // size) * size
+                    parts.append(block_extremes(*self.extremes(i0, i1), np.arange(i0, i1), size))
+                level = tuple(np.concatenate(column) for column in zip(*parts))
+            else:
+                previous, low_below, high_below, low_values, high_values = self.levels[-1]
+                size = previous * LEVEL_FACTOR
+                lowest, _, low, _ = block_extremes(low_values, high_values, low_below, LEVEL_FACTOR)
+                _, highest, _, high = block_extremes(low_values, high_values, high_below, LEVEL_FACTOR)
+                level = (lowest, highest, low, high)
+            self.levels.append((size,) + level)
+        return self.levels[k - 1]
+
+    def indices(self, i0, i1, n_bins):
+        """Indices of the samples kept for the range [i0, i1) in n_bins pixel columns, in x order."""
+        if i1 - i0 <= POINTS_PER_PIXEL * n_bins:
+            return np.arange(i0, i1)
+        samples_per_bin = (i1 - i0) / n_bins
+
+        # Coarsest level whose blocks are still smaller than a pixel column, with enough whole blocks in range
+        k = 0
+        while BLOCK * LEVEL_FACTOR**k <= samples_per_bin and len(self) // (BLOCK * LEVEL_FACTOR**k) > 0:
+            k += 1
+        while k > 0:
+            size, low_index, high_index, low, high = self.level(k)
+            j0, j1 = -(-i0 // size), i1 // size                 # Whole blocks inside the range
+            if j1 - j0 >= n_bins:
+                break
+            k -= 1
+
+        if k == 0:
+            low, high = self.extremes(i0, i1)
+            index = np.arange(i0, i1)
+            kept = minmax_bins(low, high, index, index, n_bins)
+        else:
+            kept = minmax_bins(low[j0:j1], high[j0:j1], low_index[j0:j1], high_index[j0:j1], n_bins)
+            # Partial blocks at both ends are scanned sample by sample
+            edges = []
+            for e0, e1 in ((i0, j0 * size), (j1 * size, i1)):
+                if e1 > e0:
+                    low, high = self.extremes(e0, e1)
+                    edges.append([e0 + low.argmin(), e0 + high.argmax()])
+            kept = np.concatenate([kept] + edges)
+        return np.unique(np.concatenate([kept, [i0, i1 - 1]]))
+
+    def decimate(self, x0=None, x1=None, width=1000):
+        """Return the (x, y) to plot for the view x0..x1 (all data if None) on width pixels."""
+        i0, i1 = self.visible_range(x0, x1)
+        if i1 <= i0:
+            return np.empty(0), np.empty(0)
+        kept = self.indices(i0, i1, max(int(width), 1))
+        return self.positions(kept), np.asarray(self.y[self.start + kept])
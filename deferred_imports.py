@@ -0,0 +1,33 @@
+# deferred_imports.py
+import importlib
+import threading
+import time
+
+# Modules of the subsystems that are not needed to show the main window, loaded in this order after startup
+WARM_UP_MODULES = (
+    'plot_window',                                      # matplotlib and its Qt backend
+    'animation_export',                                 # Frame renderer (matplotlib Agg, PIL)
+    'animation_writer',
+    'theoretical_window',                               # scipy.constants
+)
+
+import_times = {}                                       # {module: seconds} measured by the warm-up
+
+def warm_up(modules=WARM_UP_MODULES):
+    """Import modules on a background thread, so the first plot or GIF does not wait for them.
+
+    A module that is needed earlier is simply imported by the UI thread, which waits for the warm-up import to finish.
+    """
+    def run():
+        for name in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print(f"Could not preload {name}: {e}")
+                continue
+            import_times[name] = time.perf_counter() - start
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
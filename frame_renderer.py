@@ -0,0 +1,111 @@
+# frame_renderer.py
+import numpy as np
+from matplotlib import colormaps, font_manager
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image, ImageDraw, ImageFont
+
+LOG_OFFSET = 1e-10                                      # Added before log10 to avoid log(0)
+
+def value_limits(global_max, scale='log', offset=LOG_OFFSET):
+    """Return the (vmin, vmax) colour limits used by the GIF export for a global maximum."""
+    if scale == 'log':
+        return np.log10(offset), np.log10(float(global_max) + offset)
+    return 0.0, float(global_max)
+
+class FrameRenderer:
+    """Render heatmap frames straight to RGB arrays through a colormap lookup table.
+
+    The axes, colorbar and labels are drawn once with matplotlib, every frame only maps the data
+    through the lookup table, resamples it into the plot area and draws its title.
+    """
+    def __init__(self, vmin, vmax, shape=None, width=1600, height=1200, cmap='jet', scale='log',
+                 colorbar_title="log10(Abs(E))", xlabel="Z", ylabel="Y", levels=256, dpi=100):
+        self.vmin =         vmin
+        self.vmax =         vmax if vmax > vmin else vmin + 1.0
+        self.width =        width
+        self.height =       height
+        self.scale =        scale
+        self.levels =       levels
+        self.lut =          (colormaps[cmap](np.linspace(0, 1, levels))[:, :3] * 255).astype(np.uint8)
+        self._indices =     {}                          # {plane shape: (row indices, column indices)}
+
+        self.background, self.plot_box, self.title_box = self.draw_layout(
+            shape, cmap, colorbar_title, xlabel, ylabel, dpi)
+
+        self.font_size = max(12, height // 50)
+        self.font = ImageFont.truetype(font_manager.findfont('DejaVu Sans'), self.font_size)
+
+    def draw_layout(self, shape, cmap, colorbar_title, xlabel, ylabel, dpi):
+        """Draw the static part of the frame and return it with the pixel boxes of the plot and title.
+
+        The axes are labelled with the grid indices when the shape of the planes is known.
+        """
+        fig = Figure(figsize=(self.width / dpi, self.height / dpi), dpi=dpi)
+        canvas = FigureCanvasAgg(fig)
+        ax = fig.add_axes([0.08, 0.08, 0.72, 0.82])
+        cax = fig.add_axes([0.83, 0.08, 0.03, 0.82])
+
+        extent = None if shape is None else (-0.5, shape[1] - 0.5, -0.5, shape[0] - 0.5)
+        image = ax.imshow(np.zeros((2, 2)), cmap=cmap, vmin=self.vmin, vmax=self.vmax,
+                          origin='lower', aspect='auto', extent=extent)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        if shape is None:
+            ax.set_xticks([])
+            ax.set_yticks([])
+
+        # Colorbar ticks: linear in log space, labelled in linear scale
+        colorbar = fig.colorbar(image, cax=cax)
+        colorbar.set_label(colorbar_title)
+        ticks = np.linspace(self.vmin, self.vmax, 5)
+        colorbar.set_ticks(ticks)
+        if self.scale == 'log':
+            colorbar.set_ticklabels([f"{10**x:.1e}" for x in ticks])
+        else:
+            colorbar.set_ticklabels([f"{x:.1e}" for x in ticks])
+
+        canvas.draw()
+        background = np.asarray(canvas.buffer_rgba())[:, :, :3].copy()
+
+        # Display coordinates start at the bottom left, image rows at the top
+        bbox = ax.get_window_extent()
+        plot_box = (int(round(self.height - bbox.y1)), int(round(self.height - bbox.y0)),
+                    int(round(bbox.x0)), int(round(bbox.x1)))
+        title_box = (0, plot_box[0], plot_box[2], plot_box[3])
+        return background, plot_box, title_box
+
+    def to_levels(self, plane):
+        """Scale a 2D plane to colormap indices, NaN cells get the lowest colour."""
+        data = np.abs(plane)
+        if self.scale == 'log':
+            data = np.log10(data + LOG_OFFSET)
+        levels = (data - self.vmin) * ((self.levels - 1) / (self.vmax - self.vmin))
+        np.nan_to_num(levels, copy=False, nan=0)
+        np.clip(levels, 0, self.levels - 1, out=levels)
+        return levels.astype(np.intp)
+
+    def resample_indices(self, shape):
+        """Nearest-neighbour indices mapping a plane of this shape onto the plot area (row 0 at the bottom)."""
+        if shape not in self._indices:
+            top, bottom, left, right = self.plot_box
+            rows = (np.arange(bottom - top) * shape[0] // (bottom - top))[::-1]
+            cols = np.arange(right - left) * shape[1] // (right - left)
+            self._indices[shape] = (rows[:, None], cols[None, :])
+        return self._indices[shape]
+
+    def render(self, plane, title=""):
+        """Return the RGB frame (height, width, 3) of one 2D plane."""
+        top, bottom, left, right = self.plot_box
+        rows, cols = self.resample_indices(plane.shape)
+
+        frame = self.background.copy()
+        frame[top:bottom, left:right] = self.lut[self.to_levels(plane)[rows, cols]]
+
+        if title:                                       # Only the strip above the plot is redrawn
+            title_top, title_bottom, title_left, title_right = self.title_box
+            strip = Image.fromarray(frame[title_top:title_bottom, title_left:title_right])
+            ImageDraw.Draw(strip).text((strip.width // 2, strip.height // 2), title,
+                                       fill=(0, 0, 0), font=self.font, anchor='mm')
+            frame[title_top:title_bottom, title_left:title_right] = np.asarray(strip)
+        return frame
@@ -0,0 +1,103 @@
+# hdf5_catalog.py
+import h5py
+
+from hdf5_file_manager import file_manager
+
+class HDF5Catalog:
+    """Metadata-only catalog (name, shape, dtype, chunking, attrs) of an HDF5 file."""
+    def __init__(self, file_path):
+        self.file_path =    file_path
+        self.entries =      {}                              # {path: metadata dict}
+        self.children =     {}                              # {group path: [child paths]}
+
+    @classmethod
+    def from_file(cls, file_path):
+        """Build the catalog with a single metadata walk over the file."""
+        catalog = cls(file_path)
+        with file_manager.reading(file_path) as file:
+            catalog.scan(file)
+        return catalog
+
+    def scan(self, file):
+        """Walk an open file and record the metadata of every group and dataset (no data is read)."""
+        self.entries.clear()
+        self.children.clear()
+        self.add_entry('/', file)
+
+        def visit(name, obj):
+            self.add_entry(obj.name, obj)               # Returning a value would stop visititems
+
+        file.visititems(visit)
+
+    def add_entry(self, path, obj):
+        """Record one group or dataset and register it under its parent group."""
+        return self.insert(self.describe(path, obj))
+
+    @staticmethod
+    def describe(path, obj):
+        """Return the metadata of one group or dataset."""
+        entry = {
+            'name':     path.rsplit('/', 1)[-1] or '/',
+            'path':     path,
+            'attrs':    dict(obj.attrs.items()),
+        }
+        if isinstance(obj, h5py.Group):
+            entry['kind'] =     'group'
+            entry['n_items'] =  len(obj)
+        else:
+            entry['kind'] =     'dataset'
+            entry['shape'] =    obj.shape
+            entry['dtype'] =    obj.dtype
+            entry['chunks'] =   obj.chunks
+        return entry
+
+    def insert(self, entry):
+        """Record the metadata of a path, replacing the previous entry of the same path."""
+        path = entry['path']
+        if entry['kind'] == 'group':
+            self.children.setdefault(path, [])
+        if path != '/' and path not in self.entries:
+            parent = path.rsplit('/', 1)[0] or '/'
+            self.children.setdefault(parent, []).append(path)
+        self.entries[path] = entry
+        return entry
+
+    def find_new(self, file):
+        """Return the metadata of the objects added to a file since it was scanned, without changing the catalog.
+
+        Only groups whose number of members changed are listed again, so this is cheap on large files.
+        Updated group entries come first, then new objects with every parent before its children.
+        """
+        new_entries = []
+        for path in [path for path, entry in self.entries.items() if entry['kind'] == 'group']:
+            group = file.get(path)
+            if group is None or len(group) == self.entries[path]['n_items']:
+                continue
+            new_entries.append(self.describe(path, group))
+            known = set(self.children.get(path, []))
+            for name in group:
+                child_path = f"{path.rstrip('/')}/{name}"
+                if child_path in known:
+                    continue
+                child = group[name]
+                new_entries.append(self.describe(child.name, child))
+                if isinstance(child, h5py.Group):
+                    child.visititems(lambda name, obj: new_entries.append(self.describe(obj.name, obj)))
+        return new_entries
+
+    def get(self, path):
+        """Return the metadata of a path, or None if it is not in the catalog."""
+        return self.entries.get(path)
+
+    def list_children(self, path='/'):
+        """Return the metadata of the direct children of a group."""
+        return [self.entries[child] for child in self.children.get(path, [])]
+
+    def is_group(self, path):
+        """Check whether a path refers to a group."""
+        entry = self.entries.get(path)
+        return entry is not None and entry['kind'] == 'group'
+
+    def datasets(self):
+        """Return the metadata of every dataset in the file."""
+        return [entry for entry in self.entries.values() if entry['kind'] == 'dataset']
@@ -0,0 +1,165 @@
+# hdf5_file_manager.py
+import os
+import threading
+from contextlib import contextmanager
+
+import h5py
+
+# Cache settings for the pooled read handles
+CHUNK_CACHE_BYTES =     64 * 1024**2                    # Raw data chunk cache per dataset
+CHUNK_CACHE_SLOTS =     10007                           # Prime number of hash slots for the chunk cache
+CHUNK_CACHE_W0 =        0.75                            # Preemption policy, favours fully read chunks
+METADATA_CACHE_BYTES =  32 * 1024**2                    # Initial metadata cache size
+
+class HDF5FileManager:
+    """Keeps one pooled read handle per HDF5 file and hands out write handles safely."""
+    def __init__(self):
+        self._handles = {}                              # {absolute path: (h5py.File, file stamp)}
+        self._lock = threading.RLock()
+        self._readers = {}                              # {id(h5py.File): number of active readers}
+        self._retired = {}                              # {id(h5py.File): (absolute path, h5py.File)} still being read
+        self._writing = {}                              # {absolute path: thread writing the file}
+        self._released = threading.Condition(self._lock)
+        self._transient = set()                         # Files whose handle is closed after every read
+        self._local = threading.local()                 # Files read by the current thread
+
+    @staticmethod
+    def file_stamp(file_path):
+        """Return the (mtime, size) pair used to detect changes on disk."""
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, file_path):
+        """Return the pooled read handle of a file, reopening it if the file changed on disk."""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            stamp = self.file_stamp(key)
+            if key in self._handles:
+                file, file_stamp = self._handles[key]
+                if file_stamp == stamp and file.id.valid:
+                    return file
+                self._close(key)                        # Stays open until its active readers are done
+
+            file = h5py.File(
+                key, 'r',
+                rdcc_nbytes=    CHUNK_CACHE_BYTES,
+                rdcc_nslots=    CHUNK_CACHE_SLOTS,
+                rdcc_w0=        CHUNK_CACHE_W0
+            )
+            self.tune_metadata_cache(file)
+            # HDF5 shares the open file of a retired handle with the new one, reopen once it is closed
+            if any(path == key for path, _ in self._retired.values()):
+                stamp = None
+            self._handles[key] = (file, stamp)
+            return file
+
+    def active_readers(self, file_path):
+        """Number of reads in progress on the pooled and retired handles of a file."""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            handles = [file for path, file in self._retired.values() if path == key]
+            if key in self._handles:
+                handles.append(self._handles[key][0])
+            return sum(self._readers.get(id(file), 0) for file in handles)
+
+    def _held(self):
+        """{absolute path: number of reads} of the current thread."""
+        if not hasattr(self._local, 'held'):
+            self._local.held = {}
+        return self._local.held
+
+    @contextmanager
+    def reading(self, file_path):
+        """Borrow the pooled read handle for the duration of a block. The handle stays open afterwards."""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            if self._writing.get(key) == threading.get_ident():
+                raise RuntimeError(f"{key} is read while it is open for writing")
+            while key in self._writing:
+                self._released.wait()
+            file = self.get(key)
+            self._readers[id(file)] = self._readers.get(id(file), 0) + 1
+        held = self._held()
+        held[key] = held.get(key, 0) + 1
+        try:
+            yield file
+        finally:
+            held[key] -= 1
+            with self._lock:
+                self._readers[id(file)] -= 1
+                if not self._readers[id(file)]:
+                    del self._readers[id(file)]
+                    if id(file) in self._retired:           # Replaced in the pool while it was read
+                        del self._retired[id(file)]
+                        if file.id.valid:
+                            file.close()
+                    elif key in self._transient and self._handles.get(key, (None,))[0] is file:
+                        self._close(key)
+                self._released.notify_all()
+
+    @contextmanager
+    def write(self, file_path):
+        """Open a file for writing once no reader is active. The pooled read handle is reopened on next use.
+
+        Reads of the file wait until the write is done, other files are read meanwhile.
+        """
+        key = os.path.abspath(file_path)
+        if self._held().get(key):
+            raise RuntimeError(f"{key} is opened for writing inside a read of the same thread")
+        with self._lock:
+            while key in self._writing or self.active_readers(key) > 0:
+                self._released.wait()
+            self._close(key)
+            self._writing[key] = threading.get_ident()
+        try:
+            with h5py.File(key, 'a') as file:
+                yield file
+        finally:
+            with self._lock:
+                del self._writing[key]
+                self._released.notify_all()
+
+    def tune_metadata_cache(self, file):
+        """Start the metadata cache large enough to hold the headers of big files."""
+        try:
+            config = file.id.get_mdc_config()
+            config.set_initial_size = True
+            config.initial_size =     METADATA_CACHE_BYTES
+            config.max_size =         max(config.max_size, METADATA_CACHE_BYTES)
+            file.id.set_mdc_config(config)
+        except Exception as e:
+            print(f"Could not tune metadata cache: {e}")
+
+    def set_transient(self, file_path, transient=True):
+        """Close the handle of a file after every read, so another process (a running simulation) can write it."""
+        key = os.path.abspath(file_path)
+        with self._lock:
+            if not transient:
+                self._transient.discard(key)
+                return
+            self._transient.add(key)
+            self._close(key)
+
+    def invalidate(self, file_path):
+        """Drop the pooled handle of a file."""
+        with self._lock:
+            self._close(os.path.abspath(file_path))
+
+    def close_all(self):
+        """Close every pooled handle."""
+        with self._lock:
+            for key in list(self._handles):
+                self._close(key)
+
+    def _close(self, key):
+        """Drop the pooled handle of a file, it is closed after its last active reader."""
+        file, _ = self._handles.pop(key, (None, None))
+        if file is None:
+            return
+        if self._readers.get(id(file)):
+            self._retired[id(file)] = (key, file)
+        elif file.id.valid:
+            file.close()
+
+# Shared instance used by all windows
+file_manager = HDF5FileManager()
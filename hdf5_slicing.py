@@ -0,0 +1,51 @@
+# hdf5_slicing.py
+import numpy as np
+
+from instrumentation import profiler
+
+PLANE_CACHE_BYTES = 512 * 1024**2                       # Planes kept in memory between the two GIF passes
+
+def plane_selection(shape, axis, index, boundaries=(0, 0, 0, 0)):
+    """Return the hyperslab of one plane of a 3D dataset with the boundary layers (top, bottom, left, right) removed."""
+    top, bottom, left, right = boundaries
+    rows, cols = [n for i, n in enumerate(shape) if i != axis]
+    if not (top + bottom < rows and left + right < cols):   # Ensure valid boundaries
+        raise ValueError(f"Boundary removal {boundaries} does not fit a {rows}x{cols} plane")
+
+    selection = [slice(top, rows - bottom), slice(left, cols - right)]
+    selection.insert(axis, index)
+    return tuple(selection)
+
+def plane_shape(shape, axis, boundaries=(0, 0, 0, 0)):
+    """Return the shape of a plane of a 3D dataset after boundary removal."""
+    top, bottom, left, right = boundaries
+    rows, cols = [n for i, n in enumerate(shape) if i != axis]
+    return rows - top - bottom, cols - left - right
+
+def read_plane(dataset, axis, index, boundaries=(0, 0, 0, 0)):
+    """Read only the selected (cropped) plane of a 3D dataset from the file."""
+    plane = dataset[plane_selection(dataset.shape, axis, index, boundaries)]
+    profiler.add_bytes(plane.nbytes)
+    return plane
+
+def read_planes(file, paths, axis, index, boundaries=(0, 0, 0, 0), cache_bytes=PLANE_CACHE_BYTES, callback=None):
+    """Read the plane of every dataset once and return (global max, planes).
+
+    Planes are kept while they fit in cache_bytes, the others are None and have to be read again.
+    callback(path, fraction_done) is called before every read.
+    """
+    global_max = -np.inf
+    planes = []
+    cached_bytes = 0
+    for i, path in enumerate(paths):
+        if callback is not None:
+            callback(path, i / len(paths))
+        plane = read_plane(file[path], axis, index, boundaries)
+        global_max = max(global_max, np.max(plane))
+
+        if cached_bytes + plane.nbytes <= cache_bytes:
+            planes.append(plane)
+            cached_bytes += plane.nbytes
+        else:
+            planes.append(None)
+    return global_max, planes
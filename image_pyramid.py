@@ -0,0 +1,97 @@
+# image_pyramid.py
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+
+TILE =          256                                     # Tile edge in pixels of its level
+MAX_TILES =     128                                     # Tiles cached besides the ones of the views in use
+
+def block_mean(data, factor):
+    """Mean of factor x factor blocks, the blocks at the lower and right edge may be smaller."""
+    if factor == 1:
+        return data
+    rows = np.arange(0, data.shape[0], factor)
+    cols = np.arange(0, data.shape[1], factor)
+    total = np.add.reduceat(np.add.reduceat(data.astype(np.float64, copy=False), cols, axis=1), rows, axis=0)
+    counts = np.outer(np.diff(np.append(rows, data.shape[0])), np.diff(np.append(cols, data.shape[1])))
+    return total / counts
+
+class ImagePyramid:
+    """Levels of a 2D array reduced by block means (level k by 2**k), cut into tiles computed on first use.
+
+    A view is rendered from the coarsest level that still has one sample per screen pixel, and only from
+    the tiles it overlaps: zooming in loads finer tiles for the zoomed region alone.
+    """
+    def __init__(self, data):
+        self.data =     np.asarray(data)
+        self.shape =    self.data.shape
+        self.tiles =    OrderedDict()                       # {(level, tile row, tile column): tile}, oldest first
+        self._limits =  None
+
+    def limits(self):
+        """Return (minimum, maximum, smallest positive value) of the finite values, computed once for all views."""
+        if self._limits is None:
+            data = self.data
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)             # NaN only
+                low, high = np.nanmin(data), np.nanmax(data)
+            if not (np.isfinite(low) and np.isfinite(high)):            # Infinite values, or NaN only
+                finite = np.isfinite(data)
+                low = np.min(data, where=finite, initial=np.inf)
+                high = np.max(data, where=finite, initial=-np.inf)
+                if low > high:
+                    low, high = 0., 1.
+            positive = np.min(data, where=data > 0, initial=high)
+            self._limits = (float(low), float(high), float(positive) if positive > 0 else 1.)
+        return self._limits
+
+    def extent(self):
+        """Extent of the full image, as imshow places it with origin='lower'."""
+        return -.5, self.shape[1] - .5, -.5, self.shape[0] - .5
+
+    def view(self, xlim, ylim, width, height):
+        """Return (level, r0, r1, c0, c1): the level for the view xlim, ylim on width x height screen pixels,
+        the coarsest with at least one sample per pixel, and its tile rows [r0, r1) and columns [c0, c1) in view."""
+        samples = max(abs(xlim[1] - xlim[0]) / max(width, 1), abs(ylim[1] - ylim[0]) / max(height, 1))
+        level = 0
+        while 2**(level + 1) <= samples and min(self.shape) >> (level + 1):
+            level += 1
+
+        span = TILE * 2**level                              # Samples covered by a tile edge
+        def tiles(lim, n):
+            low, high = (int(np.clip(np.floor((value + .5) / span), 0, n - 1)) for value in sorted(lim))
+            return low, high + 1
+        return (level,) + tiles(ylim, -(-self.shape[0] // span)) + tiles(xlim, -(-self.shape[1] // span))
+
+    def tile(self, level, row, col):
+        """Return one tile of a level, from the cache or reduced from the full-resolution data."""
+        key = (level, row, col)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+        factor = 2**level
+        span = TILE * factor
+        tile = block_mean(self.data[row*span:(row + 1)*span, col*span:(col + 1)*span], factor)
+        self.tiles[key] = tile
+        return tile
+
+    def render(self, view, keep=()):
+        """Return (image, extent) of a view from self.view, assembled from its tiles.
+
+        Tiles of the views in keep (the zoom history) stay cached, so going back to them needs no reduction.
+        """
+        level, r0, r1, c0, c1 = view
+        image = np.block([[self.tile(level, row, col) for col in range(c0, c1)] for row in range(r0, r1)])
+
+        # The tiles are placed in data coordinates, blocks cut by the array edge are drawn full size
+        factor = 2**level
+        x0, y0 = c0 * TILE * factor, r0 * TILE * factor
+        extent = (x0 - .5, x0 + image.shape[1] * factor - .5, y0 - .5, y0 + image.shape[0] * factor - .5)
+
+        used = {(k, row, col) for k, first_row, end_row, first_col, end_col in (view,) + tuple(keep)
+                for row in range(first_row, end_row) for col in range(first_col, end_col)}
+        unused = [key for key in self.tiles if key not in used]
+        for key in unused[:max(len(unused) - MAX_TILES, 0)]:
+            del self.tiles[key]
+        return image, extent
@@ -0,0 +1,101 @@
+# coding=utf-8
+"""
+Measure the import time of the viewer (python -X importtime) and check it against a budget,
+so that heavy modules creeping back into startup are noticed.
+
+Example:
+    python import_report.py --budget 400 --forbid matplotlib scipy imageio plotly
+"""
+
+# import standard modules
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+# Packages that must only be loaded on first use (or by the background warm-up)
+DEFERRED_PACKAGES = ('matplotlib', 'scipy', 'imageio', 'plotly', 'mayavi', 'PIL')
+
+IMPORT_LINE = re.compile(r'^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| (?P<indent>\s*)(?P<name>\S+)$')
+
+
+def measure(module):
+    """Import module in a fresh interpreter and return [(depth, name, self us, cumulative us)] in import order."""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                             cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                             capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr.strip().splitlines()[-1]}")
+
+    records = []
+    for line in process.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            records.append((len(match.group('indent')) // 2, match.group('name'),
+                            int(match.group('self')), int(match.group('cumulative'))))
+    return records
+
+
+def direct_imports(records, module):
+    """Return the records of the modules imported directly by module, and the record of module itself."""
+    for position, (depth, name, _, _) in enumerate(records):
+        if depth == 0 and name == module:
+            break
+    else:
+        raise RuntimeError(f"{module} not found in the import times")
+
+    children = []
+    for record in reversed(records[:position]):
+        if record[0] == 0:                              # Previous top-level import, e.g. of site
+            break
+        if record[0] == 1:
+            children.append(record)
+    return children, records[position]
+
+
+def main():
+    #{{{
+
+    # initialize parser for command line options
+    parser  = argparse.ArgumentParser( description="Report the import time of the viewer and check it against a budget." )
+    parser.add_argument( "-m", "--module", type=str, default="main_hdf5_viewer",
+                         help="Module to import." )
+    parser.add_argument( "-r", "--repeat", type=int, default=3,
+                         help="Number of fresh interpreters, the fastest run is reported." )
+    parser.add_argument( "-n", "--top", type=int, default=15,
+                         help="Number of direct imports listed." )
+    parser.add_argument( "--budget", type=float, default=None,
+                         help="Fail if the import takes longer than this many milliseconds." )
+    parser.add_argument( "--forbid", type=str, nargs='*', default=list(DEFERRED_PACKAGES),
+                         help="Fail if one of these packages is imported at startup." )
+
+    # read all argments from command line
+    args    = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(args.repeat, 1))]
+    records = min(runs, key=lambda records: direct_imports(records, args.module)[1][3])
+    children, total = direct_imports(records, args.module)
+
+    print( "Import of {0}: {1:.1f} ms (fastest of {2} runs)".format(args.module, total[3] / 1000, len(runs)) )
+    print( "\n  {0:>10}  {1:>10}  {2}".format("cumul. ms", "self ms", "direct import") )
+    for _, name, self_us, cumulative_us in sorted(children, key=lambda record: -record[3])[:args.top]:
+        print( "  {0:10.1f}  {1:10.1f}  {2}".format(cumulative_us / 1000, self_us / 1000, name) )
+
+    failed = False
+    loaded = sorted({name.split('.')[0] for _, name, _, _ in records} & set(args.forbid))
+    if loaded:
+        print( "\nFAIL: deferred packages imported at startup: {0}".format(", ".join(loaded)) )
+        failed = True
+    if args.budget is not None and total[3] / 1000 > args.budget:
+        print( "\nFAIL: {0:.1f} ms is over the budget of {1:.1f} ms".format(total[3] / 1000, args.budget) )
+        failed = True
+    return 1 if failed else 0
+
+    #}}}
+
+
+if __name__ == '__main__':
+    sys.exit(main())
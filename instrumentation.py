@@ -0,0 +1,178 @@
+# instrumentation.py
+import os
+import json
+import time
+import inspect
+import functools
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+
+MAX_EVENTS = 200000                                     # Oldest spans are dropped beyond this
+CATEGORIES = ('io', 'compute', 'draw', 'render', 'ui')
+
+_NO_SPAN = nullcontext()
+
+class Span:
+    """One timed region. Bytes read by the thread while it is open are added to it."""
+    __slots__ = ('profiler', 'name', 'category', 'args', 'start', 'bytes', 'memory_start')
+
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name =     name
+        self.category = category
+        self.args =     args
+        self.bytes =    0
+
+    def __enter__(self):
+        self.profiler._push(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        self.profiler._pop(self, end)
+        return False
+
+class Profiler:
+    """Collects timing spans of reads, computations and renders. Switched off, a span costs one attribute check.
+
+    Spans record the bytes read from HDF5 while they are open and, if memory tracking is on,
+    the peak of the memory traced by tracemalloc above its level at the start of the span.
+    """
+    def __init__(self, max_events=MAX_EVENTS):
+        self.enabled =      os.environ.get('FHELI_PROFILE', '') not in ('', '0')
+        self.events =       deque(maxlen=max_events)    # Finished spans as dicts, in end order
+        self.origin =       time.perf_counter_ns()
+        self._local =       threading.local()           # Stack of open spans of each thread
+        self._lock =        threading.Lock()
+        self._open =        0                           # Open spans in all threads, the memory peak is reset at 0
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+
+    @property
+    def memory_tracking(self):
+        return tracemalloc.is_tracing()
+
+    def set_memory_tracking(self, enabled):
+        """Trace Python and numpy allocations for the peak memory of spans (slows allocations down)."""
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # ---------- Recording ----------
+    def span(self, name, category='compute', **args):
+        """Context manager timing a region, e.g. with profiler.span('read plane', 'io', path=path)."""
+        if not self.enabled:
+            return _NO_SPAN
+        return Span(self, name, category, args)
+
+    def add_bytes(self, nbytes):
+        """Count bytes read from a file in every open span of this thread."""
+        if self.enabled:
+            for span in getattr(self._local, 'stack', ()):
+                span.bytes += nbytes
+
+    def _push(self, span):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(span)
+        with self._lock:
+            if self._open == 0 and tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            self._open += 1
+        span.memory_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    def _pop(self, span, end):
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        args = dict(span.args)
+        if span.bytes:
+            args['bytes_read'] = span.bytes
+        if span.memory_start is not None and tracemalloc.is_tracing():
+            args['peak_memory'] = max(tracemalloc.get_traced_memory()[1] - span.memory_start, 0)
+        with self._lock:
+            self._open -= 1
+        self.events.append({
+            'name':     span.name,
+            'cat':      span.category,
+            'start':    span.start - self.origin,   # ns
+            'duration': end - span.start,           # ns
+            'tid':      threading.get_ident(),
+            'thread':   threading.current_thread().name,
+            'args':     args,
+        })
+
+    def clear(self):
+        self.events.clear()
+
+    # ---------- Reports ----------
+    def summary(self):
+        """Per span name: calls, total/mean/max time in ms, bytes read and largest memory peak, slowest first."""
+        rows = {}
+        for event in list(self.events):
+            row = rows.setdefault(event['name'], {'name': event['name'], 'category': event['cat'], 'calls': 0,
+                                                  'total_ms': 0.0, 'max_ms': 0.0, 'bytes_read': 0,
+                                                  'peak_memory': None})
+            duration = event['duration'] / 1e6
+            row['calls'] +=         1
+            row['total_ms'] +=      duration
+            row['max_ms'] =         max(row['max_ms'], duration)
+            row['bytes_read'] +=    event['args'].get('bytes_read', 0)
+            if 'peak_memory' in event['args']:
+                row['peak_memory'] = max(row['peak_memory'] or 0, event['args']['peak_memory'])
+        for row in rows.values():
+            row['mean_ms'] = row['total_ms'] / row['calls']
+        return sorted(rows.values(), key=lambda row: -row['total_ms'])
+
+    def chrome_trace(self):
+        """Return the spans in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for event in list(self.events):
+            threads[event['tid']] = event['thread']
+            events.append({'name': event['name'], 'cat': event['cat'], 'ph': 'X', 'pid': pid, 'tid': event['tid'],
+                           'ts': event['start'] / 1000, 'dur': event['duration'] / 1000, 'args': event['args']})
+        for tid, name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+# Shared instance used by all windows
+profiler = Profiler()
+
+def span(name, category='compute', **args):
+    """Shortcut for profiler.span."""
+    return profiler.span(name, category, **args)
+
+def traced(name=None, category='compute'):
+    """Decorator timing every call of a function or method as one span.
+
+    Like Qt itself, extra positional arguments are dropped (e.g. 'checked' of clicked), so
+    decorated methods can stay connected to signals.
+    """
+    def decorate(function):
+        label = name or function.__qualname__
+        code = function.__code__
+        max_args = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if max_args is not None:
+                args = args[:max_args]
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            with Span(profiler, label, category, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
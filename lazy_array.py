@@ -0,0 +1,254 @@
+# lazy_array.py
+import os
+import threading
+import weakref
+
+import numpy as np
+
+from hdf5_file_manager import file_manager
+from dataset_stats import BLOCK_BYTES, RunningStatistics, iter_blocks
+from instrumentation import profiler
+
+def default_memory_budget():
+    """A quarter of the physical memory (can be set in bytes with FHELI_MEMORY_BUDGET)."""
+    if 'FHELI_MEMORY_BUDGET' in os.environ:
+        return int(float(os.environ['FHELI_MEMORY_BUDGET']))
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // 4
+    except (ValueError, OSError, AttributeError):       # Not available on Windows
+        return 4 * 1024**3
+
+class MemoryBudget:
+    """Bytes of dataset arrays held in memory by the viewer, shared by all windows."""
+    def __init__(self, limit=None):
+        self.limit =    limit or default_memory_budget()
+        self.used =     0
+        self._lock =    threading.Lock()
+
+    def reserve(self, nbytes):
+        """Count nbytes about to be read if they fit, atomically. Returns False if they do not fit.
+
+        The reservation is handed over to track() once the array is read, or given back with release().
+        """
+        with self._lock:
+            if self.used + nbytes > self.limit:
+                return False
+            self.used += nbytes
+            return True
+
+    def track(self, array, reserved=0):
+        """Count an array until it is garbage collected, in place of the bytes reserved for it."""
+        with self._lock:
+            self.used += array.nbytes - reserved
+        weakref.finalize(array, self.release, array.nbytes)
+        return array
+
+    def release(self, nbytes):
+        with self._lock:
+            self.used -= nbytes
+
+    def set_limit(self, limit):
+        self.limit = limit
+
+# Shared instance used by the viewer
+memory_budget = MemoryBudget()
+
+class LazyDataset:
+    """Array-like proxy of an HDF5 dataset, nothing is read until it is indexed or reduced.
+
+    Indexing reads only the selected hyperslab. Reductions stream over chunk-aligned blocks.
+    Elementwise operations (arithmetic, numpy ufuncs) return a new proxy that applies them block by block.
+    """
+    def __init__(self, file_path, dataset_path, shape=None, dtype=None, ops=()):
+        self.file_path =    file_path
+        self.dataset_path = dataset_path
+        self.ops =          ops                         # ((ufunc, operands with None for the data), ...)
+        if shape is None or dtype is None:
+            with file_manager.reading(file_path) as file:
+                dataset = file[dataset_path]
+                shape, dtype = dataset.shape, dataset.dtype
+        self.shape =        tuple(shape)
+        self.dtype =        np.dtype(dtype)
+
+    # ---------- Array attributes ----------
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"LazyDataset({self.dataset_path!r}, shape={self.shape}, dtype={self.dtype}, ops={len(self.ops)})"
+
+    # ---------- Reading ----------
+    def apply_ops(self, data, key=()):
+        """Apply the pending elementwise operations to data read at key."""
+        for ufunc, operands in self.ops:
+            args = [data if operand is None else
+                    operand[key] if isinstance(operand, LazyDataset) else operand
+                    for operand in operands]
+            data = ufunc(*args)
+        return data
+
+    def __getitem__(self, key):
+        """Read only the selected hyperslab."""
+        with file_manager.reading(self.file_path) as file:
+            data = file[self.dataset_path][key]
+        profiler.add_bytes(np.asarray(data).nbytes)
+        return self.apply_ops(data, key)
+
+    def iter_blocks(self, block_bytes=BLOCK_BYTES):
+        """Yield (block slice, block) over the dataset in chunk-aligned slabs along the first axis."""
+        with file_manager.reading(self.file_path) as file:
+            dataset = file[self.dataset_path]
+            for block_slice in iter_blocks(dataset, block_bytes):
+                block = dataset[block_slice]
+                profiler.add_bytes(block.nbytes)
+                yield block_slice, self.apply_ops(block, block_slice)
+
+    def materialize(self, reserved=0):
+        """Read the whole array and count it in the memory budget, in place of the bytes reserved for it."""
+        try:
+            data = np.asarray(self[()])
+        except BaseException:
+            memory_budget.release(reserved)
+            raise
+        if isinstance(data, np.ndarray) and data.ndim:
+            memory_budget.track(data, reserved)
+        else:
+            memory_budget.release(reserved)
+        return data
+
+    def load(self):
+        """Read the whole array if it fits in the memory budget, None otherwise.
+
+        The bytes are reserved before reading, so loads on several threads cannot overrun the budget together.
+        """
+        if not memory_budget.reserve(self.nbytes):
+            return None
+        return self.materialize(reserved=self.nbytes)
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.materialize()
+        return data if dtype is None else data.astype(dtype)
+
+    # ---------- Reductions ----------
+    def reduce(self, ufunc, axis=None):
+        """Reduce with a ufunc (np.add, np.minimum, np.maximum) block by block."""
+        if axis is not None:
+            axis %= self.ndim
+        result = None
+        for _, block in self.iter_blocks():
+            if axis is None:
+                partial = ufunc.reduce(block, axis=None)
+            elif axis == 0:
+                partial = ufunc.reduce(block, axis=0)
+            else:                                       # Blocks are independent along the other axes
+                partial = ufunc.reduce(block, axis=axis)
+                result = partial if result is None else np.concatenate([result, partial], axis=0)
+                continue
+            result = partial if result is None else ufunc(result, partial)
+        return result
+
+    def sum(self, axis=None):
+        return self.reduce(np.add, axis)
+
+    def min(self, axis=None):
+        return self.reduce(np.minimum, axis)
+
+    def max(self, axis=None):
+        return self.reduce(np.maximum, axis)
+
+    def mean(self, axis=None):
+        count = self.size if axis is None else self.shape[axis % self.ndim]
+        return self.sum(axis) / count
+
+    def std(self):
+        stats = RunningStatistics()
+        for _, block in self.iter_blocks():
+            stats.update(block)
+        return stats.result().get('std', np.nan)
+
+    # ---------- Elementwise operations ----------
+    def apply(self, ufunc, *operands):
+        """Return a proxy with one more elementwise operation, None in operands stands for the data."""
+        result_dtype = np.result_type(*[self.dtype if operand is None else
+                                        operand.dtype if isinstance(operand, LazyDataset) else
+                                        np.asarray(operand).dtype for operand in operands])
+        if ufunc is np.true_divide or ufunc in (np.log, np.log10, np.sqrt, np.exp):
+            result_dtype = np.result_type(result_dtype, np.float64)
+        elif ufunc is np.absolute and result_dtype.kind == 'c':
+            result_dtype = np.dtype(np.float64)
+        return LazyDataset(self.file_path, self.dataset_path, self.shape, result_dtype,
+                           self.ops + ((ufunc, operands),))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or kwargs:
+            return NotImplemented
+        if not any(operand is self for operand in inputs):
+            return NotImplemented
+        return self.apply(ufunc, *[None if operand is self else operand for operand in inputs])
+
+    def __add__(self, other):
+        return self.apply(np.add, None, other)
+
+    def __radd__(self, other):
+        return self.apply(np.add, other, None)
+
+    def __sub__(self, other):
+        return self.apply(np.subtract, None, other)
+
+    def __rsub__(self, other):
+        return self.apply(np.subtract, other, None)
+
+    def __mul__(self, other):
+        return self.apply(np.multiply, None, other)
+
+    def __rmul__(self, other):
+        return self.apply(np.multiply, other, None)
+
+    def __truediv__(self, other):
+        return self.apply(np.true_divide, None, other)
+
+    def __rtruediv__(self, other):
+        return self.apply(np.true_divide, other, None)
+
+    def __pow__(self, other):
+        return self.apply(np.power, None, other)
+
+    def __neg__(self):
+        return self.apply(np.negative, None)
+
+    def __abs__(self):
+        return self.apply(np.absolute, None)
+
+def open_dataset(file_path, dataset_path, shape=None, dtype=None):
+    """Return a dataset as a numpy array if it fits in the memory budget, otherwise as a LazyDataset."""
+    lazy = LazyDataset(file_path, dataset_path, shape, dtype)
+    if lazy.ndim == 0:
+        return lazy.materialize()
+    data = lazy.load()
+    return lazy if data is None else data
+
+def in_memory(data, purpose):
+    """Return data as a numpy array, reading a LazyDataset only if it fits in the memory budget.
+
+    Raises MemoryError naming the purpose otherwise.
+    """
+    if not isinstance(data, LazyDataset):
+        return data
+    array = data.load()
+    if array is None:
+        raise MemoryError(f"{data.dataset_path} ({data.nbytes / 1024**2:,.0f} MB) does not fit in the memory budget "
+                          f"({max(memory_budget.limit - memory_budget.used, 0) / 1024**2:,.0f} MB free), "
+                          f"{purpose} needs it in memory.")
+    return array
@@ -0,0 +1,37 @@
+# live_follow.py
+from hdf5_file_manager import file_manager
+
+POLL_INTERVAL = 2000                                    # Milliseconds between checks of the followed file
+
+class FileFollower:
+    """Follow an HDF5 file that a running simulation is still writing, by polling its modification time.
+
+    check() only stats the file and is cheap enough for the UI thread. A change is reported once
+    the file stamp is the same on two polls in a row, so the file is not read in the middle of a
+    write. read_new() then lists the objects added since the last accepted stamp.
+    """
+    def __init__(self, file_path, catalog):
+        self.file_path =    file_path
+        self.catalog =      catalog
+        self.stamp =        file_manager.file_stamp(file_path)     # Stamp of the state in the catalog
+        self._seen =        self.stamp                              # Stamp of the previous poll
+
+    def check(self):
+        """Return True if the file changed and has not been modified since the previous poll."""
+        try:
+            stamp = file_manager.file_stamp(self.file_path)
+        except FileNotFoundError:                       # Being replaced by the writer
+            return False
+        settled = stamp == self._seen
+        self._seen = stamp
+        return settled and stamp != self.stamp
+
+    def read_new(self):
+        """Return (file stamp, metadata of the new objects). The catalog is not changed, see accept()."""
+        stamp = file_manager.file_stamp(self.file_path)
+        with file_manager.reading(self.file_path) as file:
+            return stamp, self.catalog.find_new(file)
+
+    def accept(self, stamp):
+        """Record that the objects found at stamp were added to the catalog."""
+        self.stamp = stamp
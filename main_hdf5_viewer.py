@@ -8,24 +8,42 @@ import sys
 import h5py
 import numpy as np
 import subprocess
+import multiprocessing
 import json
-import tempfile
 import os
-import imageio.v2 as imageio
-import plotly.graph_objects as go
 
 #import PyQt5 widgets
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, 
     QPushButton, QTreeWidget, QTreeWidgetItem, QFileDialog, QTextEdit, QLabel, 
     QDialog, QFormLayout, QSpinBox, QDialogButtonBox, QComboBox, QLineEdit, QCheckBox, QDoubleSpinBox,
-    QStyle
+    QStyle, QTableView, QHeaderView
 )
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 #import toolkits from files
-from plot_window import PlotWindow
 from operation_window import OperationWindow
+from hdf5_file_manager import file_manager
+from hdf5_catalog import HDF5Catalog
+from time_series import TimeSeriesIndex
+from dataset_stats import compute_statistics, StridedSampler
+from stats_cache import stats_cache, snapshot_identity
+from workers import Worker, start_worker
+from preview_model import DatasetPreviewModel, SampledPreviewModel
+from volume_handoff import volume_reference, share_array, release_shared
+from render_server import RenderClient
+from volume_pyramid import VolumePyramid, FACTORS, choose_factor
+from lazy_array import LazyDataset, open_dataset
+from workspace import Workspace
+from search_index import SearchIndex, MAX_RESULTS, format_shape
+from live_follow import FileFollower, POLL_INTERVAL
+from deferred_imports import warm_up
+from instrumentation import profiler, span, traced
+
+WARM_UP_DELAY = 300                                     # Milliseconds after the window is shown
+RUN_ROLE = Qt.UserRole + 1                              # Tree items of a workspace store the name of their run here
+HISTOGRAM_BINS = 64                                     # Bins of the histogram of the strided preview
+HISTOGRAM_BARS = " ▁▂▃▄▅▆▇█"                            # Bar heights of the histogram in the value display
 
 #-----------------------------------------------Main window Class functions----------------------------- 
 class HDF5Viewer(QMainWindow):
@@ -48,6 +66,17 @@ class HDF5Viewer(QMainWindow):
         self.load_button.clicked.connect(self.load_file)
         self.top_layout.addWidget(self.load_button)
 
+        # Open a directory of runs (parameter scans) as a workspace
+        self.workspace_button = QPushButton("Open Workspace", self)
+        self.workspace_button.clicked.connect(self.load_workspace)
+        self.top_layout.addWidget(self.workspace_button)
+
+        # Follow a file that is still being written, new snapshots are added as they appear
+        self.follow_button = QPushButton("Follow", self)
+        self.follow_button.setCheckable(True)
+        self.follow_button.toggled.connect(self.toggle_follow)
+        self.top_layout.addWidget(self.follow_button)
+
         # Create GIF button
         self.gif_button = QPushButton("Create GIF", self)
         self.gif_button.clicked.connect(self.create_gif)  # Connect to the create_gif method
@@ -66,10 +95,41 @@ class HDF5Viewer(QMainWindow):
         # Add a stretch to push the buttons to the left
         self.top_layout.addStretch()
 
+        # Profiling menu: timing spans of reads, computations and drawing, switchable at runtime
+        self.profiling_menu = self.menuBar().addMenu("Profiling")
+        self.profiling_menu.aboutToShow.connect(self.sync_profiling_menu)
+        self.record_spans_action = self.profiling_menu.addAction("Record Spans")
+        self.record_spans_action.setCheckable(True)
+        self.record_spans_action.toggled.connect(profiler.set_enabled)
+        self.track_memory_action = self.profiling_menu.addAction("Track Peak Memory")
+        self.track_memory_action.setCheckable(True)
+        self.track_memory_action.toggled.connect(profiler.set_memory_tracking)
+        self.profiling_menu.addSeparator()
+        self.profiling_menu.addAction("Summary...", self.open_trace_window)
+        self.profiling_menu.addAction("Export Chrome Trace...", self.export_chrome_trace)
+        self.profiling_menu.addAction("Clear Spans", profiler.clear)
+        self.sync_profiling_menu()
+
+        # Search box, matches are listed in a separate widget so the tree is never rebuilt while typing
+        self.search_box = QLineEdit(self)
+        self.search_box.setPlaceholderText("Search names, formulas, shape:100x200, dtype:float32, ndim:3 ...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.on_search_changed)
+        self.main_layout.addWidget(self.search_box)
+
+        self.search_results = QTreeWidget(self)
+        self.search_results.setHeaderLabels(["Path", "Shape", "Type"])
+        self.search_results.setRootIsDecorated(False)
+        self.search_results.setUniformRowHeights(True)
+        self.search_results.itemClicked.connect(self.on_item_clicked)
+        self.search_results.hide()
+        self.main_layout.addWidget(self.search_results)
+
         # Tree widget to display groups and datasets
         self.tree_widget = QTreeWidget(self)
         self.tree_widget.setHeaderLabel("HDF5 File Structure")
         self.tree_widget.itemClicked.connect(self.on_item_clicked)
+        self.tree_widget.itemExpanded.connect(self.on_item_expanded)
         self.main_layout.addWidget(self.tree_widget)
 
         # Text edit to display values
@@ -77,9 +137,34 @@ class HDF5Viewer(QMainWindow):
         self.value_display.setReadOnly(True)  # Make it read-only
         self.main_layout.addWidget(self.value_display)
 
-        # Label to display real-time progress
+        # Table with a sampled preview of the selected dataset, values are paged in on scroll
+        # A cached strided preview is shown first, Full Resolution pages the values from the file
+        self.preview_layout = QHBoxLayout()
+        self.preview_label = QLabel("Preview", self)
+        self.preview_layout.addWidget(self.preview_label)
+        self.preview_layout.addStretch()
+        self.full_preview_button = QPushButton("Full Resolution", self)
+        self.full_preview_button.setEnabled(False)
+        self.full_preview_button.clicked.connect(self.show_full_preview)
+        self.preview_layout.addWidget(self.full_preview_button)
+        self.main_layout.addLayout(self.preview_layout)
+        self.preview_table = QTableView(self)
+        self.preview_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.preview_table.verticalHeader().setDefaultSectionSize(20)
+        self.preview_table.horizontalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.preview_table.horizontalHeader().setDefaultSectionSize(90)
+        self.main_layout.addWidget(self.preview_table)
+
+        # Label to display real-time progress and a button to cancel background tasks
+        self.progress_layout = QHBoxLayout()
         self.progress_label = QLabel("Progress: Idle", self)
-        self.main_layout.addWidget(self.progress_label)
+        self.progress_layout.addWidget(self.progress_label)
+        self.progress_layout.addStretch()
+        self.cancel_button = QPushButton("Cancel", self)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_all_tasks)
+        self.progress_layout.addWidget(self.cancel_button)
+        self.main_layout.addLayout(self.progress_layout)
 
         # Bottom layout for the Exit button
         self.bottom_layout = QHBoxLayout()
@@ -91,11 +176,30 @@ class HDF5Viewer(QMainWindow):
 
         # Variables
         self.file_path = None
+        self.catalog = None                                 # Metadata catalog of the loaded file
+        self.workspace = None                               # Runs of an opened directory, None for a single file
+        self.run_name = None                                # Run of the workspace the selection belongs to
+        self.search_index = SearchIndex()                   # Names, text attributes, shapes and dtypes of the catalog(s)
         self.data = None
+        self.data_path = None                               # HDF5 path of the selected dataset
         self.single_value_datasets = {}                     # Stores single-value datasets for axis selection
         self.plot_window = None                             # Sub-window for plotting
-        self.time_series_datasets = []                      # Stores time-series datasets for GIF creation
+        self.time_series = TimeSeriesIndex()                # Snapshot families (E_abs__tintNNNNN, ...) of the file
         self.operation_window = None                        # Sub-window for dataset operations
+        self.workers = {}                                   # Running background tasks {kind: Worker}
+        self.mayavi_processes = []                          # Running Mayavi viewers [(process, shared block or None)]
+        self.render_client = RenderClient()                 # Warm Mayavi process shared by all 3D views
+
+        # The followed file is checked periodically while Follow is on
+        self.follower = None
+        self.follow_timer = QTimer(self)
+        self.follow_timer.setInterval(POLL_INTERVAL)
+        self.follow_timer.timeout.connect(self.poll_followed_file)
+
+        # Shared memory of closed Mayavi viewers is released periodically
+        self.mayavi_timer = QTimer(self)
+        self.mayavi_timer.setInterval(2000)
+        self.mayavi_timer.timeout.connect(self.reap_mayavi_processes)
 
     def load_file(self):
         """Open a file dialog to load an HDF5 file."""
@@ -107,27 +211,64 @@ class HDF5Viewer(QMainWindow):
 
         # Clear the tree widget and value display
         self.tree_widget.clear()
+        self.tree_widget.setHeaderLabel("HDF5 File Structure")
         self.value_display.clear()
+        self.set_preview_model(None)
         self.single_value_datasets.clear()
-        self.time_series_datasets.clear()                   # Clear time-series datasets
+        self.workspace = None
+        self.run_name = None
+
+        # Build the metadata catalog once and show only the top level, groups are filled on expansion
+        with span("build catalog", 'io', file=self.file_path):
+            self.catalog = HDF5Catalog.from_file(self.file_path)
+        self.populate_tree('/', self.tree_widget)
+        self.set_search_index(SearchIndex.from_catalog(self.catalog))
 
-        # Populate the tree widget with the file's structure
-        with h5py.File(self.file_path, 'r') as file:
-            self.populate_tree(file, self.tree_widget)
+        # Index the time-series snapshots once, GIF creation and the operation window use it
+        self.time_series = TimeSeriesIndex.from_catalog(self.catalog)
         
-    def populate_tree(self, node, parent_item):
-        """Recursively populate the tree widget with groups and datasets."""
-        for name, item in node.items():
-            if isinstance(item, h5py.Group):
-                group_item = QTreeWidgetItem(parent_item, [name])
-                group_item.setData(0, Qt.UserRole, item.name)  # Store path in UserRole
-                group_item.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
-                self.populate_tree(item, group_item)
-                
-            elif isinstance(item, h5py.Dataset):
-                dataset_item = QTreeWidgetItem(parent_item, [name])
-                dataset_item.setData(0, Qt.UserRole, item.name)  # Store path in UserRole
-                dataset_item.setIcon(0, self.style().standardIcon(QStyle.SP_FileIcon))
+    def populate_tree(self, group_path, parent_item, run_name=None):
+        """Populate the tree widget with the direct children of a group, taken from the catalog."""
+        for entry in self.catalog.list_children(group_path):
+            self.add_tree_item(entry, parent_item, run_name)
+
+    def add_tree_item(self, entry, parent_item, run_name=None):
+        """Add the item of one catalog entry under a tree item."""
+        if entry['kind'] == 'group':
+            group_item = QTreeWidgetItem(parent_item, [entry['name']])
+            group_item.setData(0, Qt.UserRole, entry['path'])  # Store path in UserRole
+            group_item.setData(0, RUN_ROLE, run_name)
+            group_item.setIcon(0, self.style().standardIcon(QStyle.SP_DirIcon))
+            if entry['n_items']:
+                group_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+            return group_item
+
+        dataset_item = QTreeWidgetItem(parent_item, [entry['name']])
+        dataset_item.setData(0, Qt.UserRole, entry['path'])  # Store path in UserRole
+        dataset_item.setData(0, RUN_ROLE, run_name)
+        dataset_item.setIcon(0, self.style().standardIcon(QStyle.SP_FileIcon))
+        return dataset_item
+
+    def find_tree_item(self, path):
+        """Return the tree item of a path of the current file if it has been created, None otherwise."""
+        item = self.tree_widget.invisibleRootItem()
+        if self.workspace is not None:                  # The root of a run is its top-level item
+            item = next((item.child(i) for i in range(item.childCount())
+                         if item.child(i).data(0, RUN_ROLE) == self.run_name), None)
+        current = ''
+        for name in path.strip('/').split('/') if path != '/' else []:
+            current = f"{current}/{name}"
+            item = next((item.child(i) for i in range(item.childCount())
+                         if item.child(i).data(0, Qt.UserRole) == current), None) if item is not None else None
+        return item
+
+    def on_item_expanded(self, item):
+        """Fill a group with its children the first time it is expanded."""
+        full_path = item.data(0, Qt.UserRole)
+        if not self.select_run(item.data(0, RUN_ROLE)):
+            return
+        if item.childCount() == 0 and self.catalog.is_group(full_path):
+            self.populate_tree(full_path, item, self.run_name)
 
     def on_item_clicked(self, item):
         """Handle clicking on a dataset or group in the tree widget."""
@@ -137,96 +278,500 @@ class HDF5Viewer(QMainWindow):
         # Clear the previous value display
         self.value_display.clear()
 
-        # Open the file and access the item using the full path
-        with h5py.File(self.file_path, 'r') as file:
-            try:
-                hdf5_object = file[full_path]                                           # Access the object using its full path
-                
-                if isinstance(hdf5_object, h5py.Group):
-                    # Clear the current item's children (if any)
-                    item.takeChildren()
-
-                    # Repopulate with the group's contents
-                    self.populate_tree(hdf5_object, item)
-                    
-                    # Show group information
-                    info_text = f"=== Group Information ===\n"
-                    info_text += f"Path: {full_path}\n"
-                    info_text += f"Number of items: {len(hdf5_object)}\n"
+        # In a workspace the file, catalog and time series follow the run of the item
+        if not self.select_run(item.data(0, RUN_ROLE)):
+            self.value_display.setText(f"Error: {self.workspace.run(item.data(0, RUN_ROLE)).error}")
+            return
+
+        # Groups are answered from the catalog without touching the file
+        if self.catalog.is_group(full_path):
+            entry = self.catalog.get(full_path)
+
+            # Show group information
+            info_text = f"=== Group Information ===\n"
+            info_text += f"Path: {full_path}\n"
+            info_text += f"Number of items: {entry['n_items']}\n"
+            
+            # Add attribute information if available
+            if entry['attrs']:
+                info_text += "\n=== Values ===\n"
+                for attr_name, attr_value in entry['attrs'].items():
                     
-                    # Add attribute information if available
-                    if hdf5_object.attrs:
+                    info_text += f"{attr_name}:\t\t {attr_value:.3e}\n"
+
+            # The root of a run shows the config values of the run
+            if self.workspace is not None and full_path == '/':
+                info_text += f"\n=== Run {self.run_name} ===\n"
+                info_text += f"File: {self.file_path}\n"
+                for name, value in sorted(self.workspace.run(self.run_name).config.items()):
+                    info_text += f"{name}:\t\t {value}\n"
+            
+            self.value_display.setText(info_text)
+            return
 
-                        # Repopulate with the group's contents
-                        self.populate_tree(hdf5_object, item)
+        entry = self.catalog.get(full_path)
+        if entry is None:
+            self.value_display.setText("Error: Unable to access the selected item.")
+            return
 
-                        info_text += "\n=== Values ===\n"
-                        for attr_name, attr_value in hdf5_object.attrs.items():
-                            
-                            info_text += f"{attr_name}:\t\t {attr_value:.3e}\n"
-                    
-                    self.value_display.setText(info_text)
-
-                if isinstance(hdf5_object, h5py.Dataset):                               # Dataset
-                    self.data = hdf5_object[()]
-                    info_text = f"=== Dataset Information ===\n"
-                    info_text += f"Path: {full_path}\n"
-                    info_text += f"Shape: {self.data.shape}\n"
-                    info_text += f"Dimensions: {self.data.ndim}\n"
-                    info_text += f"Size: {self.data.size} elements\n"
-                    info_text += f"Data type: {self.data.dtype}\n"
-
-                    # Check if this is a theory plot dataset
-                    is_theory_plot = False
-                    if (self.data.ndim == 2 and self.data.shape[1] == 2 and 
-                        'columns' in hdf5_object.attrs and 
-                        list(hdf5_object.attrs['columns']) == ['x', 'y']):
-                        is_theory_plot = True
-                        info_text += "\nType: Theory Plot (x,y) dataset\n"
-                    
-                    # Display the values
-                    if self.data.size == 1:                                             # Single value
-                        value = self.data.item()                                        # Extract the scalar value
-                        info_text += f"\nValue: {value}\n"
-                    else:                                                               # Array
-                        info_text += f"\n=== Statistics ===:\n"
-                        info_text += f"Min:  {np.min(self.data):.4g}\n"
-                        info_text += f"Max:  {np.max(self.data):.4g}\n"
-                        info_text += f"Mean: {np.mean(self.data):.4g}\n"
-                        info_text += f"Std:  {np.std(self.data):.4g}\n"
-                        info_text += f"RMS:  {np.sqrt(np.mean(self.data**2)):.6g}\n"     # Important for fields
-
-                        # Energy metrics for field data
-                        if 'E_' in full_path or 'B_' in full_path:                      
-                            info_text += f"\n=== Field Measurements ===\n"
-                            energy_density = np.sum(self.data**2)
-                            info_text += f"Energy Density (Σ|E|²): {energy_density:.6g}\n"
-                            info_text += f"Peak/Mean Ratio: {np.max(self.data)/np.mean(self.data):.6g}\n"
-                        elif 'E*E' in full_path or 'B*B' in full_path:
-                            info_text += f"\n=== Field Measurements ===\n"
-                            energy_density = np.sum(self.data)
-                            info_text += f"Energy Density (Σ|E|²): {energy_density:.6g}\n"
-                            info_text += f"Peak/Mean Ratio: {np.max(self.data)/np.mean(self.data):.6g}\n"
-                        
-                        # Display first few values for large arrays
-                        info_text += f"\nDataset:\n{self.data}\n"
-
-                    self.value_display.setText(info_text)
-
-                    # Open the plot window for 1D or 2D datasets
-                    if is_theory_plot:
-                        # For theory plots, extract just the y values for display
-                        # (or we could pass both x and y to be handled specially)
-                        self.open_plot_window(self.data[:, 1], '1D')  # Just plot y values
-                    if self.data.ndim == 1:                         # 1D dataset
-                        self.open_plot_window(self.data, '1D')
-                    elif self.data.ndim == 2:                       # 2D dataset
-                        self.open_plot_window(self.data, '2D')
-                    elif self.data.ndim == 3:                       # 3D dataset
-                        self.show_3d_choice_dialog()                # Open slice dialog for 3D datasets
-
-            except KeyError:
-                self.value_display.setText("Error: Unable to access the selected item.")
+        # The dataset is read on the thread pool, a new click cancels the stale load and any follow update
+        self.cancel_task('latest')
+        self.data = None
+        self.data_path = full_path
+        shape = entry['shape']
+        info_text = f"=== Dataset Information ===\n"
+        info_text += f"Path: {full_path}\n"
+        info_text += f"Shape: {shape}\n"
+        info_text += f"Dimensions: {len(shape)}\n"
+        info_text += f"Size: {int(np.prod(shape))} elements\n"
+        info_text += f"Data type: {entry['dtype']}\n"
+
+        # Check if this is a theory plot dataset
+        is_theory_plot = False
+        if (len(shape) == 2 and shape[1] == 2 and 
+            'columns' in entry['attrs'] and 
+            list(entry['attrs']['columns']) == ['x', 'y']):
+            is_theory_plot = True
+            info_text += "\nType: Theory Plot (x,y) dataset\n"
+
+        self.value_display.setText(info_text)
+
+        # Results of a previous visit come from the sidecar cache: the statistics, the histogram and the
+        # strided preview are shown at once without reading the dataset
+        cached = self.cached_results(self.file_path, full_path) if int(np.prod(shape)) > 1 else None
+        if cached is not None:
+            self.value_display.setText(info_text + self.format_statistics(cached['stats'], full_path)
+                                       + self.format_histogram(cached['histogram'], cached['bin_edges']))
+
+        # Otherwise the preview only reads the blocks that are visible in the table
+        if cached is not None and cached['preview'] is not None:
+            self.set_preview_model(SampledPreviewModel(cached['preview'], StridedSampler(shape).step, self.preview_table))
+        else:
+            self.set_preview_model(DatasetPreviewModel(self.file_path, full_path, shape, self.preview_table))
+
+        # Show partial statistics while the chunked pass is still running
+        def show_partial(partial_stats, fraction):
+            self.value_display.setText(
+                info_text + self.format_statistics(partial_stats, full_path, fraction))
+            self.progress_label.setText(f"Progress: statistics {fraction:.0%}")
+
+        def show_result(result):
+            self.on_dataset_loaded(full_path, info_text, is_theory_plot, result)
+
+        self.run_task('load', self.read_dataset_task, self.file_path, full_path, cached,
+                      on_progress=show_partial, on_result=show_result)
+
+    def cached_results(self, file_path, full_path):
+        """Return the stats cache entry of a dataset, or None. At most the object header of a snapshot is read.
+
+        Files that did not change since the last visit hit the cache, superseded snapshots are not
+        written again so their results stay valid while the file grows.
+        """
+        try:
+            with file_manager.reading(file_path) as file:
+                identity = snapshot_identity(file, full_path, self.time_series)
+        except OSError as e:                            # A followed file that is being written
+            print(f"Could not check the cache of {full_path}: {e}")
+            return None
+        return stats_cache.get(file_path, full_path, identity)
+
+    @traced(category='io')
+    def read_dataset_task(self, file_path, full_path, cached, worker):
+        """Read the statistics (unless cached), and the data of 1D/2D datasets. Runs on the thread pool."""
+        result = {'value': None, 'stats': None, 'histogram': None, 'bin_edges': None, 'data': None}
+        with file_manager.reading(file_path) as file:
+            dataset = file[full_path]
+            if dataset.size == 1:                                               # Single value
+                result['value'] = dataset[()].item()                            # Extract the scalar value
+            elif cached is not None:                                            # Array seen before
+                result.update(stats=cached['stats'], histogram=cached['histogram'], bin_edges=cached['bin_edges'])
+            else:                                                               # Array
+                sampler = StridedSampler(dataset.shape)
+                with span("compute_statistics", 'compute', path=full_path):
+                    stats = compute_statistics(dataset, callback=worker.report_progress, on_block=sampler)
+                preview = sampler.sample()
+                if np.iscomplexobj(preview):
+                    preview = np.abs(preview)
+
+                # Histogram and percentiles are taken from the downsampled preview
+                finite = preview[np.isfinite(preview)].astype(np.float64)
+                histogram, bin_edges = None, None
+                if finite.size:
+                    stats['p01'], stats['p50'], stats['p99'] = np.percentile(finite, [1, 50, 99]).tolist()
+                    histogram, bin_edges = np.histogram(finite, bins=HISTOGRAM_BINS)
+                identity = snapshot_identity(file, full_path, self.time_series)
+                stats_cache.put(file_path, full_path, stats, histogram, bin_edges, preview, identity)
+                result.update(stats=stats, histogram=histogram, bin_edges=bin_edges)
+
+            # Only 1D and 2D datasets are loaded here (if they fit in the memory budget), 3D datasets on demand
+            worker.check_cancelled()
+            if dataset.ndim <= 2:
+                result['data'] = open_dataset(file_path, full_path, dataset.shape, dataset.dtype)
+        return result
+
+    @traced(category='ui')
+    def on_dataset_loaded(self, full_path, info_text, is_theory_plot, result):
+        """Display a loaded dataset and open the matching plot window (UI thread)."""
+        self.data = result['data']
+        ndim = len(self.catalog.get(full_path)['shape'])
+
+        # Display the values
+        if result['value'] is not None:
+            info_text += f"\nValue: {result['value']}\n"
+        if result['stats'] is not None:
+            info_text += self.format_statistics(result['stats'], full_path)
+            info_text += self.format_histogram(result['histogram'], result['bin_edges'])
+
+        self.value_display.setText(info_text)
+
+        # Open the plot window for 1D or 2D datasets
+        if is_theory_plot:
+            # For theory plots, extract just the y values for display
+            # (or we could pass both x and y to be handled specially)
+            self.open_plot_window(self.data[:, 1], '1D')  # Just plot y values
+        if ndim == 1:                                   # 1D dataset
+            self.open_plot_window(self.data, '1D')
+        elif ndim == 2:                                 # 2D dataset
+            self.open_plot_window(self.data, '2D')
+        elif ndim == 3:                                 # 3D dataset
+            self.show_3d_choice_dialog()                # Open slice dialog for 3D datasets
+
+#--------------------------------- Search --------------------------------------------------------------------------
+    def set_search_index(self, index):
+        """Use a new index and run the current query against it."""
+        self.search_index = index
+        self.search_results.setHeaderLabels(["Path", "Shape", "Type"] + (["Run"] if self.workspace is not None else []))
+        self.on_search_changed(self.search_box.text())
+
+    @traced(category='ui')
+    def on_search_changed(self, query):
+        """Filter the index as the user types and list the first matches."""
+        matches = self.search_index.search(query)
+        if not query.strip():
+            self.search_results.hide()
+            self.tree_widget.show()
+            return
+
+        self.search_results.setUpdatesEnabled(False)
+        self.search_results.clear()
+        items = []
+        for i in matches[:MAX_RESULTS]:
+            entry = self.search_index.entries[i]
+            shape = format_shape(entry['shape']) if entry['shape'] is not None else "group"
+            item = QTreeWidgetItem([entry['path'], shape, str(entry['dtype'] or ""), entry['run'] or ""])
+            item.setData(0, Qt.UserRole, entry['path'])
+            item.setData(0, RUN_ROLE, entry['run'])
+            items.append(item)
+        self.search_results.addTopLevelItems(items)
+        self.search_results.setUpdatesEnabled(True)
+
+        shown = f", showing the first {MAX_RESULTS}" if len(matches) > MAX_RESULTS else ""
+        self.search_results.headerItem().setText(0, f"Path ({len(matches)} matches{shown})")
+        self.tree_widget.hide()
+        self.search_results.show()
+
+#--------------------------------- Workspace of many runs -----------------------------------------------------------
+    def load_workspace(self):
+        """Open a directory of runs and index every HDF5 file in it, no field data is read."""
+        root = QFileDialog.getExistingDirectory(self, "Open Workspace Directory")
+        if not root:
+            return
+
+        def show_progress(run, fraction):
+            self.progress_label.setText(f"Progress: indexing runs {fraction:.0%} ({run.name})")
+
+        self.run_task('workspace', self.build_workspace_task, root,
+                      on_progress=show_progress, on_result=self.on_workspace_loaded)
+
+    @traced(category='io')
+    def build_workspace_task(self, root, worker):
+        """Build the catalogs of the runs in parallel. Runs on the thread pool."""
+        return Workspace.from_directory(root, callback=worker.report_progress)
+
+    def on_workspace_loaded(self, workspace):
+        """Show one top-level tree item per run, labelled with the parameters that vary between runs (UI thread)."""
+        self.tree_widget.clear()
+        self.value_display.clear()
+        self.set_preview_model(None)
+        self.single_value_datasets.clear()
+        self.workspace = workspace
+        self.run_name = None
+        self.file_path = None
+        self.catalog = None
+        self.data = None
+        self.data_path = None
+        self.time_series = TimeSeriesIndex()
+        self.tree_widget.setHeaderLabel(f"Workspace: {workspace.root} ({len(workspace)} runs)")
+
+        varying = workspace.varying_parameters()
+        for run in workspace:
+            run_item = QTreeWidgetItem(self.tree_widget, [run.name])
+            run_item.setData(0, Qt.UserRole, '/')
+            run_item.setData(0, RUN_ROLE, run.name)
+            run_item.setIcon(0, self.style().standardIcon(QStyle.SP_DriveHDIcon))
+            if run.error is not None:
+                run_item.setText(0, f"{run.name} (unreadable)")
+                run_item.setToolTip(0, run.error)
+                continue
+            if varying:
+                run_item.setText(0, f"{run.name}  [{run.describe(varying)}]")
+            run_item.setToolTip(0, run.describe())
+            run_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+        if not len(workspace):
+            self.value_display.setText(f"No HDF5 files found in {workspace.root}")
+        self.set_search_index(SearchIndex.from_workspace(workspace))
+
+    def item_file_path(self, item):
+        """File of a tree item: the file of its run in a workspace, the open file otherwise. None if unreadable."""
+        run_name = item.data(0, RUN_ROLE)
+        if self.workspace is None or run_name is None:
+            return self.file_path
+        run = self.workspace.run(run_name)
+        return run.file_path if run.error is None else None
+
+    def select_run(self, run_name):
+        """Make a run of the workspace the current file. Returns False if the run could not be indexed."""
+        if self.workspace is None or run_name is None or run_name == self.run_name:
+            return True
+        run = self.workspace.run(run_name)
+        if run.error is not None:
+            return False
+        self.run_name = run_name
+        self.file_path = run.file_path
+        self.catalog = run.catalog
+        self.time_series = run.time_series
+        self.data = None
+        self.data_path = None
+        if self.operation_window:
+            self.operation_window.set_time_series(self.time_series, self.file_path)
+        return True
+
+#--------------------------------- Follow a file being written -----------------------------------------------------
+    def toggle_follow(self, checked):
+        """Start or stop checking the current file for new snapshots."""
+        if checked:
+            self.follow_timer.start()
+            self.progress_label.setText("Progress: following the file")
+        else:
+            self.follow_timer.stop()
+            self.set_follower(None)
+
+    def set_follower(self, follower):
+        """Follow another file. The followed file is not kept open between reads, so the simulation can write it."""
+        if self.follower is not None:
+            file_manager.set_transient(self.follower.file_path, False)
+        self.follower = follower
+        if follower is not None:
+            file_manager.set_transient(follower.file_path, True)
+
+    def poll_followed_file(self):
+        """Read the new objects of the current file once the simulation has finished writing them."""
+        if self.file_path is None or self.catalog is None or 'follow' in self.workers:
+            return
+        if self.follower is None or self.follower.catalog is not self.catalog:     # Another file or run was opened
+            self.set_follower(FileFollower(self.file_path, self.catalog))
+        follower = self.follower
+        if follower.check():
+            self.run_task('follow', self.read_new_objects_task, follower,
+                          on_result=lambda result: self.on_file_grown(follower, result))
+
+    @traced(category='io')
+    def read_new_objects_task(self, follower, worker):
+        """List the objects added to the followed file. Runs on the thread pool."""
+        try:
+            return follower.read_new()
+        except OSError as e:                            # Still locked or incomplete, retried on the next poll
+            print(f"Could not read the followed file yet: {e}")
+            return None
+
+    def on_file_grown(self, follower, result):
+        """Add new objects to the catalog, time series, search index and tree (UI thread)."""
+        if result is None or follower is not self.follower:
+            return
+        stamp, new_entries = result
+        added = 0
+        for entry in new_entries:
+            is_new = self.catalog.get(entry['path']) is None
+            self.catalog.insert(entry)
+            if entry['kind'] == 'dataset':
+                self.time_series.add(entry['path'], entry['shape'])
+            if not is_new:                              # A known group with new members
+                item = self.find_tree_item(entry['path'])
+                if item is not None and entry['n_items']:
+                    item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+                continue
+
+            # Only groups whose children are already shown get the new item, the others are filled on expansion
+            added += 1
+            self.search_index.add(entry, self.run_name)
+            parent_path = entry['path'].rsplit('/', 1)[0] or '/'
+            parent_item = self.find_tree_item(parent_path)
+            if parent_item is not None and (parent_item.childCount() or (parent_path == '/' and self.workspace is None)):
+                self.add_tree_item(entry, parent_item, self.run_name)
+        follower.accept(stamp)
+
+        if added:
+            if self.search_box.text().strip():
+                self.on_search_changed(self.search_box.text())
+            self.progress_label.setText(f"Progress: following the file, {added} new objects")
+            self.show_latest_snapshot()
+
+    def show_latest_snapshot(self):
+        """Move the open plot and the operation window to the newest timestep of the shown family.
+
+        A dataset the user selected wins: no update is started while it loads, and an update still
+        reading when another dataset is selected is dropped.
+        """
+        if self.operation_window is not None:
+            self.operation_window.update_time_series()
+
+        snapshot = self.time_series.family_of(self.data_path) if self.data_path else None
+        if snapshot is None or self.plot_window is None or not self.plot_window.isVisible() or 'load' in self.workers:
+            return
+        latest = self.time_series.latest(snapshot[0])
+        dataset_type = {1: '1D', 2: '2D', 3: '3D'}.get(len(latest['shape']))
+        if latest['path'] == self.data_path or dataset_type is None:
+            return
+
+        # Only the new snapshot is read, the plot keeps its settings
+        file_path, shown_path = self.file_path, self.data_path
+        def show_latest(data):
+            if (self.file_path, self.data_path) != (file_path, shown_path) or 'load' in self.workers:
+                return
+            self.data = data
+            self.data_path = latest['path']
+            self.open_plot_window(self.data, dataset_type)
+            if dataset_type != '1D':
+                self.plot_window.twoD_plot()
+
+        self.run_task('latest', self.read_data_task, file_path, latest['path'], on_result=show_latest)
+
+#--------------------------------- Background tasks -----------------------------------------------------------------
+    def run_task(self, kind, fn, *args, on_progress=None, on_result=None):
+        """Run fn on the thread pool, cancelling the previous task of the same kind."""
+        self.cancel_task(kind)
+        worker = Worker(fn, *args)
+        self.workers[kind] = worker
+
+        # Signals of a replaced task are ignored, even if they were already queued
+        def is_current():
+            return self.workers.get(kind) is worker
+
+        def handle_progress(value, fraction):
+            if is_current() and on_progress:
+                on_progress(value, fraction)
+
+        def handle_result(value):
+            if is_current() and on_result:
+                on_result(value)
+
+        def handle_error(message):
+            if is_current():
+                print(message)
+                self.value_display.setText(f"Error: {message.strip().splitlines()[-1]}")
+
+        def handle_finished():
+            if is_current():
+                del self.workers[kind]
+                self.progress_label.setText("Progress: Idle")
+            self.cancel_button.setEnabled(bool(self.workers))
+
+        worker.signals.progress.connect(handle_progress)
+        worker.signals.result.connect(handle_result)
+        worker.signals.error.connect(handle_error)
+        worker.signals.finished.connect(handle_finished)
+        self.cancel_button.setEnabled(True)
+        return start_worker(worker)
+
+    def cancel_task(self, kind):
+        """Cancel the running task of a kind, if any."""
+        worker = self.workers.pop(kind, None)
+        if worker is not None:
+            worker.cancel()
+        self.cancel_button.setEnabled(bool(self.workers))
+
+    def cancel_all_tasks(self):
+        """Cancel every running background task."""
+        for kind in list(self.workers):
+            self.cancel_task(kind)
+        self.progress_label.setText("Progress: Cancelled")
+
+    def format_statistics(self, stats, full_path, fraction=None):
+        """Format the statistics of a dataset for the value display."""
+        if fraction is None:
+            info_text = f"\n=== Statistics ===:\n"
+        else:
+            info_text = f"\n=== Statistics ({fraction:.0%} of data) ===:\n"
+        if not stats['count']:
+            return info_text
+
+        info_text += f"Min:  {stats['min']:.4g}\n"
+        info_text += f"Max:  {stats['max']:.4g}\n"
+        info_text += f"Mean: {stats['mean']:.4g}\n"
+        info_text += f"Std:  {stats['std']:.4g}\n"
+        info_text += f"RMS:  {stats['rms']:.6g}\n"                                  # Important for fields
+        if 'p50' in stats:
+            info_text += f"Percentiles 1/50/99% (sampled): {stats['p01']:.4g} / {stats['p50']:.4g} / {stats['p99']:.4g}\n"
+
+        # Energy metrics for field data, the ratio is undefined for an all-zero field (an early snapshot)
+        ratio = f"{stats['max']/stats['mean']:.6g}" if stats['mean'] else "n/a"
+        if 'E_' in full_path or 'B_' in full_path:                      
+            info_text += f"\n=== Field Measurements ===\n"
+            info_text += f"Energy Density (Σ|E|²): {stats['sum_sq']:.6g}\n"
+            info_text += f"Peak/Mean Ratio: {ratio}\n"
+        elif 'E*E' in full_path or 'B*B' in full_path:
+            info_text += f"\n=== Field Measurements ===\n"
+            info_text += f"Energy Density (Σ|E|²): {stats['sum']:.6g}\n"
+            info_text += f"Peak/Mean Ratio: {ratio}\n"
+        return info_text
+
+    def format_histogram(self, histogram, bin_edges):
+        """Format the histogram of the strided preview as one line of bars for the value display."""
+        if histogram is None or not histogram.max():
+            return ""
+        heights = np.ceil(histogram / histogram.max() * (len(HISTOGRAM_BARS) - 1)).astype(int)
+        bars = "".join(HISTOGRAM_BARS[height] for height in heights)
+        info_text = f"\n=== Histogram (sampled, {len(histogram)} bins) ===\n"
+        info_text += f"{bars}\n"
+        info_text += f"{bin_edges[0]:.4g} ... {bin_edges[-1]:.4g}\n"
+        return info_text
+
+    def set_preview_model(self, model):
+        """Show a preview model in the table (None for none), Full Resolution is offered for cached previews."""
+        previous_model = self.preview_table.model()
+        self.preview_table.setModel(model)
+        if previous_model is not None:
+            previous_model.deleteLater()
+        self.preview_label.setText(model.description() if model is not None else "Preview")
+        self.full_preview_button.setEnabled(isinstance(model, SampledPreviewModel))
+
+    def show_full_preview(self):
+        """Replace the cached strided preview with the values paged from the file."""
+        if self.file_path is None or self.data_path is None:
+            return
+        shape = self.catalog.get(self.data_path)['shape']
+        self.set_preview_model(DatasetPreviewModel(self.file_path, self.data_path, shape, self.preview_table))
+
+    def with_current_data(self, callback):
+        """Call callback once the selected dataset is available, opening it on the thread pool if needed."""
+        if self.data is not None:
+            callback()
+            return
+
+        def loaded(data):
+            self.data = data
+            callback()
+
+        self.progress_label.setText(f"Progress: loading {self.data_path}")
+        self.run_task('load', self.read_data_task, self.file_path, self.data_path, on_result=loaded)
+
+    @traced(category='io')
+    def read_data_task(self, file_path, full_path, worker):
+        """Open a 3D dataset lazily, only the slices that are shown are read. Runs on the thread pool."""
+        data = LazyDataset(file_path, full_path)
+        if data.ndim <= 2:
+            return open_dataset(file_path, full_path, data.shape, data.dtype)
+        return data
 
 #--------------------------------- Method to open the operation window ----------------------------------------------
     def open_operation_window(self):
@@ -234,12 +779,14 @@ class HDF5Viewer(QMainWindow):
         if not self.operation_window:
             self.operation_window = OperationWindow(self)
         self.operation_window.set_datasets(self.single_value_datasets)
+        self.operation_window.set_time_series(self.time_series, self.file_path)
         self.operation_window.show()
 
 #------------------------------Functions for plot_window for 1D or 2D data sets--------------------------------------
     def open_plot_window(self, data, dataset_type):
         """Open the plot window for 1D or 2D datasets."""
         if not self.plot_window:
+            from plot_window import PlotWindow          # matplotlib is loaded on first use (or by the warm-up)
             self.plot_window = PlotWindow(self)
         
         # For theory plots, pass the full (x,y) data but still mark as '1D'
@@ -258,32 +805,102 @@ class HDF5Viewer(QMainWindow):
             self.theory_window = TheoreticalWindow(self)
         self.theory_window.show()
 
+#--------------------------------- Profiling ------------------------------------------------------------------------
+    def sync_profiling_menu(self):
+        """Show the current profiler switches, they can also be changed in the summary window."""
+        self.record_spans_action.setChecked(profiler.enabled)
+        self.track_memory_action.setChecked(profiler.memory_tracking)
+
+    def open_trace_window(self):
+        """Open the summary of the recorded spans."""
+        if not hasattr(self, 'trace_window'):
+            from trace_window import TraceWindow
+            self.trace_window = TraceWindow(self)
+        self.trace_window.show()
+
+    def export_chrome_trace(self):
+        """Save the recorded spans as Chrome trace JSON."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "trace.json", "JSON Files (*.json)")
+        if path:
+            profiler.export_chrome_trace(path)
+            self.value_display.setText(f"Trace of {len(profiler.events)} spans saved to {path}")
+
 #---------------------------------------Functions for 3D data sets---------------------------------------------------
     def launch_mayavi_script(self, dialog):
-        """Prepare data and launch external Mayavi script."""
+        """Launch the external Mayavi script with a reference to the 3D data."""
         dialog.close()
-        
-        # Create temporary file for the 3D data
-        temp_dir = tempfile.mkdtemp()
-        data_path = os.path.join(temp_dir, "3d_data.npy")
-        np.save(data_path, self.data)
-        
-        # Prepare parameters
+
+        # Prepare parameters, sent to the render server or passed on the command line
         params = {
-            "data_path": data_path,
+            "kind": "slice" if self.view_kind.currentText() == "Slice Planes" else "isosurface",
             "iso_level": self.iso_surface_level.value(),
-            "colormap": self.color_map.currentText()
+            "colormap": self.color_map.currentText(),
+            "title": self.data_path
             # Add more parameters as needed
         }
-        
-        # Save parameters to JSON
-        params_path = os.path.join(temp_dir, "params.json")
-        with open(params_path, 'w') as f:
-            json.dump(params, f)
-        
-        # Launch your Mayavi script
+
+        # Datasets of the file are read by the Mayavi process itself, other arrays are shared without a file
+        shared = None
+        factor = 1
+        if self.data_path is not None:
+            params.update(volume_reference(self.file_path, self.data_path))
+            factor = self.resolution.currentData()
+            if factor is None:
+                factor = choose_factor(self.catalog.get(self.data_path)['shape'])
+        else:
+            shared, description = share_array(self.data)
+            params.update(description)
+
+        # The warm render server shows the view, a separate Mayavi process is started if it is unavailable
+        def submitted(ok):
+            if ok:
+                if shared is not None:                  # The server keeps its own copy
+                    release_shared(shared)
+            else:
+                self.launch_mayavi_process(params, shared)
+
+        self.run_task('render', self.submit_render_task, params, factor, self.reduction.currentText(),
+                      on_progress=lambda text, fraction: self.progress_label.setText(f"{text} ({fraction:.0%})"),
+                      on_result=submitted)
+
+    @traced(category='render')
+    def submit_render_task(self, params, factor, reduction, worker):
+        """Send a view to the render server, return False if it cannot be reached. Runs on the thread pool.
+
+        Downsampled views are read from the pyramid of the dataset, which is built the first time.
+        """
+        if factor > 1:
+            with file_manager.reading(params['file_path']) as file:
+                identity = snapshot_identity(file, params['dataset_path'], self.time_series)
+            pyramid = VolumePyramid(params['file_path'], params['dataset_path'], identity=identity)
+            pyramid.ensure(lambda fraction: worker.report_progress("Building volume pyramid", fraction))
+            params.update(volume_reference(*pyramid.reference(factor, reduction)))
+            params['title'] = f"{params['title']} (1/{factor}, {reduction})"
+        try:
+            self.render_client.submit(params)
+            return True
+        except OSError as e:
+            print(f"Render server unavailable, starting a separate Mayavi process: {e}")
+            return False
+
+    def launch_mayavi_process(self, params, shared=None):
+        """Show a view in a new Mayavi process."""
         script_path = os.path.join(os.path.dirname(__file__), "plot_mayavi.py")
-        subprocess.Popen([sys.executable, script_path, params_path])
+        process = subprocess.Popen([sys.executable, script_path, json.dumps(params)])
+        self.mayavi_processes.append((process, shared))
+        self.mayavi_timer.start()
+
+    def reap_mayavi_processes(self, release_all=False):
+        """Release the shared memory of Mayavi viewers that were closed (of all viewers on exit)."""
+        running = []
+        for process, shared in self.mayavi_processes:
+            if process.poll() is None and not release_all:
+                running.append((process, shared))
+            elif shared is not None:
+                release_shared(shared)
+        self.mayavi_processes = running
+        if not running:
+            self.mayavi_timer.stop()
 
     def show_3d_choice_dialog(self):
         """Let user choose between 2D slice or 3D visualization."""
@@ -311,7 +928,7 @@ class HDF5Viewer(QMainWindow):
         """Handle user's choice of visualization."""
         dialog.close()
         if choice == '2D':
-            self.open_plot_window(self.data, "3D")
+            self.with_current_data(lambda: self.open_plot_window(self.data, "3D"))
         elif choice == '3D':
             self.show_3d_parameter_dialog()
 
@@ -330,6 +947,25 @@ class HDF5Viewer(QMainWindow):
         self.color_map = QComboBox()
         self.color_map.addItems(["jet", "viridis", "hot", "cool"])
         layout.addRow("Color Map:", self.color_map)
+
+        self.view_kind = QComboBox()
+        self.view_kind.addItems(["Isosurface", "Slice Planes"])
+        layout.addRow("View:", self.view_kind)
+
+        # Downsampled levels are read from a cached pyramid, Auto keeps the volume below 256^3 points
+        self.resolution = QComboBox()
+        self.resolution.addItem("Auto", None)
+        self.resolution.addItem("Full", 1)
+        for factor in FACTORS:
+            self.resolution.addItem(f"1/{factor}", factor)
+        layout.addRow("Resolution:", self.resolution)
+
+        self.reduction = QComboBox()
+        self.reduction.addItems(["mean", "max"])
+        layout.addRow("Downsampling:", self.reduction)
+
+        # Mayavi is imported by the render server while the parameters are chosen
+        self.render_client.start()
         
         # Add more parameters as needed...
         
@@ -343,132 +979,73 @@ class HDF5Viewer(QMainWindow):
     # Method to create a GIF from time-series datasets
     def create_gif(self):
         """Create a GIF from time-series datasets."""
-        if not self.time_series_datasets:
+        if not self.time_series:
             self.value_display.setText("No time-series datasets found.")
             return
 
-        # Sort the time-series datasets by their timestep
-        self.time_series_datasets.sort()
+        # Open the slice selection dialog
+        slice_dialog = SliceDialogGif(self)
+        slice_dialog.set_time_series(self.time_series)
+        if slice_dialog.exec_() != QDialog.Accepted:
+            return                                                                          # User canceled the dialog
 
-        # Open the HDF5 file
-        with h5py.File(self.file_path, 'r') as file:
+        # Get the selected axis, slice index, and boundary removal values
+        axis, slice_index, top, bottom, left, right = slice_dialog.get_parameters()         # Added boundary values
 
-            # Check the shape of the first dataset to determine the axis limits
-            first_dataset = file[self.time_series_datasets[0]]
-            if first_dataset.ndim != 3:
-                self.value_display.setText("Time-series datasets must be 3D.")
-                return
+        # Datasets of the selected family, already sorted numerically by timestep
+        family = slice_dialog.series_combobox.currentText()
+        dataset_names = self.time_series.paths(family)
 
-            # Open the slice selection dialog
-            slice_dialog = SliceDialogGif(self)
-            slice_dialog.slice_spinbox.setMaximum(first_dataset.shape[2] - 1)               # Set max slice index
-            if slice_dialog.exec_() != QDialog.Accepted:
-                return                                                                      # User canceled the dialog
-
-            # Get the selected axis, slice index, and boundary removal values
-            axis, slice_index, top, bottom, left, right = slice_dialog.get_parameters()     # Added boundary values
-
-            # Find the global maximum value across all datasets
-            global_max = -np.inf  # Initialize with the smallest possible value
-            for dataset_name in self.time_series_datasets:
-                dataset = file[dataset_name]
-                data = dataset[()]
-
-                # Slice the 3D dataset along the selected axis
-                if axis == 0:
-                    sliced_data = data[slice_index, :, :]
-                elif axis == 1:
-                    sliced_data = data[:, slice_index, :]
-                elif axis == 2:
-                    sliced_data = data[:, :, slice_index]
-
-                # Remove boundary layers from the sliced 2D dataset
-                rows, cols = sliced_data.shape
-                if top + bottom < rows and left + right < cols:  # Ensure valid boundaries
-                    sliced_data = sliced_data[top:rows - bottom, left:cols - right]
-                else:
-                    print("Invalid boundary removal parameters. Skipping boundary removal.")
-                    self.value_display.setText("Invalid boundary removal parameters. Skipping boundary removal.")
-
-                # Update the global maximum value
-                current_max = np.max(sliced_data)
-                if current_max > global_max:
-                    global_max = current_max
-
-            # Apply a small offset to avoid log(0)
-            offset = 1e-10
-            global_max += offset  # Ensure the maximum value is positive
-
-            # Create a list to store the frames of the GIF
-            frames = []
-
-            for dataset_name in self.time_series_datasets:
-                # Update progress label
-                self.progress_label.setText(f"Processing: {dataset_name}")
-                QApplication.processEvents()  # Force UI update
-
-                dataset = file[dataset_name]
-                data = dataset[()]
-
-                # Slice the 3D dataset along the selected axis
-                if axis == 0:
-                    sliced_data = data[slice_index, :, :]
-                elif axis == 1:
-                    sliced_data = data[:, slice_index, :]
-                elif axis == 2:
-                    sliced_data = data[:, :, slice_index]
-
-                # Remove boundary layers from the sliced 2D dataset
-                rows, cols = sliced_data.shape
-                if top + bottom < rows and left + right < cols:  # Ensure valid boundaries
-                    sliced_data = sliced_data[top:rows - bottom, left:cols - right]
-                else:
-                    print("Invalid boundary removal parameters. Skipping boundary removal.")
-                    self.value_display.setText("Invalid boundary removal parameters. Skipping boundary removal.")
-
-                # Apply logarithmic transformation using the global maximum value
-                log_data = np.log10(np.abs(sliced_data) + offset)  # Ensure all values are positive
-
-                # Create the heatmap
-                fig = go.Figure(
-                        data=go.Heatmap(
-                            z=log_data,
-                            colorscale='jet',
-                            zmin=np.log10(offset),      # Minimum value (log10(offset))
-                            zmax=np.log10(global_max),  # Maximum value (log10(global_max))
-                            colorbar=dict(
-                                title="log10(Abs(E))",  # Updated colorbar title
-                                tickvals=np.linspace(np.log10(offset), np.log10(global_max), 5),  # Linear ticks in log space
-                                ticktext=[f"{10**x:.1e}" for x in np.linspace(np.log10(offset), np.log10(global_max), 5)]  # Convert back to linear scale for labels
-                            )
-                        )
-                    )
-    
-                # Update layout
-                fig.update_layout(
-                    title=f"Abs(E) = {dataset_name}",
-                    xaxis_title="Z",
-                    yaxis_title="Y",
-                )
-    
-                # Show the plot
-                img_bytes = fig.to_image(format="png",width=1600,height=1200)
-                img = imageio.imread(img_bytes)
-                frames.append(img)
-
-        # Save the frames as a GIF
-        gif_path, _ = QFileDialog.getSaveFileName(
-            self, "Save GIF", "", "GIF Files (*.gif);;All Files (*)"
+        # Check the shape of the first dataset to determine the axis limits
+        first_dataset = self.time_series.snapshots(family)[0]
+        if len(first_dataset['shape']) != 3:
+            self.value_display.setText("Time-series datasets must be 3D.")
+            return
+
+        # Remove boundary layers from the sliced 2D datasets only if they fit
+        rows, cols = [n for i, n in enumerate(first_dataset['shape']) if i != axis]
+        if not (top + bottom < rows and left + right < cols):                               # Ensure valid boundaries
+            print("Invalid boundary removal parameters. Skipping boundary removal.")
+            self.value_display.setText("Invalid boundary removal parameters. Skipping boundary removal.")
+            top = bottom = left = right = 0
+
+        # The output file is chosen first, frames are written to it as soon as they are rendered
+        from animation_writer import ANIMATION_FILTERS, animation_path
+        from animation_export import format_status
+        output_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Animation", "", ANIMATION_FILTERS
             )
-        
-        if gif_path:
-            if not gif_path.endswith('.gif'):
-                gif_path += '.gif'
-            imageio.mimsave(gif_path, frames, duration= 200)  # Adjust duration as needed
-            self.value_display.setText(f"GIF saved to {gif_path}")
-        
-        # Reset progress label after completion
-        self.progress_label.setText("Progress: Idle")
+        if not output_path:
+            return
+        output_path = animation_path(output_path, selected_filter)
+
+        # Frames are rendered on the thread pool, or by a pool of processes when more than one worker is selected
+        workers = slice_dialog.workers_spinbox.value()
+        downscale_factor = slice_dialog.downscale_spinbox.value()
+
+        def show_progress(status, fraction):
+            self.progress_label.setText(f"Processing ({fraction:.0%}): {format_status(status)}")
+
+        self.run_task('gif', self.write_animation_task, self.file_path, dataset_names,
+                      axis, slice_index, (top, bottom, left, right), workers, output_path, downscale_factor,
+                      on_progress=show_progress, on_result=self.on_animation_saved)
+
+    @traced(category='render')
+    def write_animation_task(self, file_path, dataset_names, axis, slice_index, boundaries, workers,
+                             output_path, downscale_factor, worker):
+        """Render one heatmap frame per time-series dataset and append it to the output file. Runs on the thread pool."""
+        from animation_writer import AnimationWriter
+        from animation_export import iter_frames
+        with AnimationWriter(output_path, downscale_factor=downscale_factor) as writer:
+            for frame in iter_frames(file_path, dataset_names, axis, slice_index, boundaries,
+                                     workers=workers, callback=worker.report_progress):
+                with span("encode frame", 'render'):
+                    writer.append(frame)
+        return output_path
+
+    def on_animation_saved(self, output_path):
+        """Report the saved animation (UI thread)."""
+        self.value_display.setText(f"Animation saved to {output_path}")
 
 # Slice Dialog class for 3D data sets
 class SliceDialog(QDialog):
@@ -520,6 +1097,12 @@ class SliceDialogGif(QDialog):
         # Layout
         self.layout = QFormLayout(self)
 
+        # Time series selection
+        self.series_label = QLabel("Time Series:", self)
+        self.series_combobox = QComboBox(self)
+        self.series_combobox.currentTextChanged.connect(self.update_slice_range)
+        self.layout.addRow(self.series_label, self.series_combobox)
+
         # Axis selection
         self.axis_label = QLabel("Axis:", self)
         self.axis_combobox = QComboBox(self)
@@ -570,12 +1153,43 @@ class SliceDialogGif(QDialog):
         self.right_spinbox.setMaximum(100)
         self.boundary_layout.addRow(self.right_label, self.right_spinbox)
 
+        # Number of processes rendering the frames
+        from animation_export import default_workers
+        self.workers_label = QLabel("Render Processes:", self)
+        self.workers_spinbox = QSpinBox(self)
+        self.workers_spinbox.setMinimum(1)
+        self.workers_spinbox.setMaximum(os.cpu_count() or 1)
+        self.workers_spinbox.setValue(default_workers())
+        self.layout.addRow(self.workers_label, self.workers_spinbox)
+
+        # Integer factor by which the frames are shrunk before they are written
+        self.downscale_label = QLabel("Downscale Factor:", self)
+        self.downscale_spinbox = QSpinBox(self)
+        self.downscale_spinbox.setMinimum(1)
+        self.downscale_spinbox.setMaximum(8)
+        self.layout.addRow(self.downscale_label, self.downscale_spinbox)
+
         # Buttons
         self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
         self.button_box.accepted.connect(self.accept)
         self.button_box.rejected.connect(self.reject)
         self.layout.addRow(self.button_box)
 
+        self.time_series = None
+
+    def set_time_series(self, time_series):
+        """Offer the snapshot families of the time-series index."""
+        self.time_series = time_series
+        self.series_combobox.clear()
+        self.series_combobox.addItems(time_series.families())
+        self.series_combobox.setCurrentText(time_series.default_family())
+
+    def update_slice_range(self, family):
+        """Limit the slice index to the shape of the selected family."""
+        if self.time_series and family:
+            shape = self.time_series.snapshots(family)[0]['shape']
+            self.slice_spinbox.setMaximum(shape[-1] - 1)                      # Set max slice index
+
     def get_parameters(self):
         """Return the selected axis and slice index."""
         axis = self.axis_combobox.currentText()                                 # Get the axis label (x, y, z)
@@ -588,12 +1202,18 @@ class SliceDialogGif(QDialog):
         right = self.right_spinbox.value()
 
         # Map x, y, z to axis indices
-        axis_map = {"X": 0, "Y": 1, "Z": 2}
+        axis_map = {"x": 0, "y": 1, "z": 2}
         return axis_map[axis], slice_index, top, bottom, left, right            # Added boundary values
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()                    # Render processes of the frozen (PyInstaller) build
     app = QApplication(sys.argv)
     viewer = HDF5Viewer()
     viewer.show()
-    sys.exit(app.exec_())
+    QTimer.singleShot(WARM_UP_DELAY, warm_up)           # Plotting, GIF and theory modules load once the window is up
+    exit_code = app.exec_()
+    viewer.render_client.shutdown()
+    viewer.reap_mayavi_processes(release_all=True)
+    file_manager.close_all()
+    sys.exit(exit_code)
@@ -1,10 +1,16 @@
 import numpy as np
 
+from hdf5_file_manager import file_manager
+from hdf5_slicing import read_plane
+from lazy_array import open_dataset, in_memory
+from instrumentation import traced
+
 #import PyQt5 widgets
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, 
     QPushButton, QTreeWidget, QTreeWidgetItem, QFileDialog, QTextEdit, QLabel, 
-    QDialog, QFormLayout, QSpinBox, QDialogButtonBox, QComboBox, QLineEdit, QCheckBox, QDoubleSpinBox
+    QDialog, QFormLayout, QSpinBox, QDialogButtonBox, QComboBox, QLineEdit, QCheckBox, QDoubleSpinBox,
+    QMessageBox
 )
 
 # hdf5_viewer.py (updated OperationWindow class for 1D, 2D, and sliced 3D datasets)
@@ -24,6 +30,21 @@ class OperationWindow(QDialog):
         self.layout.addWidget(self.dataset_label)
         self.layout.addWidget(self.dataset_combobox)
 
+        # Time series snapshot selection (overrides the dataset above when a series is chosen)
+        self.series_layout = QHBoxLayout()
+        self.layout.addLayout(self.series_layout)
+
+        self.series_label = QLabel("Time Series:", self)
+        self.series_layout.addWidget(self.series_label)
+        self.series_combobox = QComboBox(self)
+        self.series_combobox.currentTextChanged.connect(self.update_timesteps)
+        self.series_layout.addWidget(self.series_combobox)
+
+        self.timestep_label = QLabel("Timestep:", self)
+        self.series_layout.addWidget(self.timestep_label)
+        self.timestep_combobox = QComboBox(self)
+        self.series_layout.addWidget(self.timestep_combobox)
+
         # Operation selection
         self.operation_label = QLabel("Select Operation:", self)
         self.operation_combobox = QComboBox(self)
@@ -78,6 +99,8 @@ class OperationWindow(QDialog):
         # Variables
         self.datasets = {}  # Stores datasets for selection
         self.modified_data = None  # Stores the modified dataset
+        self.time_series = None  # Time-series index of the main window
+        self.file_path = None
 
     def set_datasets(self, datasets):
         """Set the available datasets for selection."""
@@ -85,6 +108,42 @@ class OperationWindow(QDialog):
         self.dataset_combobox.clear()
         self.dataset_combobox.addItems(datasets.keys())
 
+    def set_time_series(self, time_series, file_path):
+        """Set the time-series index used to pick snapshots by timestep."""
+        self.time_series = time_series
+        self.file_path = file_path
+        self.series_combobox.clear()
+        self.series_combobox.addItem("None")
+        self.series_combobox.addItems(time_series.families())
+
+    def update_time_series(self):
+        """List the snapshots added to the time-series index since it was set, keeping the selection."""
+        family = self.series_combobox.currentText()
+        step = self.timestep_combobox.currentText()
+        self.set_time_series(self.time_series, self.file_path)
+        self.series_combobox.setCurrentText(family)
+        self.timestep_combobox.setCurrentText(step)
+
+    def update_timesteps(self, family):
+        """List the timesteps of the selected family."""
+        self.timestep_combobox.clear()
+        if self.time_series and family and family != "None":
+            self.timestep_combobox.addItems([str(step) for step in self.time_series.steps(family)])
+
+    @traced(category='io')
+    def read_snapshot(self):
+        """Read the selected snapshot. For 3D snapshots only the selected slice is read."""
+        family = self.series_combobox.currentText()
+        step = int(self.timestep_combobox.currentText())
+        path = self.time_series.path(family, step)
+        with file_manager.reading(self.file_path) as file:
+            dataset = file[path]
+            if dataset.ndim == 3:
+                axis = int(self.slice_axis_combobox.currentText())
+                return read_plane(dataset, axis, self.slice_spinbox.value())
+        return open_dataset(self.file_path, path)
+
+    @traced(category='compute')
     def compute_fourier_transform(self, data):
         """Compute the Fourier Transform of the dataset."""
         if data.ndim == 1:  # 1D dataset
@@ -119,10 +178,14 @@ class OperationWindow(QDialog):
         else:
             return None
 
+    @traced(category='draw')
     def plot_modified_dataset(self):
         """Perform the selected operation and plot the modified dataset."""
-        selected_dataset = self.dataset_combobox.currentText()
-        data = self.datasets[selected_dataset]
+        if self.time_series and self.series_combobox.currentText() not in ("", "None"):
+            data = self.read_snapshot()
+        else:
+            selected_dataset = self.dataset_combobox.currentText()
+            data = self.datasets[selected_dataset]
 
         # Handle 3D datasets by slicing
         if data.ndim == 3:
@@ -140,7 +203,11 @@ class OperationWindow(QDialog):
                 print("Invalid constant value.")
         elif self.operation_combobox.currentText() == "Fourier Transform":  # NEW: Fourier Transform
             if data.ndim in [1, 2]:  # Only works for 1D and 2D datasets
-                self.modified_data = self.compute_fourier_transform(data)
+                try:
+                    self.modified_data = self.compute_fourier_transform(in_memory(data, "the Fourier transform"))
+                except MemoryError as e:
+                    QMessageBox.warning(self, "Warning", str(e))
+                    self.modified_data = None
             else:
                 print("Fourier Transform is only supported for 1D and 2D datasets.")
                 self.modified_data = None
@@ -15,6 +15,13 @@ import scipy.constants as consts
 # import modules for visualization of 3D data
 from mayavi import mlab
 
+# import index of the E_abs__tintNNNNN snapshots
+from time_series import TimeSeriesIndex
+
+# import cached mean/max downsampled copies of 3D datasets
+from volume_pyramid import VolumePyramid, FACTORS
+from stats_cache import snapshot_identity
+
 
 def readhdf5( fname, dSet_name ):
     #;{{{
@@ -58,6 +65,59 @@ def readhdf5( fname, dSet_name ):
     #;}}}
 
 
+def readhdf5_reduced( fname, dSet_name, plotReductionLevel=1, reduction='stride', series=None ):
+    #;{{{
+    """
+    Open hdf5-file and return one 3D dataset at reduced resolution.
+
+    Parameters
+    ----------
+    fname: str
+        filename of hdf5-file including full path
+    dSet_name: str
+        name of dataset to be read from hdf5-file
+    plotReductionLevel: int
+        reduce resolution by this amount along every axis
+    reduction: str
+        'stride' reads every plotReductionLevel-th point only,
+        'mean' or 'max' reads the level of the cached volume pyramid
+        (built on first use, only for plotReductionLevel 2, 4 or 8)
+    series: TimeSeriesIndex
+        index of the file, the pyramid of a superseded snapshot then
+        stays valid while the simulation appends new ones
+
+    Returns
+    -------
+    numpy array
+    """
+
+    err_value = 1
+
+    if not os.path.isfile( fname ):
+        print( 'ERROR: cannot read following file: {0}'.format( fname ))
+        return err_value
+
+    if reduction in ('mean', 'max') and plotReductionLevel in FACTORS:
+        identity = None
+        if series is not None:
+            with h5py.File( fname, 'r' ) as h5f:
+                identity = snapshot_identity( h5f, dSet_name, series )
+        return VolumePyramid( fname, dSet_name, identity=identity ).level( plotReductionLevel, reduction )
+    elif reduction != 'stride' and plotReductionLevel != 1:
+        print( 'WARNING: no {0} pyramid level for plotReductionLevel = {1}, using stride'.format( reduction, plotReductionLevel ) )
+
+    # strided hyperslab, only the selected points are read from the file
+    with h5py.File( fname, 'r' ) as h5f:
+        if dSet_name not in h5f:
+            print( 'ERROR: dataset <{0}> does not exists in file <{1}>'.format( dSet_name, fname ) )
+            return err_value
+        step    = slice( None, None, plotReductionLevel )
+        data_in = h5f[ dSet_name ][ step, step, step ]
+
+    return data_in
+    #;}}}
+
+
 def calc_wpe( density ):
 #;{{{
     """
@@ -218,6 +278,7 @@ def plot_simple( fname_in, dSet_name='',
                  N_contLevels=20, 
                  colScale='lin',
                  plotReductionLevel=4,
+                 reduction='stride',
                  fname_out='',
                  silent=True, 
                ):
@@ -232,17 +293,18 @@ def plot_simple( fname_in, dSet_name='',
         print( "         will exit now" )
         return
 
-    data2plot   = readhdf5( fname_in, dSet_name )
+    # only the reduced data are read (strided or from the volume pyramid)
+    data2plot   = readhdf5_reduced( fname_in, dSet_name, plotReductionLevel, reduction )
 
     print("dataset-name = {0}, min = {1}, max = {2}".format(dSet_name, np.amin(data2plot), np.amax(data2plot)) )
 
     if colScale == 'lin':
-        contLevels  = np.linspace( np.amin(data2plot[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]),  # NOT use simply data2plot, otherwise error
-                                   np.amax(data2plot[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]),  # NOT use simply data2plot, otherwise error
+        contLevels  = np.linspace( np.amin(data2plot),
+                                   np.amax(data2plot),
                                    N_contLevels )[1:].tolist()
     elif colScale == 'log':
         contLevels  = np.logspace( np.log10(1e-2), 
-                                   np.log10(np.amax(data2plot[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel])), 
+                                   np.log10(np.amax(data2plot)), 
                                    N_contLevels)[3:].tolist()
 
     if not silent:
@@ -254,7 +316,7 @@ def plot_simple( fname_in, dSet_name='',
                            size=(800,600),
                          )
 
-    cont_Eabs   = mlab.contour3d( data2plot[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel], 
+    cont_Eabs   = mlab.contour3d( data2plot, 
                                   contours=contLevels,
                                   transparent=True, opacity=.4,
                                   figure=fig1
@@ -262,9 +324,9 @@ def plot_simple( fname_in, dSet_name='',
 
     # create an axes instance to modify some of its properties afterwards
     ax1 = mlab.axes( nb_labels=4,
-                     extent=[1, data2plot.shape[0]/plotReductionLevel, 
-                             1, data2plot.shape[1]/plotReductionLevel,
-                             1, data2plot.shape[2]/plotReductionLevel ],
+                     extent=[1, data2plot.shape[0], 
+                             1, data2plot.shape[1],
+                             1, data2plot.shape[2] ],
                    )
     mlab.outline(ax1)
     ax1.axes.label_format   = '%.0f'
@@ -291,6 +353,7 @@ def plot_fullwave( fname_in, fname_plot='',
                    t_int=0,
                    N_contLevels=20, colScale='lin',
                    plotReductionLevel=1, 
+                   reduction='stride',
                    include_absorbers=False, cutExtended_fact=1.,
                    oplot_dens_projection=False,
                    scale_axes_to_meters=False,
@@ -334,28 +397,38 @@ def plot_fullwave( fname_in, fname_plot='',
     if cutExtended_fact > 1.:
         cutExtended_fact *= period_scaled / (16./plotReductionLevel)
 
+    # look up the snapshot in the time-series index, t_int=0 selects the last one written
+    series      = TimeSeriesIndex.from_file( fname_in )
+    if t_int == 0:
+        snapshot    = series.latest( 'E_abs' )
+    else:
+        snapshot    = series.get( 'E_abs', t_int )
+    if snapshot is None:
+        print( 'plot_fullwave' )
+        print( '  ERROR: no E_abs snapshot {0}in file <{1}>'.format(
+               '' if t_int == 0 else 'for t_int={0} '.format(t_int), fname_in ) )
+        print( '         will exit now' )
+        return
+    dSet_name   = snapshot['path']
+
     #Ex  = readhdf5( fname_in, 'Ex')
     #Ey  = readhdf5( fname_in, 'Ey')
     #Ez  = readhdf5( fname_in, 'Ez')
-    density = readhdf5( fname_in, 'n_e')[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]
+    density = readhdf5_reduced( fname_in, 'n_e', plotReductionLevel, reduction )
 
     if oplot_B0:
-        B0_x    = readhdf5( fname_in, 'B0x' )[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]
-        B0_y    = readhdf5( fname_in, 'B0y' )[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]
-        B0_z    = readhdf5( fname_in, 'B0z' )[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]
+        B0_x    = readhdf5_reduced( fname_in, 'B0x', plotReductionLevel, reduction )
+        B0_y    = readhdf5_reduced( fname_in, 'B0y', plotReductionLevel, reduction )
+        B0_z    = readhdf5_reduced( fname_in, 'B0z', plotReductionLevel, reduction )
         B0_abs  = np.sqrt( B0_x**2 + B0_y**2 + B0_z**2 )
     else:
-        B0_abs  = np.sqrt( readhdf5( fname_in, 'B0x')[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]**2 
-                          +readhdf5( fname_in, 'B0y')[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]**2 
-                          +readhdf5( fname_in, 'B0z')[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]**2 )
+        B0_abs  = np.sqrt( readhdf5_reduced( fname_in, 'B0x', plotReductionLevel, reduction )**2 
+                          +readhdf5_reduced( fname_in, 'B0y', plotReductionLevel, reduction )**2 
+                          +readhdf5_reduced( fname_in, 'B0z', plotReductionLevel, reduction )**2 )
 
     #E_abs   = np.sqrt( Ex**2 + Ey**2 + Ez**2 )
 
-    if t_int == 0:
-        dSet_name   = 'E_abs__tint00161'
-    else:
-        dSet_name   = 'E_abs__tint{0:05d}'.format(t_int)
-    E_abs   = readhdf5( fname_in, dSet_name )[::plotReductionLevel,::plotReductionLevel,::plotReductionLevel]
+    E_abs   = readhdf5_reduced( fname_in, dSet_name, plotReductionLevel, reduction, series )
     print( dSet_name )
     print( E_abs.shape )
 
@@ -644,6 +717,8 @@ def main():
                          help="Number of contour levels used." )
     parser.add_argument( "-r", "--plotReductionLevel", type=int, default=4,
                          help="Reduce resolution for 3D plot by this amount." )
+    parser.add_argument( "-m", "--reduction", type=str, default="stride", choices=("stride", "mean", "max"),
+                         help="How the resolution is reduced: stride, or mean/max from the cached volume pyramid (2, 4 or 8)." )
     parser.add_argument( "-p", "--plot_type", type=int, default=1,
                          help="Plot type." )
     parser.add_argument( "-t", "--time", type=int, default=0,
@@ -662,6 +737,7 @@ def main():
     dSet_name           = args.dSet_name
     contLevels          = args.contLevels
     plotReductionLevel  = args.plotReductionLevel
+    reduction           = args.reduction
     plot_type           = args.plot_type
     t_int               = args.time
     colScale            = args.colScale
@@ -673,6 +749,7 @@ def main():
     print( "    dSet_name = {0}".format(dSet_name) )
     print( "    contLevels = {0}".format(contLevels) )
     print( "    plotReductionLevel = {0}".format(plotReductionLevel) )
+    print( "    reduction = {0}".format(reduction) )
     print( "    t_int = {0}".format(t_int) )
     print( "    colScale = {0}".format(colScale) )
     print( "    fname_plot = {0}".format(fname_plot) )
@@ -683,6 +760,7 @@ def main():
                     N_contLevels=contLevels, 
                     colScale=colScale, 
                     plotReductionLevel=plotReductionLevel, 
+                    reduction=reduction,
                     silent=False)
     elif plot_type == 2:
         plot_fullwave( fname, t_int=t_int, 
@@ -692,6 +770,7 @@ def main():
                        oplot_dens_projection=False,
                        N_contLevels=contLevels, colScale=colScale, 
                        plotReductionLevel=plotReductionLevel, 
+                       reduction=reduction,
                        #oplot_Efieldcut='x1z1',
                        oplot_Efieldcut='x1',
                        oplot_B0=True,
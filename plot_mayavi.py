@@ -1,34 +1,48 @@
 # your_mayavi_script.py
 import sys
 import json
-import numpy as np
 from mayavi import mlab
 
-def main_mayavi(params_path):
-    # Load parameters
-    with open(params_path) as f:
-        params = json.load(f)
-    
-    # Load data
-    data = np.load(params['data_path'])
-    
-    # Create visualization
-    mlab.figure(size=(800, 600))
+from volume_handoff import load_volume
+
+AXIS_ORIENTATIONS = {0: 'x_axes', 1: 'y_axes', 2: 'z_axes'}
+
+def render_volume(data, params):
+    """Open a Mayavi figure showing an isosurface or slice planes of a volume."""
+    # The render server keeps its figures, a dataset shown again replaces its old view
+    figure = mlab.figure(size=(800, 600), figure=params.get('title'))
+    mlab.clf(figure)
     src = mlab.pipeline.scalar_field(data)
-    
+
     # Apply parameters
-    mlab.pipeline.iso_surface(
-        src, 
-        contours=[params['iso_level']], 
-        colormap=params['colormap']
-    )
-    
+    if params.get('kind', 'isosurface') == 'slice':
+        for axis in params.get('axes', [0, 1, 2]):
+            mlab.pipeline.image_plane_widget(
+                src,
+                plane_orientation=AXIS_ORIENTATIONS[axis],
+                slice_index=params.get('slice_index', data.shape[axis] // 2),
+                colormap=params['colormap']
+            )
+    else:
+        mlab.pipeline.iso_surface(
+            src,
+            contours=[params['iso_level']],
+            colormap=params['colormap']
+        )
+
     mlab.axes()
     mlab.colorbar()
+
+def main_mayavi(params):
+    # Load data: read from the HDF5 file or mapped from the viewer's shared memory, no temporary files
+    data = load_volume(params)
+
+    # Create visualization
+    render_volume(data, params)
     mlab.show()
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
-        main_mayavi(sys.argv[1])
+        main_mayavi(json.loads(sys.argv[1]))
     else:
-        print("Usage: python your_mayavi_script.py <params.json>")
\ No newline at end of file
+        print("Usage: python your_mayavi_script.py '<params as JSON>'")
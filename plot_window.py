@@ -7,7 +7,6 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtGui import QIcon
-from matplotlib.lines import Line2D
 from matplotlib.collections import PathCollection
 from matplotlib.figure import Figure
 from matplotlib.colors import PowerNorm
@@ -19,6 +18,15 @@ import matplotlib.pyplot as plt
 import numpy as np
 import h5py
 
+from hdf5_file_manager import file_manager
+from workers import Worker, start_worker
+from lazy_array import LazyDataset, open_dataset, in_memory
+from instrumentation import span, traced
+from decimation import LineDecimator
+from image_pyramid import ImagePyramid
+
+MAX_BLIT_LAYERS = 8                                     # Cached bitmaps below the top lines of a 1D plot
+
 class PlotWindow(QDialog):
 #--------------------------------------------- Main Plot Window ------------------------------------------------------
     """A sub-window for plotting 1D and 2D datasets."""
@@ -397,7 +405,14 @@ class PlotWindow(QDialog):
         self.dataset_type =     None                                # '1D' or '2D'
 
         self.datasets =         {}                                  # {name: (data, color, style, label, width)}
-        self.current_plots =    {}                                  # Track currently plotted datasets
+        self.current_plots =    {}                                  # {name: {'artist', 'data', 'style'}} drawn in this order
+        self.line_axes =        None                                # Axes of the 1D plot, kept between updates
+        self.line_legend =      None
+        self.legend_loc =       None                                # Place of the legend in axes coordinates, None for best
+        self.axes_state =       None                                # Labels, scales and ticks applied to line_axes
+        self.blit_layers =      {}                                  # {n: axes bitmap with the first n lines drawn}
+        self.heatmap =          None                                # {'image', 'pyramid', 'view'} of the 2D plot
+        self.heatmap_source =   None                                # (data, slice and boundaries, pyramid) of the 2D plot
         self.parent_window =    parent                              # Reference to main window
 
         # Variables to store original tick data
@@ -411,6 +426,8 @@ class PlotWindow(QDialog):
 
         # Connect mouse events
         self.canvas.mpl_connect('motion_notify_event', self.on_mouse_move)
+        # The 1D lines are animated: drawn after every full draw (resize, zoom) and blitted on updates
+        self.canvas.mpl_connect('draw_event', self.on_draw_event)
 
     def set_data(self, data, dataset_type):
         """Set the dataset to be plotted and its type (1D, 2D or 3D slice)."""
@@ -578,89 +595,105 @@ class PlotWindow(QDialog):
             QMessageBox.warning(self, "Warning", "No dataset selected in main window")
             return
             
-        with h5py.File(self.parent_window.file_path, 'r') as file:
-            for item in selected_items:
-                # Get the full path from the item's data (using UserRole)
-                full_path = item.data(0, Qt.UserRole)  
-                
-                if not full_path or not isinstance(full_path, str):
-                    QMessageBox.warning(self, "Warning", f"Invalid dataset path for item: {item.text(0)}")
-                    continue
-                    
-                try:
+        # Collect the paths here, the data is read on the thread pool
+        paths = []                                              # [(file path, dataset path)]
+        for item in selected_items:
+            # Get the full path from the item's data (using UserRole)
+            full_path = item.data(0, Qt.UserRole)  
+            
+            if not full_path or not isinstance(full_path, str):
+                QMessageBox.warning(self, "Warning", f"Invalid dataset path for item: {item.text(0)}")
+                continue
+
+            # In a workspace every item is read from the file of its own run
+            file_path = self.parent_window.item_file_path(item)
+            if file_path is None:
+                QMessageBox.warning(self, "Warning", f"The run of {full_path} could not be read")
+                continue
+            paths.append((file_path, full_path))
+
+        if not paths:
+            return
+
+        worker = Worker(self.read_datasets_task, paths)
+        worker.signals.result.connect(self.on_datasets_read)
+        worker.signals.error.connect(lambda message: QMessageBox.warning(self, "Error", message))
+        worker.signals.finished.connect(lambda: self.add_button.setEnabled(True))
+        self.add_button.setEnabled(False)
+        self.status_bar.setText(f"Loading {len(paths)} dataset(s)...")
+        start_worker(worker)
+
+    @traced(category='io')
+    def read_datasets_task(self, paths, worker):
+        """Read the selected (file path, dataset path) pairs and their attributes. Runs on the thread pool."""
+        loaded = []
+        for file_path, full_path in paths:
+            worker.check_cancelled()
+            try:
+                with file_manager.reading(file_path) as file:
                     dataset = file[full_path]
                     if not isinstance(dataset, h5py.Dataset):
-                        QMessageBox.warning(self, "Warning", f"{full_path} is not a dataset")
-                        continue
-                        
-                    data = dataset[()]
-
-                    # Check if this is a combined (x,y) dataset from theory plots
-                    is_theory_plot = False
-                    if data.ndim == 2 and data.shape[1] == 2 and 'columns' in dataset.attrs:
-                        if list(dataset.attrs['columns']) == ['x', 'y']:
-                            is_theory_plot = True
-                            x_data = data[:, 0]
-                            y_data = data[:, 1]
-                    
-                    if is_theory_plot:
-                        # Handle as 1D theory plot data
-                        name = dataset.attrs.get('name', full_path.split('/')[-1])
-                        
-                        # Add to our datasets with default styling
-                        self.datasets[name] = {
-                            'type': 'theory',
-                            'x': x_data,
-                            'y': y_data,
-                            'color': self.line_color_combobox.currentText(),
-                            'style': self.line_style_combobox.currentText(),
-                            'label': dataset.attrs.get('formula', name),
-                            'width': self.line_width.value()
-                        }
-                        
-                    elif data.ndim == 1:
-                        # Regular 1D dataset
-                        name = full_path.split('/')[-1]
-                        if name in self.datasets:
-                            name = f"{name}_{len(self.datasets)}"  # Append number if name exists
-                        
-                        self.datasets[name] = {
-                            'data': data,
-                            'color': self.line_color_combobox.currentText(),
-                            'style': self.line_style_combobox.currentText(),
-                            'label': self.legend_input.text() or name,
-                            'width': self.line_width.value()
-                        }
-                    else:
-                        QMessageBox.warning(self, "Warning", 
-                                        f"Dataset {full_path} is not 1D (shape: {data.shape})")
+                        loaded.append((full_path, None, None, f"{full_path} is not a dataset"))
                         continue
-
-                    '''if data.ndim != 1:
-                        QMessageBox.warning(self, "Warning", f"Dataset {full_path} is not 1D (shape: {data.shape})")
-                        continue
-                        
-                    # Generate a unique name
-                    name = full_path.split('/')[-1]
-                    if name in self.datasets:
-                        name = f"{name}_{len(self.datasets)}"  # Append number if name exists
-                    
-                    # Add to our datasets with default styling
-                    self.datasets[name] = {
-                        'data': data,
-                        'color': self.line_color_combobox.currentText(),
-                        'style': self.line_style_combobox.currentText(),
-                        'label': self.legend_input.text() or name,
-                        'width': self.line_width.value()
-                    }'''
-                    
-                    # Add to list widget
-                    list_item = QListWidgetItem(name)
-                    list_item.setData(Qt.UserRole, name)  # Store the dataset name
-                    self.dataset_list.addItem(list_item)
-                    
-                except Exception as e:
-                    QMessageBox.warning(self, "Error", f"Couldn't load dataset {full_path}: {str(e)}")
+                    data = open_dataset(file_path, full_path, dataset.shape, dataset.dtype)
+                    loaded.append((full_path, data, dict(dataset.attrs.items()), None))
+            except Exception as e:
+                loaded.append((full_path, None, None, f"Couldn't load dataset {full_path}: {str(e)}"))
+        return loaded
+
+    def on_datasets_read(self, loaded):
+        """Add the datasets read in the background to the list and plot them (UI thread)."""
+        self.status_bar.setText("")
+        for full_path, data, attrs, error in loaded:
+            if error is not None:
+                QMessageBox.warning(self, "Warning", error)
+                continue
+
+            # Check if this is a combined (x,y) dataset from theory plots
+            is_theory_plot = False
+            if data.ndim == 2 and data.shape[1] == 2 and 'columns' in attrs:
+                if list(attrs['columns']) == ['x', 'y']:
+                    is_theory_plot = True
+                    x_data = data[:, 0]
+                    y_data = data[:, 1]
+            
+            if is_theory_plot:
+                # Handle as 1D theory plot data
+                name = attrs.get('name', full_path.split('/')[-1])
+                
+                # Add to our datasets with default styling
+                self.datasets[name] = {
+                    'type': 'theory',
+                    'x': x_data,
+                    'y': y_data,
+                    'color': self.line_color_combobox.currentText(),
+                    'style': self.line_style_combobox.currentText(),
+                    'label': attrs.get('formula', name),
+                    'width': self.line_width.value()
+                }
+                
+            elif data.ndim == 1:
+                # Regular 1D dataset
+                name = full_path.split('/')[-1]
+                if name in self.datasets:
+                    name = f"{name}_{len(self.datasets)}"  # Append number if name exists
+                
+                self.datasets[name] = {
+                    'data': data,
+                    'color': self.line_color_combobox.currentText(),
+                    'style': self.line_style_combobox.currentText(),
+                    'label': self.legend_input.text() or name,
+                    'width': self.line_width.value()
+                }
+            else:
+                QMessageBox.warning(self, "Warning", 
+                                f"Dataset {full_path} is not 1D (shape: {data.shape})")
+                continue
+            
+            # Add to list widget
+            list_item = QListWidgetItem(name)
+            list_item.setData(Qt.UserRole, name)  # Store the dataset name
+            self.dataset_list.addItem(list_item)
         
         if self.datasets:
             self.oneD_plot()
@@ -675,26 +708,14 @@ class PlotWindow(QDialog):
         for item in selected_items:
             name = item.data(Qt.UserRole)
             if name in self.datasets:
-                # Remove any associated plot elements
-                if name in self.current_plots:
-                    if isinstance(self.current_plots[name], list):
-                        # Handle points (which are collections)
-                        for element in self.current_plots[name]:
-                            if element in self.figure.gca().collections:
-                                self.figure.gca().collections.remove(element)
-                    elif isinstance(self.current_plots[name], Line2D):
-                        # Handle lines
-                        self.current_plots[name].remove()
-                    del self.current_plots[name]
-                
-                # Remove from datasets dictionary
+                # Remove from datasets dictionary, oneD_plot removes the artist
                 del self.datasets[name]
             
             # Remove from list widget
             self.dataset_list.takeItem(self.dataset_list.row(item))
         
-        # Redraw the canvas to reflect changes
-        self.canvas.draw()
+        # Redraw the plot to reflect changes
+        self.oneD_plot()
     
     def on_dataset_selected(self):
         """Safely handle dataset selection without crashing."""
@@ -919,117 +940,291 @@ class PlotWindow(QDialog):
             self.oneD_plot()
 
 # --------------------------------------------------- plot functions controls ---------------------------------------------------
+    @traced(category='draw')
     def oneD_plot(self):
-        """Update the plot with all datasets added to the list."""
+        """Update the plot with all datasets added to the list.
+
+        The axes and the artist of every dataset are kept between calls: only the artists whose
+        data or style changed are updated. If the limits and labels stay the same, the lines from
+        the first changed one upwards are redrawn over a cached bitmap (blitting) instead of the figure.
+        """
         self.apply_customization()
 
-        self.figure.clear()
-        ax = self.figure.add_subplot(111)
-        
-        if not self.datasets:
-            self.canvas.draw()
-            return
+        ax = self.line_axes
+        new_axes = ax is None or ax not in self.figure.axes
+        if new_axes:
+            ax = self.create_line_axes()
+
+        # Artists of removed datasets
+        changed = [name for name in self.current_plots if name not in self.datasets]
+        first_changed = min((list(self.current_plots).index(name) for name in changed), default=None)
+        for name in changed:
+            self.current_plots.pop(name)['artist'].remove()
+        data_changed = bool(changed)
 
-        # Plot each dataset with its customization
+        # Add new artists, update the data or style of the others
         for name, dataset in self.datasets.items():
-            if dataset.get('type') == 'theory':
-                # Theory plot data with separate x and y
-                ax.plot(
-                    dataset['x'],
-                    dataset['y'],
-                    color=dataset['color'],
-                    linestyle=dataset['style'],
-                    label=dataset['label'],
-                    linewidth=dataset['width']
-                )
-            
-            elif 'type' not in dataset:                         # Regular 1D dataset
-                data = dataset['data']
-                
-                # Apply boundary removal using the spin boxes
-                left = self.leftp_spinbox.value()
-                right = self.rightp_spinbox.value()
-                
-                if left + right < len(data):
-                    data = data[left:len(data)-right]
-                
-                ax.plot(
-                    data,
-                    color=dataset['color'],
-                    linestyle=dataset['style'],
-                    label=dataset['label'],
-                    linewidth=dataset['width']
-                )
-            elif dataset['type'] == 'points':  # Points dataset
-                ax.plot(
-                    dataset['x'], dataset['y'],
-                    linestyle='None',
-                    marker=dataset['style'],
-                    color=dataset['color'],
-                    markersize=dataset['size'],
-                    label=dataset['label']
-                )
-            elif dataset['type'] == 'line':  # Line dataset
-                ax.plot(
-                    [dataset['x1'], dataset['x2']],
-                    [dataset['y1'], dataset['y2']],
-                    linestyle=dataset['style'],
-                    color=dataset['color'],
-                    linewidth=dataset['width'],
-                    label=dataset['label']
-                )
-        
-        # Set labels and title
-        ax.set_xlabel( self.x_label_input.text() or "X Axis",  fontsize=self.x_label_size_spin.value() )
-        ax.set_ylabel( self.y_label_input.text() or "Y Axis",  fontsize=self.y_label_size_spin.value() )
-        ax.set_title(  self.title_input.text()   or "1D Plot", fontsize=self.title_label_size_spin.value())
-
-        # Apply logarithmic scales if selected
-        if self.x_scale_combobox.currentText() == "Log":
-            ax.set_xscale('log')
-        if self.y_scale_combobox.currentText() == "Log":
-            ax.set_yscale('log')
-        
-        # Add legend if we have any custom labels
-        if any(d['label'] for d in self.datasets.values()):
-            ax.legend()
-
-        # Add legend with custom styling if we have any custom labels
-        '''if any(d.get('label') for d in self.datasets.values()):
-            legend = ax.legend(
-                fontsize=12,  # Set legend font size
-                frameon=True,  # Show legend box
-                framealpha=0.8,  # Slightly transparent
-                facecolor='white',  # Background color
-                edgecolor='black',  # Border color
-                fancybox=True,  # Rounded corners
-                shadow=True,  # Add shadow effect
-                borderpad=1,  # Padding inside the box
-                labelspacing=1,  # Space between entries
-                handlelength=1.5  # Length of legend lines
-            )
-
-            # Additional legend frame customization
-            legend.get_frame().set_linewidth(1.5)  # Border thickness
-            legend.get_frame().set_linestyle('--')  # Dashed border'''
-        
-        # Add this at the end, just before canvas.draw()
-        self.apply_tick_customization(ax)
+            change = self.update_artist(ax, name, dataset)
+            if change is None:
+                continue
+            changed.append(name)
+            data_changed |= change == 'data'
+            index = list(self.current_plots).index(name)
+            first_changed = index if first_changed is None else min(first_changed, index)
+
+        if changed:
+            self.update_legend(ax, relocate=data_changed)
+
+        # New data or a new axis scale is shown in full, as the rebuilt plot used to be; a restyle keeps the zoom
+        limits = (ax.get_xlim(), ax.get_ylim())
+        scales = (self.x_scale_combobox.currentText(), self.y_scale_combobox.currentText())
+        rescale = data_changed or self.axes_state is None or scales != self.axes_state[6:8]
+        if rescale:
+            self.redecimate_lines(ax, full=True)                # Limits of the whole traces
+            ax.set_autoscale_on(True)
+            ax.relim(visible_only=True)                         # Hidden zoom selector handles are left out
+            ax.autoscale_view()
+            self.previous_views = []
+
+        full_draw = self.apply_axes_state(ax) or (ax.get_xlim(), ax.get_ylim()) != limits or not self.blit_layers
+        if rescale:
+            # Store original limits for reset functionality
+            self.original_xlim = ax.get_xlim()
+            self.original_ylim = ax.get_ylim()
 
-        # Apply tick scaling if needed
-        self.apply_tick_scaling(ax)
+        # Recreate the rectangle selector if in zoom mode
+        if new_axes and self.zoom_mode:
+            self.create_rectangle_selector()
+
+        self.redecimate_lines(ax)
+        if full_draw:
+            with span("PlotWindow canvas.draw", 'draw'):
+                self.canvas.draw()
+        elif changed:
+            with span("PlotWindow blit", 'draw', lines=len(self.current_plots) - first_changed):
+                self.blit_lines(first_changed)
 
+    def create_line_axes(self):
+        """Clear the figure and create the axes of the 1D plot."""
+        self.figure.clear()
+        ax = self.figure.add_subplot(111)
         ax.grid(True)
-        # Store original limits for reset functionality
-        self.original_xlim = ax.get_xlim()
-        self.original_ylim = ax.get_ylim()
+        self.line_axes =        ax
+        self.heatmap =          None
+        self.line_legend =      None
+        self.legend_loc =       None
+        self.axes_state =       None
+        self.current_plots =    {}
+        self.blit_layers =      {}
+        return ax
+
+    def artist_key(self, dataset):
+        """Return a key that changes whenever the plotted data of a dataset does (without reading it)."""
+        if dataset.get('type') == 'theory':
+            return id(dataset['x']), id(dataset['y'])
+        elif 'type' not in dataset:
+            return id(dataset['data']), self.leftp_spinbox.value(), self.rightp_spinbox.value()
+        elif dataset['type'] == 'points':
+            return tuple(dataset['x']), tuple(dataset['y'])
+        elif dataset['type'] == 'line':
+            return dataset['x1'], dataset['y1'], dataset['x2'], dataset['y2']
+
+    def artist_data(self, dataset):
+        """Return the full (x, y) data of a dataset, x is None for sample positions."""
+        if dataset.get('type') == 'theory':                    # Theory plot data with separate x and y
+            return dataset['x'], dataset['y']
+        elif 'type' not in dataset:                             # Regular 1D dataset
+            data = dataset['data']
+            if isinstance(data, LazyDataset):                   # Over the memory budget, trimmed by the decimator
+                return None, data
+
+            # Apply boundary removal using the spin boxes
+            start, stop = self.trim_range(len(data))
+            return None, np.asarray(data[start:stop])
+        elif dataset['type'] == 'points':                       # Points dataset
+            return dataset['x'], dataset['y']
+        elif dataset['type'] == 'line':                         # Line dataset
+            return [dataset['x1'], dataset['x2']], [dataset['y1'], dataset['y2']]
+
+    def trim_range(self, length):
+        """Samples [start, stop) of a 1D dataset left by the boundary removal spin boxes."""
+        left = self.leftp_spinbox.value()
+        right = self.rightp_spinbox.value()
+        if left + right < length:
+            return left, length - right
+        return 0, length
+
+    def artist_style(self, dataset):
+        """Return the Line2D properties of a dataset."""
+        if dataset.get('type') == 'points':
+            return dict(linestyle='None', marker=dataset['style'], color=dataset['color'],
+                        markersize=dataset['size'], label=dataset['label'])
+        return dict(linestyle=dataset['style'], marker='None', color=dataset['color'],
+                    linewidth=dataset['width'], label=dataset['label'])
+
+    def update_artist(self, ax, name, dataset):
+        """Create or update the artist of one dataset. Returns 'data', 'style' or None if unchanged."""
+        plot = self.current_plots.get(name)
+        style = self.artist_style(dataset)
+        key = self.artist_key(dataset)
+        if plot is None:
+            plot = {'style': style}
+            artist, = ax.plot(*self.line_data(ax, plot, dataset), animated=True, **style)
+            plot.update(artist=artist, data=key)
+            self.current_plots[name] = plot
+            return 'data'
+
+        change = None
+        if key != plot['data']:
+            plot['artist'].set_data(*self.line_data(ax, plot, dataset))
+            plot['data'] = key
+            change = 'data'
+        if style != plot['style']:
+            plot['artist'].set(**style)
+            plot['style'] = style
+            change = change or 'style'
+        return change
+
+    def line_data(self, ax, plot, dataset):
+        """Return the (x, y) to plot for a dataset, and attach a decimator to long traces.
+
+        Long traces are decimated to the minimum and maximum of every pixel column of the axes,
+        starting with the full range; redecimate_lines follows the view from then on. Datasets over
+        the memory budget are always decimated, they are read in slabs and never loaded in full.
+        """
+        x, y = self.artist_data(dataset)
+        plot['decimator'] = None
+        plot['view'] = None                                     # (sample range, width) last decimated
+        if isinstance(y, LazyDataset):
+            plot['decimator'] = LineDecimator(None, y, *self.trim_range(len(y)))
+        elif dataset.get('type') in (None, 'theory') and LineDecimator.applies(x, y):
+            plot['decimator'] = LineDecimator(x, y)
+        if plot['decimator'] is not None:
+            plot['view'] = (plot['decimator'].visible_range(None, None), int(ax.bbox.width))
+            return plot['decimator'].decimate(width=plot['view'][1])
+        return (np.arange(len(y)) if x is None else x), y
+
+    def redecimate_lines(self, ax, full=False, scale=1):
+        """Decimate the long traces again from their full data for the current x range (all if full).
+
+        Traces are compared by the samples in view, so limits that still show the whole trace
+        (e.g. autoscaled after it was added) keep the decimation already drawn.
+        scale multiplies the width in pixels, for saving at a higher resolution than the screen.
+        """
+        width = int(ax.bbox.width * scale)
+        x0, x1 = (None, None) if full else ax.get_xlim()
+        for plot in self.current_plots.values():
+            decimator = plot['decimator']
+            if decimator is None:
+                continue
+            view = (decimator.visible_range(x0, x1), width)
+            if plot['view'] == view:
+                continue
+            plot['artist'].set_data(*decimator.decimate(x0, x1, width))
+            plot['view'] = view
+
+    def update_legend(self, ax, relocate=True):
+        """Rebuild the legend after artists or labels changed, at the same place unless relocate is set.
+
+        The best place is searched once: it tests every vertex of every line and is slow for long traces.
+        """
+        if self.line_legend is not None:
+            self.line_legend.remove()
+            self.line_legend = None
+        if relocate:
+            self.legend_loc = None
+        # Add legend if we have any custom labels
+        if any(d['label'] for d in self.datasets.values()):
+            self.line_legend = ax.legend(loc=self.legend_loc or 'best')
+            self.line_legend.set_animated(True)
+
+    def apply_axes_state(self, ax):
+        """Apply labels, scales and ticks if one of them changed. Returns True if the axes changed."""
+        state = (self.x_label_input.text() or "X Axis", self.x_label_size_spin.value(),
+                 self.y_label_input.text() or "Y Axis", self.y_label_size_spin.value(),
+                 self.title_input.text() or "1D Plot", self.title_label_size_spin.value(),
+                 self.x_scale_combobox.currentText(), self.y_scale_combobox.currentText(),
+                 self.x_tick_size.value(), self.y_tick_size.value(),
+                 self.x_tick_scale.value(), self.x_tick_offset.value(), ax.get_xlim())
+        if state == self.axes_state:
+            return False
 
-        # Recreate the rectangle selector if in zoom mode
-        if self.zoom_mode:
-            self.create_rectangle_selector()
+        # Set labels and title
+        ax.set_xlabel( state[0], fontsize=state[1] )
+        ax.set_ylabel( state[2], fontsize=state[3] )
+        ax.set_title(  state[4], fontsize=state[5] )
 
-        self.canvas.draw()
+        # Setting the scale also restores the tick locators replaced by apply_tick_scaling
+        ax.set_xscale('log' if state[6] == "Log" else 'linear')
+        ax.set_yscale('log' if state[7] == "Log" else 'linear')
+
+        self.apply_tick_customization(ax)
+        # Apply tick scaling if needed
+        self.apply_tick_scaling(ax)
+        self.axes_state = state[:-1] + (ax.get_xlim(),)
+        return True
+
+    def blit_lines(self, start):
+        """Redraw the lines from index start upwards over the cached bitmap of the lines below.
+
+        Lines are drawn in order, so the lines above a changed one are drawn again as well. A change
+        to one of the top MAX_BLIT_LAYERS lines starts at its own bitmap, deeper lines redraw from the axes.
+        """
+        ax = self.line_axes
+        artists = [plot['artist'] for plot in self.current_plots.values()]
+        for n in [n for n in self.blit_layers if n > start]:   # Bitmaps that contain a changed line
+            del self.blit_layers[n]
+        base = max(self.blit_layers)
+        self.canvas.restore_region(self.blit_layers[base])
+        self.draw_lines(ax, artists, base)
+        self.canvas.blit(self.figure.bbox)
+
+    def draw_lines(self, ax, artists, start):
+        """Draw the animated lines from start and the legend into the canvas, caching the bitmap below each top line."""
+        lowest = len(artists) - MAX_BLIT_LAYERS                 # Bitmaps are kept for the lines from here up
+        for n in range(start, len(artists)):
+            if n >= lowest and n not in self.blit_layers:
+                self.blit_layers[n] = self.canvas.copy_from_bbox(self.figure.bbox)
+            ax.draw_artist(artists[n])
+        self.blit_layers[len(artists)] = self.canvas.copy_from_bbox(self.figure.bbox)
+        for n in [n for n in self.blit_layers if 0 < n < lowest]:
+            del self.blit_layers[n]
+        if self.line_legend is not None:
+            if self.legend_loc is None:                         # Keep the best place, searched here once
+                self.legend_loc = self.legend_corner(ax, self.line_legend)
+                self.update_legend(ax, relocate=False)
+            ax.draw_artist(self.line_legend)
+
+    def legend_corner(self, ax, legend):
+        """Return the location code ('upper right', 'center', ...) of the place chosen for a legend."""
+        box = ax.transAxes.inverted().transform_bbox(legend.get_window_extent())
+        def side(low_gap, high_gap, low, high):
+            if abs(low_gap - high_gap) < .02:
+                return 'center'
+            return low if low_gap < high_gap else high
+        vertical = side(box.y0, 1 - box.y1, 'lower', 'upper')
+        horizontal = side(box.x0, 1 - box.x1, 'left', 'right')
+        return 'center' if vertical == horizontal else f"{vertical} {horizontal}"
+
+    def on_draw_event(self, event):
+        """After a full draw, draw the 1D lines on top and cache the background for blitting."""
+        if event.canvas is not self.canvas:
+            return
+        if self.heatmap is not None:
+            if self.update_heatmap():                           # The window was resized
+                self.canvas.draw_idle()
+            return
+        ax = self.line_axes
+        if ax is None or ax not in self.figure.axes:
+            return
+        artists = [plot['artist'] for plot in self.current_plots.values()]
+        if not all(artist.get_animated() for artist in artists):   # savefig draws them itself
+            return
+        self.redecimate_lines(ax)                               # Zoom, reset_view and resizing end up here
+        self.blit_layers = {0: self.canvas.copy_from_bbox(self.figure.bbox)}
+        self.draw_lines(ax, artists, 0)
 
+    @traced(category='draw')
     def twoD_plot(self):
         """Plot 2D datasets only."""
         if self.data is None:
@@ -1037,56 +1232,82 @@ class PlotWindow(QDialog):
 
         # Clear the previous plot
         self.figure.clear()
+        self.line_axes = None
+        self.current_plots = {}
+        self.blit_layers = {}
 
         # Create a new plot
         ax = self.figure.add_subplot(111)
-
-        if self.dataset_type == "3D":
-            axis = self.axis_slice_combobox.currentText()                                 # Get the axis label (x, y, z)
-            slice_index = self.slice_spinbox.value()
-
-            # Map x, y, z to axis indices
-            axis_map = {"X": 0, "Y": 1, "Z": 2}
-
-            # Slice the 3D dataset
-            if axis_map[axis] == 0:
-                data = self.data[slice_index, :, :]
-            elif axis_map[axis] == 1:
-                data = self.data[:, slice_index, :]
-            elif axis_map[axis] == 2:
-                data = self.data[:, :, slice_index]
-        
+        self.heatmap = None
+
+        # The pyramid is kept while the slice and the boundaries are the same, e.g. for a new colormap
+        source = (self.dataset_type, self.axis_slice_combobox.currentText(), self.slice_spinbox.value(),
+                  self.top_spinbox.value(), self.bottom_spinbox.value(),
+                  self.left_spinbox.value(), self.right_spinbox.value())
+        if self.heatmap_source is not None and self.heatmap_source[0] is self.data and self.heatmap_source[1] == source:
+            pyramid = self.heatmap_source[2]
         else:
-            data = self.data
+            if self.dataset_type == "3D":
+                axis = self.axis_slice_combobox.currentText()                                 # Get the axis label (x, y, z)
+                slice_index = self.slice_spinbox.value()
+
+                # Map x, y, z to axis indices
+                axis_map = {"X": 0, "Y": 1, "Z": 2}
+
+                # Slice the 3D dataset
+                if axis_map[axis] == 0:
+                    data = self.data[slice_index, :, :]
+                elif axis_map[axis] == 1:
+                    data = self.data[:, slice_index, :]
+                elif axis_map[axis] == 2:
+                    data = self.data[:, :, slice_index]
+            
+            else:
+                data = self.data
 
-        # Check if data is 2D
-        if data.ndim != 2:
-            QMessageBox.warning(self, "Warning", 
-                            f"Cannot plot data with shape {data.shape}. Expected 2D array.")
-            return
+            # Datasets over the memory budget are refused rather than read in full
+            try:
+                data = in_memory(data, "the heatmap")
+            except MemoryError as e:
+                QMessageBox.warning(self, "Warning", str(e))
+                return
 
-        # Remove boundary layers/points
-        data = self.remove_boundary_layers( data )                                                               # 2D dataset
+            # Check if data is 2D
+            if data.ndim != 2:
+                QMessageBox.warning(self, "Warning", 
+                                f"Cannot plot data with shape {data.shape}. Expected 2D array.")
+                return
+
+            # Remove boundary layers/points
+            data = self.remove_boundary_layers( data )                                                           # 2D dataset
+            pyramid = ImagePyramid(data)
+            self.heatmap_source = (self.data, source, pyramid)
             
         # Get selected colormap
         colormap = self.colormap_combobox.currentText()
         scale = self.scale_combobox.currentText()
         colorbar_title = self.colorbar_title_input.text() or "Value"
 
+        # Only the pyramid level and tiles of the view are drawn, the norms use the limits of the whole slice
+        vmin, vmax, positive = pyramid.limits()
+        view = pyramid.view(pyramid.extent()[:2], pyramid.extent()[2:], ax.bbox.width, ax.bbox.height)
+        data, extent = pyramid.render(view)
+        placement = dict(extent=extent, origin='lower')
+
         # Plot the data with the selected colormap and scale
         if   scale == "Linear":
-            im = ax.imshow(data, cmap=colormap, origin='lower')                   
+            im = ax.imshow(data, cmap=colormap, vmin=vmin, vmax=vmax, **placement)
         elif scale == "Log":  
-            im = ax.imshow(data, cmap=colormap, norm="log", origin='lower')    
+            im = ax.imshow(data, cmap=colormap, norm="log", vmin=positive, vmax=vmax, **placement)
         elif scale == "PowerLaw":
-            im = ax.imshow(data, cmap=colormap, norm=PowerNorm(gamma=0.7), origin='lower')
+            im = ax.imshow(data, cmap=colormap, norm=PowerNorm(gamma=0.7, vmin=vmin, vmax=vmax), **placement)
         elif scale == "Diverging":
             try:
-                norm = TwoSlopeNorm(vmin=data.min(), vcenter=0, vmax=data.max())
-                im = ax.imshow(data, cmap=colormap, norm=norm, origin='lower')
+                norm = TwoSlopeNorm(vmin=vmin, vcenter=0, vmax=vmax)
+                im = ax.imshow(data, cmap=colormap, norm=norm, **placement)
             except:
                 print("The minimum value, zero and maximum must be in ascending order.")
-                im = ax.imshow(data, cmap=colormap, origin='lower' )
+                im = ax.imshow(data, cmap=colormap, vmin=vmin, vmax=vmax, **placement)
         else:
             # Define the forward and inverse functions for the normalization
             def forward(x):
@@ -1095,8 +1316,13 @@ class PlotWindow(QDialog):
             def inverse(x):
                 return np.sinh(x) / 1.0
             
-            norm = FuncNorm( (forward, inverse), vmin=0, vmax=data.max() )
-            im = ax.imshow(data, cmap=colormap, norm=norm, origin='lower')
+            norm = FuncNorm( (forward, inverse), vmin=0, vmax=vmax )
+            im = ax.imshow(data, cmap=colormap, norm=norm, **placement)
+
+        # The image of the tiles may overhang the slice, the axes show the slice as before
+        ax.set_xlim(pyramid.extent()[:2])
+        ax.set_ylim(pyramid.extent()[2:])
+        self.heatmap = {'image': im, 'pyramid': pyramid, 'view': view}
 
         # Add colorbar with title
         cbar = self.figure.colorbar(im, ax=ax)
@@ -1123,8 +1349,36 @@ class PlotWindow(QDialog):
         if self.zoom_mode:
             self.create_rectangle_selector()
 
+        # Level of the final size of the axes, after the colorbar took its place
+        ax.apply_aspect()
+        self.update_heatmap()
+
         # Refresh the canvas
-        self.canvas.draw()
+        with span("PlotWindow canvas.draw", 'draw'):
+            self.canvas.draw()
+
+    def update_heatmap(self, scale=1):
+        """Draw the heatmap from the pyramid level and tiles of the current view. Returns True if they changed.
+
+        scale multiplies the size of the axes in pixels, for saving at a higher resolution than the screen.
+        """
+        heatmap = self.heatmap
+        if heatmap is None:
+            return False
+        ax, pyramid = heatmap['image'].axes, heatmap['pyramid']
+        width, height = ax.bbox.width * scale, ax.bbox.height * scale
+        view = pyramid.view(ax.get_xlim(), ax.get_ylim(), width, height)
+        if view == heatmap['view']:
+            return False
+
+        # Tiles of the zoom history stay cached for going back
+        history = [pyramid.view(xlim, ylim, width, height) for xlim, ylim in self.previous_views]
+        with span("PlotWindow heatmap tiles", 'draw', level=view[0]):
+            data, extent = pyramid.render(view, history)
+        heatmap['image'].set_data(data)
+        heatmap['image'].set_extent(extent)
+        heatmap['view'] = view
+        return True
 
     def save_plot(self):
         """Save the current plot to a file."""
@@ -1138,8 +1392,21 @@ class PlotWindow(QDialog):
         if not file_path:
             return
 
-        # Save the plot
-        self.figure.savefig(file_path, dpi = 1200)
+        # Save the plot, the 1D lines are animated and would be left out
+        animated = [plot['artist'] for plot in self.current_plots.values()] + [self.line_legend]
+        animated = [artist for artist in animated if artist is not None]
+        for artist in animated:
+            artist.set_animated(False)
+        if self.line_axes in self.figure.axes:
+            self.redecimate_lines(self.line_axes, scale=1200 / self.figure.dpi)
+        self.update_heatmap(scale=1200 / self.figure.dpi)
+        try:
+            self.figure.savefig(file_path, dpi = 1200)
+        finally:
+            for artist in animated:
+                artist.set_animated(True)
+            self.update_heatmap()
+            self.canvas.draw()                                  # Renderer of the screen and blit bitmaps
 
 # ----------------------------------------------- Mouse Motion track and activity------------------------------------------------
     def on_mouse_move(self, event):
@@ -1165,6 +1432,7 @@ class PlotWindow(QDialog):
             ax = self.figure.axes[0]
             ax.set_xlim(self.original_xlim)
             ax.set_ylim(self.original_ylim)
+            self.update_heatmap()
             self.canvas.draw()
             self.previous_views = []  # Clear zoom history
 
@@ -1220,6 +1488,7 @@ class PlotWindow(QDialog):
             # Apply new zoom
             ax.set_xlim(x1, x2)
             ax.set_ylim(y1, y2)
+            self.update_heatmap()                           # Finer tiles of the zoomed region
             self.canvas.draw()
         
         # Create new selector
@@ -0,0 +1,125 @@
+# preview_model.py
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+import numpy as np
+
+from hdf5_file_manager import file_manager
+from instrumentation import profiler
+
+class DatasetPreviewModel(QAbstractTableModel):
+    """Table model of a dataset plane. Values are read from HDF5 in small blocks as the view scrolls."""
+    ROW_PAGE =      200                                 # Rows added each time the view asks for more
+    BLOCK_ROWS =    64                                  # Size of the hyperslabs read from the file
+    BLOCK_COLS =    64
+    MAX_BLOCKS =    256                                 # Blocks kept in memory
+
+    def __init__(self, file_path, dataset_path, shape, parent=None):
+        super().__init__(parent)
+        self.file_path =    file_path
+        self.dataset_path = dataset_path
+        self.ndim =         len(shape)
+
+        # Datasets with more than 2 dimensions show the corner plane [0, ..., 0, :, :]
+        self.leading_index = (0,) * max(self.ndim - 2, 0)
+        if self.ndim == 0:
+            self.total_rows, self.total_cols = 1, 1
+        elif self.ndim == 1:
+            self.total_rows, self.total_cols = shape[0], 1
+        else:
+            self.total_rows, self.total_cols = shape[-2], shape[-1]
+
+        self.loaded_rows =  min(self.ROW_PAGE, self.total_rows)
+        self.blocks =       OrderedDict()               # {(block row, block col): numpy array}
+
+    def description(self):
+        """Describe which part of the dataset is shown."""
+        if self.ndim > 2:
+            index = ", ".join(str(i) for i in self.leading_index)
+            return f"Preview of plane [{index}, :, :]"
+        return "Preview"
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total_cols
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded_rows < self.total_rows
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Add the next page of rows when the view is scrolled to the bottom."""
+        count = min(self.ROW_PAGE, self.total_rows - self.loaded_rows)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded_rows, self.loaded_rows + count - 1)
+        self.loaded_rows += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row, col = index.row(), index.column()
+        block = self.read_block(row // self.BLOCK_ROWS, col // self.BLOCK_COLS)
+        value = block[row % self.BLOCK_ROWS, col % self.BLOCK_COLS]
+        if isinstance(value, (np.floating, float)):
+            return f"{value:.6g}"
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        return str(section)
+
+    def read_block(self, block_row, block_col):
+        """Return one block of the plane, reading it from the file if it is not cached."""
+        key = (block_row, block_col)
+        if key in self.blocks:
+            self.blocks.move_to_end(key)
+            return self.blocks[key]
+
+        rows = slice(block_row * self.BLOCK_ROWS, min((block_row + 1) * self.BLOCK_ROWS, self.total_rows))
+        cols = slice(block_col * self.BLOCK_COLS, min((block_col + 1) * self.BLOCK_COLS, self.total_cols))
+        with file_manager.reading(self.file_path) as file:
+            dataset = file[self.dataset_path]
+            if self.ndim == 0:
+                block = np.asarray(dataset[()]).reshape(1, 1)
+            elif self.ndim == 1:
+                block = dataset[rows].reshape(-1, 1)
+            else:
+                block = dataset[self.leading_index + (rows, cols)]
+        profiler.add_bytes(block.nbytes)
+
+        self.blocks[key] = block
+        if len(self.blocks) > self.MAX_BLOCKS:
+            self.blocks.popitem(last=False)
+        return block
+
+class SampledPreviewModel(DatasetPreviewModel):
+    """Table model of the strided preview kept in the stats cache. Nothing is read from the file.
+
+    Rows and columns are every step-th sample of the plane, the headers show their index in the dataset.
+    """
+    def __init__(self, sample, step, parent=None):
+        super().__init__(None, None, sample.shape, parent)
+        self.sample =   sample
+        self.step =     step
+
+    def description(self):
+        stride = f", stride {self.step}" if self.step > 1 else ""
+        return f"{super().description()}{stride} (cached)"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        return str(section * self.step)
+
+    def read_block(self, block_row, block_col):
+        rows = slice(block_row * self.BLOCK_ROWS, (block_row + 1) * self.BLOCK_ROWS)
+        cols = slice(block_col * self.BLOCK_COLS, (block_col + 1) * self.BLOCK_COLS)
+        if self.ndim == 0:
+            return self.sample.reshape(1, 1)
+        elif self.ndim == 1:
+            return self.sample[rows].reshape(-1, 1)
+        return self.sample[self.leading_index + (rows, cols)]
@@ -0,0 +1,143 @@
+# render_server.py
+"""
+Long-lived Mayavi process. It keeps Mayavi/VTK imported and recently used volumes in memory,
+and opens isosurface or slice views sent by the viewer over a local connection.
+"""
+import os
+import sys
+import json
+import queue
+import threading
+import subprocess
+from collections import OrderedDict
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from volume_handoff import copy_shared, load_volume
+
+VOLUME_CACHE_BYTES = 2 * 1024**3                        # Volumes kept by the server between views
+POLL_INTERVAL = 100                                     # Milliseconds between checks for new jobs
+AUTHKEY_ENV = 'FHELI_RENDER_AUTHKEY'
+
+class VolumeCache:
+    """Volumes read from HDF5 files, least recently used ones are dropped over the size limit."""
+    def __init__(self, max_bytes=VOLUME_CACHE_BYTES):
+        self.max_bytes =    max_bytes
+        self.volumes =      OrderedDict()               # {(file, dataset, mtime, size): array}
+
+    def get(self, description):
+        """Return the volume of a file reference, reading it only if it is not cached or the file changed."""
+        stat = os.stat(description['file_path'])
+        key = (os.path.abspath(description['file_path']), description['dataset_path'], stat.st_mtime_ns, stat.st_size)
+        if key in self.volumes:
+            self.volumes.move_to_end(key)
+            return self.volumes[key]
+
+        data = load_volume(description)
+        self.volumes[key] = data
+        while sum(volume.nbytes for volume in self.volumes.values()) > self.max_bytes and len(self.volumes) > 1:
+            self.volumes.popitem(last=False)
+        return data
+
+# ---------- Server side ----------
+def accept_jobs(listener, jobs):
+    """Receive jobs on a background thread, the views are opened by the GUI thread."""
+    while True:
+        job = {}
+        try:
+            with listener.accept() as connection:
+                job = connection.recv()
+                if 'shm_name' in job:                   # Copied before the viewer releases the block
+                    job['data'] = copy_shared(job)
+                jobs.put(job)
+                connection.send({'ok': True})
+        except (OSError, EOFError, AuthenticationError) as e:
+            print(f"Render server connection failed: {e}", file=sys.stderr)
+        if job.get('kind') == 'quit':
+            return
+
+def serve(parent_pid):
+    # Jobs are only accepted once Mayavi is imported, a failed import is seen by the viewer as a refused connection
+    from pyface.api import GUI
+    from pyface.timer.api import Timer
+    from plot_mayavi import render_volume
+
+    listener = Listener(('localhost', 0), authkey=bytes.fromhex(os.environ[AUTHKEY_ENV]))
+    print(json.dumps(list(listener.address)), flush=True)        # Only line written to stdout, read by the viewer
+
+    jobs = queue.Queue()
+    threading.Thread(target=accept_jobs, args=(listener, jobs), daemon=True).start()
+
+    gui = GUI()
+    cache = VolumeCache()
+
+    def process_jobs():
+        if os.getppid() != parent_pid:                  # The viewer is gone
+            gui.stop_event_loop()
+            return
+        while not jobs.empty():
+            job = jobs.get()
+            if job['kind'] == 'quit':
+                gui.stop_event_loop()
+                return
+            try:
+                data = job.pop('data') if 'data' in job else cache.get(job)
+                render_volume(data, job)
+            except Exception as e:
+                print(f"Render job failed: {e}", file=sys.stderr)
+
+    timer = Timer(POLL_INTERVAL, process_jobs)
+    gui.start_event_loop()
+    timer.Stop()
+    listener.close()
+
+# ---------- Viewer side ----------
+class RenderClient:
+    """Start the render server on demand and send it jobs. submit blocks until the server is ready."""
+    def __init__(self):
+        self.process =  None
+        self.address =  None
+        self.authkey =  os.urandom(16)
+        self._lock =    threading.RLock()
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """Start the server in the background if it is not running, e.g. while the user chooses the view."""
+        with self._lock:
+            if self.is_running():
+                return
+            env = dict(os.environ, **{AUTHKEY_ENV: self.authkey.hex()})
+            self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), str(os.getpid())],
+                                            stdout=subprocess.PIPE, env=env, text=True)
+            self.address = None
+
+    def submit(self, job):
+        """Send a view to the server, starting it if needed. Raises OSError if it cannot be reached."""
+        with self._lock:
+            self.start()
+            if self.address is None:
+                line = self.process.stdout.readline()   # Printed once Mayavi is imported
+                if not line:
+                    raise OSError("Render server did not start")
+                self.address = tuple(json.loads(line))
+            try:
+                with Client(self.address, authkey=self.authkey) as connection:
+                    connection.send(job)
+                    return connection.recv()
+            except (EOFError, AuthenticationError) as e:
+                raise OSError(f"Render server closed the connection: {e}")
+
+    def shutdown(self):
+        """Ask the server to exit."""
+        if self.is_running() and self.address is not None:
+            try:
+                self.submit({'kind': 'quit'})
+            except OSError:
+                self.process.terminate()
+        elif self.is_running():
+            self.process.terminate()
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
@@ -0,0 +1,121 @@
+# search_index.py
+import numpy as np
+
+MAX_RESULTS = 500                                       # Matches shown in the results list, the count is exact
+
+# Query terms 'field:value' are compared to a single field, other terms to the whole text of an entry
+FIELDS = ('name', 'path', 'shape', 'dtype', 'ndim', 'kind', 'attr', 'run')
+
+def format_shape(shape):
+    return "x".join(str(n) for n in shape)
+
+def attribute_text(attrs):
+    """Attribute names plus the values that are text, e.g. formula and equation of theory plots."""
+    words = []
+    for name, value in attrs.items():
+        words.append(str(name))
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', 'replace')
+        if isinstance(value, str):
+            words.append(value)
+        elif isinstance(value, np.ndarray) and value.dtype.kind in 'SUO':
+            words.extend(str(item) for item in value.ravel()[:16])
+    return " ".join(words)
+
+class SearchIndex:
+    """In-memory index of the names, text attributes, shapes and dtypes of every catalog entry.
+
+    A query is a list of terms that must all match (case-insensitive substrings). When a query
+    only extends the previous one (typing), just the previous matches are searched again.
+    """
+    def __init__(self):
+        self.entries =  []                              # [{'run', 'path', 'name', 'kind', 'shape', 'dtype'}]
+        self.fields =   {field: [] for field in FIELDS} # {field: [lowercase text per entry]}
+        self.texts =    []                              # Lowercase text of each entry, for plain terms
+        self._last =    None                            # (terms, matching entry indices) of the previous query
+
+    @classmethod
+    def from_catalog(cls, catalog, run=None):
+        index = cls()
+        index.add_catalog(catalog, run)
+        return index
+
+    @classmethod
+    def from_workspace(cls, workspace):
+        """Index the catalogs of every readable run of a workspace."""
+        index = cls()
+        for run in workspace:
+            if run.catalog is not None:
+                index.add_catalog(run.catalog, run.name)
+        return index
+
+    def add_catalog(self, catalog, run=None):
+        for entry in catalog.entries.values():
+            if entry['path'] != '/':
+                self.add(entry, run)
+
+    def add(self, entry, run=None):
+        """Index one catalog entry."""
+        shape = entry.get('shape')
+        values = {
+            'name':     entry['name'],
+            'path':     entry['path'],
+            'shape':    format_shape(shape) if shape is not None else "",
+            'dtype':    str(entry.get('dtype', "")),
+            'ndim':     str(len(shape)) if shape is not None else "",
+            'kind':     entry['kind'],
+            'attr':     attribute_text(entry['attrs']),
+            'run':      run or "",
+        }
+        for field, value in values.items():
+            self.fields[field].append(value.lower())
+        self.texts.append(" ".join(values[field] for field in ('path', 'shape', 'dtype', 'attr', 'run')).lower())
+        self.entries.append({'run': run, 'path': entry['path'], 'name': entry['name'], 'kind': entry['kind'],
+                             'shape': shape, 'dtype': entry.get('dtype')})
+        self._last = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def parse(query):
+        """Split a query into (field or None, lowercase value) terms."""
+        terms = []
+        for word in query.lower().split():
+            field, separator, value = word.partition(':')
+            if separator and field in FIELDS:
+                if value:
+                    terms.append((field, value))
+            else:
+                terms.append((None, word))
+        return terms
+
+    @staticmethod
+    def refines(terms, previous):
+        """True if every match of terms also matches previous, e.g. 'e_ab' -> 'e_abs tint'."""
+        if len(terms) < len(previous):
+            return False
+        return all(field == previous_field and
+                   (value == previous_value if field == 'ndim' else previous_value in value)
+                   for (field, value), (previous_field, previous_value) in zip(terms, previous))
+
+    def search(self, query):
+        """Return the indices of the entries matching every term of query."""
+        terms = self.parse(query)
+        if not terms:
+            self._last = None
+            return []
+
+        candidates = range(len(self.entries))
+        if self._last is not None and self.refines(terms, self._last[0]):
+            candidates = self._last[1]
+
+        matches = list(candidates)
+        for field, value in terms:
+            texts = self.texts if field is None else self.fields[field]
+            if field == 'ndim':                         # Whole numbers, 'ndim:1' must not match 10
+                matches = [i for i in matches if texts[i] == value]
+            else:
+                matches = [i for i in matches if value in texts[i]]
+        self._last = (terms, matches)
+        return matches
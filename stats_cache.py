@@ -0,0 +1,129 @@
+# stats_cache.py
+import hashlib
+import json
+import os
+import threading
+
+import h5py
+import numpy as np
+
+DEFAULT_MAX_BYTES = 512 * 1024**2                       # Size limit of the on-disk cache
+
+def default_cache_dir():
+    """Directory of the sidecar caches (can be changed with FHELI_CACHE_DIR)."""
+    return os.environ.get('FHELI_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'fheli_viewer'))
+
+def file_identity(file_path):
+    """Identify a file by its absolute path, size and modification time."""
+    stat = os.stat(file_path)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+def dataset_identity(dataset):
+    """Identify a dataset by its object address, times, storage size, shape and dtype, independently of the rest of the file.
+
+    The times are 0 in files written without track_times, the storage size still tells a rewritten dataset apart.
+    """
+    info = h5py.h5o.get_info(dataset.id)
+    return info.addr, info.ctime, info.mtime, dataset.id.get_storage_size(), dataset.shape, dataset.dtype.str
+
+def snapshot_identity(file, dataset_path, time_series):
+    """dataset_identity of a snapshot that a later timestep superseded, None otherwise.
+
+    The latest snapshot may still be written, its entries are keyed by the file state like other datasets.
+    """
+    if not time_series.superseded(dataset_path):
+        return None
+    return dataset_identity(file[dataset_path])
+
+def cache_key(file_path, dataset_path, identity=None):
+    """Return the cache key of a dataset of a file in its current state.
+
+    Datasets written once (time-series snapshots) can pass their snapshot_identity, their entries
+    then stay valid while the simulation appends new snapshots to the file.
+    """
+    if identity is None:
+        identity = file_identity(file_path)
+    else:
+        identity = (os.path.abspath(file_path),) + tuple(identity)
+    identity += (dataset_path,)
+    return hashlib.sha1(repr(identity).encode('utf-8')).hexdigest()
+
+class StatsCache:
+    """On-disk cache of per-dataset statistics, histograms and downsampled previews with LRU eviction."""
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir =    os.path.join(cache_dir or default_cache_dir(), 'stats')
+        self.max_bytes =    max_bytes
+        self._lock =        threading.Lock()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, file_path, dataset_path, identity=None):
+        """Return the cached entry {'stats', 'histogram', 'bin_edges', 'preview'} or None."""
+        path = self.entry_path(cache_key(file_path, dataset_path, identity))
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            try:
+                with np.load(path, allow_pickle=False) as npz:
+                    entry = {
+                        'stats':        json.loads(str(npz['stats'])),
+                        'histogram':    npz['histogram'] if 'histogram' in npz else None,
+                        'bin_edges':    npz['bin_edges'] if 'bin_edges' in npz else None,
+                        'preview':      npz['preview'] if 'preview' in npz else None,
+                    }
+                os.utime(path)                          # Mark as recently used
+                return entry
+            except Exception as e:
+                print(f"Discarding unreadable cache entry {path}: {e}")
+                os.remove(path)
+                return None
+
+    def put(self, file_path, dataset_path, stats, histogram=None, bin_edges=None, preview=None, identity=None):
+        """Store the results of a dataset and evict the least recently used entries over the size limit."""
+        path = self.entry_path(cache_key(file_path, dataset_path, identity))
+        arrays = {'stats': np.array(json.dumps(stats))}
+        if histogram is not None:
+            arrays['histogram'] = histogram
+            arrays['bin_edges'] = bin_edges
+        if preview is not None:
+            arrays['preview'] = preview
+
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, path)                 # Atomic, readers never see partial entries
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits its size limit."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npz'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except FileNotFoundError:               # Removed by another viewer meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            if os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+# Shared instance used by the viewer
+stats_cache = StatsCache()
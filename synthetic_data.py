@@ -0,0 +1,133 @@
+# coding=utf-8
+"""
+Write synthetic HDF5 files with the layout of the FHELI output (config/period, config/d_absorb,
+n_e, B0x/B0y/B0z and a series of E_abs__tintNNNNN snapshots), for benchmarks and for trying
+the viewer without a simulation at hand. The content is reproducible for a given seed.
+
+Example:
+    python synthetic_data.py bench.h5 -s 128 128 96 -n 300 -i 100
+"""
+
+# import standard modules
+import argparse
+import sys
+
+import h5py
+import numpy as np
+
+
+def column_profile(shape, width=.3):
+    """Gaussian profile across the grid, centered in x and y, of shape (Nx, Ny, 1)."""
+    x = np.linspace(-1., 1., shape[0])[:, None, None]
+    y = np.linspace(-1., 1., shape[1])[None, :, None]
+    return np.exp(-(x**2 + y**2) / width**2)
+
+
+def density_profile(shape, d_absorb):
+    """Electron density: plasma column along z, rising behind the absorbers (normalized units)."""
+    ramp = np.clip((np.arange(shape[2]) - d_absorb) / max(shape[2] / 4, 1), 0., 1.)
+    return 2. * column_profile(shape) * ramp[None, None, :]
+
+
+def wave_snapshot(shape, step, period, envelope, noise):
+    """|E| of a wave launched at the lower z boundary, travelling up by half a cell per timestep."""
+    z       = np.arange(shape[2])
+    front   = .5 * step
+    phase   = 2 * np.pi * (z - front) / period
+    onset   = 1. / (1. + np.exp((z - front) / period))          # Zero ahead of the wave front
+    field   = np.abs(np.sin(phase)) * onset
+    return envelope * field[None, None, :] + noise
+
+
+def write_file(file_path, shape=(64, 64, 64), snapshots=100, interval=100, period=16, d_absorb=None,
+               dtype='f8', chunks=None, compression=None, seed=0, callback=None):
+    """
+    Write a synthetic FHELI file and return its path.
+
+    shape:          grid points (Nx, Ny, Nz) of every 3D dataset
+    snapshots:      number of E_abs__tintNNNNN datasets, at timesteps interval, 2*interval, ...
+    chunks:         chunk shape of the 3D datasets, True for h5py's guess, None for contiguous
+    callback:       callback(fraction) is called after every snapshot
+    """
+    shape       = tuple(int(n) for n in shape)
+    d_absorb    = int(min(shape) // 8 if d_absorb is None else d_absorb)
+    rng         = np.random.default_rng(seed)
+    options     = dict(dtype=dtype, chunks=chunks, compression=compression)
+
+    with h5py.File(file_path, 'w') as f:
+        f.attrs['synthetic'] = True
+        f.attrs['seed'] = seed
+
+        # configurational data, read as readhdf5( fname, 'config/period' )[0]
+        config = f.create_group('config')
+        config['period']    = np.array([period], dtype='f8')
+        config['d_absorb']  = np.array([d_absorb], dtype='f8')
+        config['N_x'], config['N_y'], config['N_z'] = (np.array([n]) for n in shape)
+        config['ant_radius']    = np.array([min(shape[:2]) / 8], dtype='f8')
+        config['ant_lenght']    = np.array([2 * period], dtype='f8')
+
+        # background plasma
+        density = density_profile(shape, d_absorb)
+        f.create_dataset('n_e', data=density, **options)
+        x = np.linspace(-1., 1., shape[0])[:, None, None]
+        f.create_dataset('B0x', data=np.broadcast_to(.05 * x, shape), **options)
+        f.create_dataset('B0y', data=np.zeros(shape), **options)
+        f.create_dataset('B0z', data=np.broadcast_to(1. + .2 * density, shape), **options)
+
+        # snapshots, radially confined by the plasma column
+        envelope = .1 + column_profile(shape)
+        for i in range(snapshots):
+            step = (i + 1) * interval
+            noise = 1e-3 * rng.random(shape)
+            f.create_dataset('E_abs__tint{0:05d}'.format(step),
+                             data=wave_snapshot(shape, step, period, envelope, noise), **options)
+            if callback is not None:
+                callback((i + 1) / snapshots)
+    return file_path
+
+
+def main():
+    #{{{
+
+    # initialize parser for command line options
+    parser  = argparse.ArgumentParser( description="Write a synthetic HDF5 file with the layout of the FHELI output." )
+    parser.add_argument( "output", type=str,
+                         help="HDF5 file to write." )
+    parser.add_argument( "-s", "--shape", type=int, nargs=3, default=[64, 64, 64], metavar=("NX", "NY", "NZ"),
+                         help="Grid points of the 3D datasets." )
+    parser.add_argument( "-n", "--snapshots", type=int, default=100,
+                         help="Number of E_abs__tintNNNNN snapshots." )
+    parser.add_argument( "-i", "--interval", type=int, default=100,
+                         help="Timesteps between two snapshots." )
+    parser.add_argument( "-p", "--period", type=float, default=16,
+                         help="Grid points per vacuum wavelength (config/period)." )
+    parser.add_argument( "--d_absorb", type=int, default=None,
+                         help="Absorber thickness in grid points (config/d_absorb), default: 1/8 of the grid." )
+    parser.add_argument( "--dtype", type=str, default="f8",
+                         help="Data type of the 3D datasets." )
+    parser.add_argument( "--chunks", type=int, nargs=3, default=None,
+                         help="Chunk shape of the 3D datasets, contiguous if not given." )
+    parser.add_argument( "--gzip", type=int, default=None, metavar="LEVEL",
+                         help="Compress the 3D datasets with gzip (needs --chunks)." )
+    parser.add_argument( "--seed", type=int, default=0,
+                         help="Seed of the random noise." )
+
+    # read all argments from command line
+    args    = parser.parse_args()
+
+    def show_progress(fraction):
+        sys.stdout.write( "\r  writing {0}: {1:4.0%}".format(args.output, fraction) )
+        sys.stdout.flush()
+
+    write_file( args.output, shape=args.shape, snapshots=args.snapshots, interval=args.interval,
+                period=args.period, d_absorb=args.d_absorb, dtype=args.dtype,
+                chunks=tuple(args.chunks) if args.chunks else None,
+                compression=args.gzip, seed=args.seed, callback=show_progress )
+    print( "\n{0}: {1} snapshots of shape {2}".format(args.output, args.snapshots, tuple(args.shape)) )
+    return 0
+
+    #}}}
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,5 @@
 #Plot theoretical equations 
 import scipy.constants as sp
-import scipy.special as sc
 
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QPushButton, QComboBox, 
@@ -13,6 +12,9 @@ import numpy as np
 import h5py
 import re
 
+from hdf5_file_manager import file_manager
+from instrumentation import profiler, traced
+
 # Physical constants (SI units)
 PHYSICAL_CONSTANTS = {
     'c':    2.99792458e8,           # Speed of light [m/s]
@@ -442,7 +444,7 @@ class TheoreticalWindow(QDialog):
             return False
         
         try:
-            with h5py.File(self.parent_window.file_path, 'a') as file:
+            with file_manager.write(self.parent_window.file_path) as file:
                 # Create or clear existing group
                 if 'Theory_plasma_parameters' in file:
                     del file['Theory_plasma_parameters']
@@ -658,6 +660,7 @@ class TheoreticalWindow(QDialog):
                 self.x_max.setText("100")
                 self.param_layout.addRow("X max:", self.x_max)
     
+    @traced(category='io')
     def extract_variables_from_hdf5(self):
         """Extract variables from HDF5 file, including max values from datasets."""
         if not self.parent_window or not self.parent_window.file_path:
@@ -668,7 +671,7 @@ class TheoreticalWindow(QDialog):
         missing_vars = []
         
         try:
-            with h5py.File(self.parent_window.file_path, 'r') as file:
+            with file_manager.reading(self.parent_window.file_path) as file:
                 for var, widget in self.variable_widgets.items():
                     path = widget.text().strip()
                     manual_input = self.manual_params[var]
@@ -694,6 +697,7 @@ class TheoreticalWindow(QDialog):
                                 raise ValueError(f"{dataset_path} is not a dataset")
                                 
                             data = dataset[()]
+                            profiler.add_bytes(data.nbytes)
                             
                             # Handle different dimensionalities
                             if data.ndim == 1:
@@ -816,8 +820,10 @@ class TheoreticalWindow(QDialog):
         else:
             return np.linspace(0, 100, 1000)
     
+    @traced(category='compute')
     def evaluate_equation(self, x):
         """Safely evaluate the selected equation at given x values."""
+        import scipy.special as sc                      # Bessel functions, loaded on the first evaluation
         eq_name = self.equation_combo.currentText()
         eq_info = self.equation_info[eq_name]
 
@@ -1143,6 +1149,7 @@ class TheoreticalWindow(QDialog):
         
         self.plot_info_label.setText(info_text)
 
+    @traced(category='draw')
     def plot_selected(self):
         """Plot the selected theory plots."""
         selected = self.plot_list_widget.selectedItems()
@@ -1181,6 +1188,7 @@ class TheoreticalWindow(QDialog):
         self.plot_window.oneD_plot()
         self.plot_window.show()
     
+    @traced(category='draw')
     def plot_all(self):
         """Plot all theory plots."""
         if not self.theory_plots:
@@ -1244,6 +1252,7 @@ class TheoreticalWindow(QDialog):
         if hasattr(self, 'extracted_vars'):
             del self.extracted_vars
     
+    @traced(category='io')
     def save_all_to_hdf5(self):
         """Save all theory plots to the HDF5 file."""
         if not self.theory_plots:
@@ -1255,7 +1264,7 @@ class TheoreticalWindow(QDialog):
             return
         
         try:
-            with h5py.File(self.parent_window.file_path, 'a') as file:
+            with file_manager.write(self.parent_window.file_path) as file:
                 # Create or clear theory group
                 if 'Theory_plots' in file:
                     del file['Theory_plots']
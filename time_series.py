@@ -0,0 +1,98 @@
+# time_series.py
+import re
+
+from hdf5_catalog import HDF5Catalog
+
+# Snapshot datasets are written by FHELI as <quantity>__tint<timestep>, e.g. E_abs__tint00161
+SNAPSHOT_PATTERN = re.compile(r'^(?P<family>.+?)__tint(?P<step>\d+)$')
+
+class TimeSeriesIndex:
+    """Index of snapshot families found in a file, sorted numerically by timestep."""
+    def __init__(self, pattern=SNAPSHOT_PATTERN):
+        self.pattern =  pattern
+        self.series =   {}                              # {family: {step: {'step', 'path', 'shape'}}}
+        self._sorted =  {}                              # {family: snapshots sorted by step}
+
+    @classmethod
+    def from_catalog(cls, catalog, pattern=SNAPSHOT_PATTERN):
+        """Build the index from the metadata catalog, without reading the file again."""
+        index = cls(pattern)
+        for entry in catalog.datasets():
+            index.add(entry['path'], entry['shape'])
+        return index
+
+    @classmethod
+    def from_file(cls, file_path, pattern=SNAPSHOT_PATTERN):
+        """Build the index of a file (used by the scripts that have no catalog)."""
+        return cls.from_catalog(HDF5Catalog.from_file(file_path), pattern)
+
+    def add(self, path, shape):
+        """Register a dataset if its name matches the snapshot pattern. Returns True if it was added."""
+        parent, _, name = path.rpartition('/')
+        match = self.pattern.match(name)
+        if match is None:
+            return False
+
+        family = f"{parent}/{match.group('family')}".lstrip('/')
+        step = int(match.group('step'))
+        self.series.setdefault(family, {})[step] = {'step': step, 'path': path, 'shape': tuple(shape)}
+        self._sorted.pop(family, None)
+        return True
+
+    def families(self):
+        """Return the names of the snapshot families."""
+        return sorted(self.series)
+
+    def default_family(self):
+        """Return E_abs if present, otherwise the family with the most snapshots."""
+        if not self.series:
+            return None
+        if 'E_abs' in self.series:
+            return 'E_abs'
+        return max(self.series, key=lambda family: len(self.series[family]))
+
+    def snapshots(self, family):
+        """Return the snapshots of a family sorted by timestep."""
+        if family not in self._sorted:
+            self._sorted[family] = [self.series[family][step] for step in sorted(self.series.get(family, {}))]
+        return self._sorted[family]
+
+    def steps(self, family):
+        """Return the timesteps of a family in increasing order."""
+        return [snapshot['step'] for snapshot in self.snapshots(family)]
+
+    def paths(self, family):
+        """Return the dataset paths of a family in timestep order."""
+        return [snapshot['path'] for snapshot in self.snapshots(family)]
+
+    def path(self, family, step):
+        """Return the dataset path of one timestep."""
+        return self.series[family][step]['path']
+
+    def get(self, family, step):
+        """Return the snapshot of a family at one timestep, or None."""
+        return self.series.get(family, {}).get(step)
+
+    def latest(self, family):
+        """Return the snapshot with the highest timestep, or None."""
+        snapshots = self.snapshots(family)
+        return snapshots[-1] if snapshots else None
+
+    def family_of(self, path):
+        """Return (family, step) of a snapshot path, or None if it is not a snapshot."""
+        parent, _, name = path.rpartition('/')
+        match = self.pattern.match(name)
+        if match is None:
+            return None
+        return f"{parent}/{match.group('family')}".lstrip('/'), int(match.group('step'))
+
+    def superseded(self, path):
+        """True if path is a snapshot with a later timestep in its family, the simulation is done writing it."""
+        family_step = self.family_of(path)
+        if family_step is None:
+            return False
+        latest = self.latest(family_step[0])
+        return latest is not None and latest['step'] > family_step[1]
+
+    def __bool__(self):
+        return bool(self.series)
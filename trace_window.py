@@ -0,0 +1,107 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableWidget, QTableWidgetItem,
+    QHeaderView, QFileDialog, QCheckBox
+)
+from PyQt5.QtCore import Qt, QTimer
+
+from instrumentation import profiler
+
+COLUMNS = ["Span", "Category", "Calls", "Total ms", "Mean ms", "Max ms", "MB read", "Peak MB"]
+
+class TraceWindow(QDialog):
+    """Summary of the recorded profiling spans, slowest first."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Profiling Summary")
+        self.setGeometry(250, 150, 820, 450)
+
+        # Layout
+        self.layout = QVBoxLayout(self)
+
+        # Switches of the profiler
+        self.switch_layout = QHBoxLayout()
+        self.layout.addLayout(self.switch_layout)
+        self.enabled_checkbox = QCheckBox("Record spans", self)
+        self.enabled_checkbox.setChecked(profiler.enabled)
+        self.enabled_checkbox.toggled.connect(profiler.set_enabled)
+        self.switch_layout.addWidget(self.enabled_checkbox)
+        self.memory_checkbox = QCheckBox("Track peak memory (slower)", self)
+        self.memory_checkbox.setChecked(profiler.memory_tracking)
+        self.memory_checkbox.toggled.connect(profiler.set_memory_tracking)
+        self.switch_layout.addWidget(self.memory_checkbox)
+        self.switch_layout.addStretch()
+
+        # Table of spans
+        self.table = QTableWidget(0, len(COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(COLUMNS.index("Total ms"), Qt.DescendingOrder)
+        self.layout.addWidget(self.table)
+
+        self.status_label = QLabel(self)
+        self.layout.addWidget(self.status_label)
+
+        # Buttons
+        self.button_layout = QHBoxLayout()
+        self.layout.addLayout(self.button_layout)
+        self.refresh_button = QPushButton("Refresh", self)
+        self.refresh_button.clicked.connect(self.refresh)
+        self.button_layout.addWidget(self.refresh_button)
+        self.clear_button = QPushButton("Clear", self)
+        self.clear_button.clicked.connect(self.clear)
+        self.button_layout.addWidget(self.clear_button)
+        self.export_button = QPushButton("Export Chrome Trace", self)
+        self.export_button.clicked.connect(self.export_trace)
+        self.button_layout.addWidget(self.export_button)
+        self.button_layout.addStretch()
+
+        # The summary follows new spans while the window is open
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.enabled_checkbox.setChecked(profiler.enabled)           # May have been switched in the menu
+        self.memory_checkbox.setChecked(profiler.memory_tracking)
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        """Fill the table with the current summary."""
+        rows = profiler.summary()
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            peak = row['peak_memory'] / 1024**2 if row['peak_memory'] is not None else ""
+            values = [row['name'], row['category'], row['calls'], row['total_ms'], row['mean_ms'], row['max_ms'],
+                      row['bytes_read'] / 1024**2, peak]
+            for j, value in enumerate(values):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    item.setData(Qt.DisplayRole, round(value, 2))   # Numbers sort numerically
+                elif isinstance(value, int):
+                    item.setData(Qt.DisplayRole, value)
+                else:
+                    item.setText(value)
+                self.table.setItem(i, j, item)
+        self.table.setSortingEnabled(True)
+        self.status_label.setText(f"{len(profiler.events)} spans recorded"
+                                  + ("" if profiler.enabled else " (recording is off)"))
+
+    def clear(self):
+        profiler.clear()
+        self.refresh()
+
+    def export_trace(self):
+        """Save the spans as Chrome trace JSON, to open in chrome://tracing or ui.perfetto.dev."""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Chrome Trace", "trace.json", "JSON Files (*.json)")
+        if path:
+            profiler.export_chrome_trace(path)
+            self.status_label.setText(f"Trace saved to {path}")
@@ -0,0 +1,53 @@
+# volume_handoff.py
+import sys
+from multiprocessing import shared_memory, resource_tracker
+
+import h5py
+import numpy as np
+
+_attached = []                                          # Shared blocks mapped by this process, kept alive with their arrays
+
+def volume_reference(file_path, dataset_path):
+    """Describe a volume by its file and dataset, the viewer process reads it straight from HDF5."""
+    return {'file_path': file_path, 'dataset_path': dataset_path}
+
+def share_array(data):
+    """Copy an in-memory array into a new shared memory block. Returns (block, description)."""
+    data = np.ascontiguousarray(data)
+    block = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    np.ndarray(data.shape, dtype=data.dtype, buffer=block.buf)[...] = data
+    return block, {'shm_name': block.name, 'shape': list(data.shape), 'dtype': data.dtype.str}
+
+def release_shared(block):
+    """Close and remove a shared block created by share_array."""
+    block.close()
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+def attach_array(description):
+    """Map a shared block created by another process without copying it. The creator owns and removes it."""
+    if sys.version_info >= (3, 13):
+        block = shared_memory.SharedMemory(name=description['shm_name'], track=False)
+    else:
+        block = shared_memory.SharedMemory(name=description['shm_name'])
+        resource_tracker.unregister(block._name, 'shared_memory')   # Otherwise it is removed when this process exits
+    _attached.append(block)
+    return np.ndarray(tuple(description['shape']), dtype=np.dtype(description['dtype']), buffer=block.buf)
+
+def copy_shared(description):
+    """Return a private copy of a shared block and unmap it, so its creator can remove it right away."""
+    array = attach_array(description)
+    block = _attached.pop()
+    copy = np.array(array)
+    del array
+    block.close()
+    return copy
+
+def load_volume(description):
+    """Return the volume of a description made by volume_reference or share_array."""
+    if 'shm_name' in description:
+        return attach_array(description)
+    with h5py.File(description['file_path'], 'r') as file:
+        return file[description['dataset_path']][()]
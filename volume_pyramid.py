@@ -0,0 +1,177 @@
+# volume_pyramid.py
+import hashlib
+import math
+import os
+
+import h5py
+import numpy as np
+
+from hdf5_file_manager import file_manager
+from stats_cache import cache_key, default_cache_dir
+from dataset_stats import BLOCK_BYTES
+from instrumentation import profiler
+
+FACTORS =       (2, 4, 8)                               # Downsampling factors of the levels
+REDUCTIONS =    ('mean', 'max')
+DEFAULT_MAX_BYTES = 16 * 1024**3                        # Size limit of the sidecars in the cache
+
+def reduce_axis(data, factor, axis, reduction):
+    """Reduce groups of factor elements along one axis, the last group may be shorter."""
+    starts = np.arange(0, data.shape[axis], factor)
+    if reduction == 'max':
+        return np.maximum.reduceat(data, starts, axis=axis)
+    counts = np.diff(np.append(starts, data.shape[axis]))
+    shape = [1] * data.ndim
+    shape[axis] = len(counts)
+    return np.add.reduceat(data, starts, axis=axis) / counts.reshape(shape)
+
+def reduce_block(data, factor, reduction='mean'):
+    """Downsample an array by factor along every axis with the mean or the max of each box."""
+    data = np.asarray(data)
+    if np.iscomplexobj(data):
+        data = np.abs(data)
+    if reduction == 'mean':
+        data = data.astype(np.float64, copy=False)
+    for axis in range(data.ndim):
+        data = reduce_axis(data, factor, axis, reduction)
+    return data
+
+def reduced_shape(shape, factor):
+    return tuple(math.ceil(n / factor) for n in shape)
+
+def dataset_prefix(file_path, dataset_path):
+    """Common start of the sidecar names of a dataset, whatever the state of its file."""
+    return hashlib.sha1(repr((os.path.abspath(file_path), dataset_path)).encode('utf-8')).hexdigest()[:16]
+
+def remove_sidecar(path):
+    """Delete a sidecar, its pooled handle is closed after the reads in progress."""
+    file_manager.invalidate(path)
+    try:
+        os.remove(path)
+    except OSError:                                     # Removed meanwhile, or still open on Windows
+        pass
+
+def choose_factor(shape, max_elements=256**3):
+    """Smallest pyramid factor (1 = full resolution) that brings a volume under max_elements."""
+    for factor in (1,) + FACTORS:
+        if np.prod(reduced_shape(shape, factor), dtype=np.float64) <= max_elements:
+            return factor
+    return FACTORS[-1]
+
+class VolumePyramid:
+    """Mean and max downsampled copies (2x, 4x, 8x) of a 3D dataset, stored in a sidecar HDF5 file in the cache.
+
+    The sidecar is named after the file identity, it is rebuilt when the source file changes
+    (superseded snapshots can pass their snapshot_identity to survive writes elsewhere in the file).
+    A rebuild removes the sidecar of the previous state, and the least recently used sidecars
+    are evicted above max_bytes. Levels are stored as '<reduction>/<factor>', e.g. 'mean/4'.
+    """
+    def __init__(self, file_path, dataset_path, cache_dir=None, identity=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.file_path =    file_path
+        self.dataset_path = dataset_path
+        self.max_bytes =    max_bytes
+        self.directory =    os.path.join(cache_dir or default_cache_dir(), 'pyramids')
+        self.prefix =       dataset_prefix(file_path, dataset_path)
+        self.path =         os.path.join(self.directory,
+                                         f"{self.prefix}_{cache_key(file_path, dataset_path, identity)}.h5")
+
+    @staticmethod
+    def level_name(factor, reduction='mean'):
+        return f"{reduction}/{factor}"
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def build(self, callback=None, block_bytes=BLOCK_BYTES):
+        """Compute every level in one pass over slabs of the source. callback(fraction_done) after every slab."""
+        with file_manager.reading(self.file_path) as file:
+            dataset = file[self.dataset_path]
+            if dataset.ndim != 3:
+                raise ValueError(f"{self.dataset_path} is not a 3D dataset")
+
+            # Slabs along the first axis, a multiple of the largest factor and of the chunk rows
+            row_bytes = dataset.dtype.itemsize * dataset.shape[1] * dataset.shape[2]
+            step = math.lcm(FACTORS[-1], dataset.chunks[0] if dataset.chunks else 1)
+            rows = max(step, block_bytes // max(row_bytes, 1) // step * step)
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with h5py.File(temp_path, 'w') as sidecar:
+                sidecar.attrs['source_file'] = os.path.abspath(self.file_path)
+                sidecar.attrs['source_dataset'] = self.dataset_path
+                levels = {}
+                for reduction in REDUCTIONS:
+                    for factor in FACTORS:
+                        dtype = np.float64 if reduction == 'mean' or dataset.dtype.kind == 'c' else dataset.dtype
+                        levels[reduction, factor] = sidecar.create_dataset(
+                            self.level_name(factor, reduction), shape=reduced_shape(dataset.shape, factor),
+                            dtype=dtype)
+
+                for start in range(0, dataset.shape[0], rows):
+                    slab = dataset[start:start + rows]
+                    profiler.add_bytes(slab.nbytes)
+                    for (reduction, factor), level in levels.items():
+                        reduced = reduce_block(slab, factor, reduction)
+                        level[start // factor:start // factor + reduced.shape[0]] = reduced
+                    del slab
+                    if callback is not None:
+                        callback(min(start + rows, dataset.shape[0]) / dataset.shape[0])
+            os.replace(temp_path, self.path)            # Atomic, readers never see partial sidecars
+        self.remove_stale()
+        self.evict()
+
+    def ensure(self, callback=None):
+        """Build the sidecar if it does not exist yet."""
+        if not self.exists():
+            self.build(callback)
+        else:
+            self.touch()
+
+    def touch(self):
+        """Mark the sidecar as recently used."""
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def remove_stale(self):
+        """Remove the sidecars of this dataset built for earlier states of its file."""
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(f"{self.prefix}_") and name.endswith('.h5') and path != self.path:
+                remove_sidecar(path)
+
+    def evict(self):
+        """Remove the least recently used sidecars until the cache fits its size limit, this one is kept."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.h5'):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:                   # Removed by another viewer meanwhile
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path != self.path:
+                remove_sidecar(path)
+                total -= size
+
+    def reference(self, factor, reduction='mean'):
+        """(file, dataset) from which a level is read, factor 1 is the source dataset itself."""
+        if factor == 1:
+            return self.file_path, self.dataset_path
+        return self.path, self.level_name(factor, reduction)
+
+    def level(self, factor, reduction='mean'):
+        """Read one level, building the pyramid if needed."""
+        if factor != 1:
+            self.ensure()
+        file_path, dataset_path = self.reference(factor, reduction)
+        with file_manager.reading(file_path) as file:
+            return file[dataset_path][()]
@@ -0,0 +1,68 @@
+# workers.py
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class CancelledError(Exception):
+    """Raised inside a task when its worker has been cancelled."""
+
+class WorkerSignals(QObject):
+    """Signals emitted by a Worker. They are delivered on the UI thread."""
+    progress =  pyqtSignal(object, float)               # (partial result, fraction done)
+    result =    pyqtSignal(object)
+    error =     pyqtSignal(str)
+    finished =  pyqtSignal()
+
+class Worker(QRunnable):
+    """Run a function on the thread pool. The function receives the worker as keyword 'worker'
+    so it can report progress and stop early once the worker is cancelled."""
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn =           fn
+        self.args =         args
+        self.kwargs =       kwargs
+        self.signals =      WorkerSignals()
+        self._cancelled =   threading.Event()
+
+    def cancel(self):
+        """Ask the task to stop. No result is delivered after this call."""
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        """Raise CancelledError if the worker has been cancelled."""
+        if self._cancelled.is_set():
+            raise CancelledError()
+
+    def report_progress(self, value, fraction):
+        """Send a partial result to the UI thread (and stop here if cancelled)."""
+        self.check_cancelled()
+        self.signals.progress.emit(value, fraction)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, worker=self, **self.kwargs)
+        except CancelledError:
+            pass
+        except Exception:
+            if not self.is_cancelled():
+                self.signals.error.emit(traceback.format_exc())
+        else:
+            if not self.is_cancelled():
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+# Workers are kept alive here until they have finished
+_running_workers = set()
+
+def start_worker(worker, pool=None):
+    """Start a worker on the (global) thread pool and keep a reference to it while it runs."""
+    _running_workers.add(worker)
+    worker.signals.finished.connect(lambda: _running_workers.discard(worker))
+    (pool or QThreadPool.globalInstance()).start(worker)
+    return worker
@@ -0,0 +1,150 @@
+# workspace.py
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import h5py
+import numpy as np
+
+from hdf5_catalog import HDF5Catalog
+from time_series import TimeSeriesIndex
+from lazy_array import open_dataset
+
+HDF5_EXTENSIONS =   ('.h5', '.hdf5')
+CONFIG_GROUP =      'config'                            # FHELI writes the run parameters here, e.g. config/period
+MAX_CONFIG_SIZE =   16                                  # Larger config datasets are listed but not read
+READ_ERRORS =       (OSError, KeyError, ValueError, RuntimeError)   # Raised by h5py for missing or corrupt files
+
+def find_runs(root):
+    """Return the HDF5 files below a directory, sorted by their path."""
+    paths = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        paths.extend(os.path.join(directory, name) for name in sorted(filenames)
+                     if name.lower().endswith(HDF5_EXTENSIONS))
+    return paths
+
+def run_name(root, file_path):
+    """Name of a run: the directory of its file relative to the root, plus the file name if it is not fileout.h5."""
+    relative = os.path.relpath(file_path, root)
+    directory, name = os.path.split(relative)
+    if directory and name == 'fileout.h5':
+        return directory
+    return relative
+
+def read_config(file, catalog):
+    """Read the small datasets and the attributes of the config group. Single values are returned as scalars."""
+    config = {}
+    if not catalog.is_group(f"/{CONFIG_GROUP}"):
+        return config
+    config.update(catalog.get(f"/{CONFIG_GROUP}")['attrs'])
+    for entry in catalog.list_children(f"/{CONFIG_GROUP}"):
+        if entry['kind'] != 'dataset' or int(np.prod(entry['shape'])) > MAX_CONFIG_SIZE:
+            continue
+        value = file[entry['path']][()]
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', 'replace')
+        elif np.size(value) == 1:
+            value = np.asarray(value).item()
+        config[entry['name']] = value
+    return config
+
+class Run:
+    """One output file of a workspace: its catalog, time-series index and config values."""
+    def __init__(self, name, file_path):
+        self.name =         name
+        self.file_path =    file_path
+        self.catalog =      None
+        self.time_series =  TimeSeriesIndex()
+        self.config =       {}                          # {parameter name: value}
+        self.error =        None                        # Message if the file could not be indexed
+
+    def index(self):
+        """Build the catalog and read the config values, field data is not touched.
+
+        The file is closed afterwards instead of joining the handle pool, a workspace may hold hundreds of runs.
+        """
+        with h5py.File(self.file_path, 'r') as file:
+            self.catalog = HDF5Catalog(self.file_path)
+            self.catalog.scan(file)
+            self.config = read_config(file, self.catalog)
+        self.time_series = TimeSeriesIndex.from_catalog(self.catalog)
+        return self
+
+    def describe(self, names=None):
+        """Short 'name=value' summary of config values, e.g. for the tree."""
+        names = names if names is not None else sorted(self.config)
+        return ", ".join(f"{name}={self.config[name]:.4g}" if isinstance(self.config[name], float)
+                         else f"{name}={self.config[name]}" for name in names if name in self.config)
+
+class Workspace:
+    """Catalogs of every run in a directory. Datasets are addressed by (run name, dataset path)."""
+    def __init__(self, root):
+        self.root = root
+        self.runs = {}                                  # {run name: Run}, in path order
+
+    @classmethod
+    def from_directory(cls, root, workers=None, callback=None):
+        """Index every HDF5 file below root on a thread pool. callback(run, fraction_done) after each file."""
+        workspace = cls(root)
+        paths = find_runs(root)
+        for file_path in paths:
+            run = Run(run_name(root, file_path), file_path)
+            workspace.runs[run.name] = run
+
+        with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 1) + 4)) as executor:
+            futures = {executor.submit(run.index): run for run in workspace.runs.values()}
+            for done, future in enumerate(as_completed(futures), 1):
+                run = futures[future]
+                try:
+                    future.result()
+                except Exception as e:                  # Unreadable, truncated or corrupt files are kept with their error,
+                    run.error = str(e)                  # e.g. a malformed attribute or config value
+                if callback is not None:
+                    callback(run, done / len(futures))
+        return workspace
+
+    def __len__(self):
+        return len(self.runs)
+
+    def __iter__(self):
+        return iter(self.runs.values())
+
+    def run(self, name):
+        return self.runs[name]
+
+    def get(self, name, path):
+        """Return the metadata of a dataset of a run, or None."""
+        run = self.runs.get(name)
+        if run is None or run.catalog is None:
+            return None
+        return run.catalog.get(path)
+
+    def resolve(self, name, path):
+        """Return (file path, dataset path) of a (run, path) address, as expected by the single-file tools."""
+        return self.runs[name].file_path, path
+
+    def open(self, name, path):
+        """Open a dataset of a run as an array or a lazy proxy (see lazy_array.open_dataset)."""
+        return open_dataset(*self.resolve(name, path))
+
+    def runs_with(self, path):
+        """Names of the runs that contain a dataset path."""
+        return [run.name for run in self if run.catalog is not None and run.catalog.get(path) is not None]
+
+    def parameter_names(self):
+        """Config parameters found in any run."""
+        return sorted({name for run in self for name in run.config})
+
+    def varying_parameters(self):
+        """Config parameters whose value differs between runs, i.e. the parameters of the scan."""
+        varying = []
+        for name in self.parameter_names():
+            values = [repr(run.config.get(name)) for run in self if run.error is None]
+            if len(set(values)) > 1:
+                varying.append(name)
+        return varying
+
+    def parameter_table(self, names=None):
+        """Rows (run name, {parameter: value}) of the selected config parameters."""
+        names = names if names is not None else self.parameter_names()
+        return [(run.name, {name: run.config.get(name) for name in names}) for run in self]